@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ConflationStats:
+    offered: int = 0
+    conflated: int = 0
+    released: int = 0
+    pending: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class Conflator:
+    """Last-value-per-uid buffer with a per-uid interval and a global rate.
+
+    ``offer`` keeps only the newest pending item for each uid. ``poll``
+    releases pending items whose uid has not been released within
+    ``min_interval_s``, in the order the uids first became pending, limited
+    by a token bucket of ``max_eps`` events per second (``burst`` deep).
+    A uid whose item is replaced keeps its place in line, so chatty assets
+    cannot starve quiet ones.
+    """
+
+    def __init__(
+        self,
+        min_interval_s: float = 1.0,
+        max_eps: float = 0.0,
+        burst: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_interval_s = min_interval_s
+        self.max_eps = max_eps
+        self.burst = float(burst if burst is not None else max(1, int(max_eps)))
+        self.stats = ConflationStats()
+        self._clock = clock
+        self._pending: Dict[str, Any] = {}
+        self._ready: Deque[str] = deque()
+        self._waiting: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._last_release: Dict[str, float] = {}
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def offer(self, uid: str, item: Any) -> bool:
+        """Buffer ``item`` for ``uid``; returns True if it replaced a pending item."""
+        with self._cond:
+            self.stats.offered += 1
+            if uid in self._pending:
+                self._pending[uid] = item
+                self.stats.conflated += 1
+                return True
+            self._pending[uid] = item
+            self.stats.pending = len(self._pending)
+            eligible_at = self._last_release.get(uid, float("-inf")) + self.min_interval_s
+            if eligible_at <= self._clock():
+                self._ready.append(uid)
+            else:
+                self._seq += 1
+                heapq.heappush(self._waiting, (eligible_at, self._seq, uid))
+            self._cond.notify()
+            return False
+
+    def poll(self) -> List[Any]:
+        with self._cond:
+            return self._poll_locked()
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds until ``poll`` could release something, or None if idle."""
+        with self._cond:
+            return self._next_delay_locked()
+
+    def start(self, release: Callable[[Any], None], name: str = "conflator") -> None:
+        self._thread = threading.Thread(target=self._run, args=(release,), name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, release: Callable[[Any], None]) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                items = self._poll_locked()
+                if not items:
+                    self._cond.wait(self._next_delay_locked())
+                    continue
+            for item in items:
+                try:
+                    release(item)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logging.error("Failed to release conflated item: %s", exc)
+
+    def _poll_locked(self) -> List[Any]:
+        now = self._clock()
+        while self._waiting and self._waiting[0][0] <= now:
+            _, _, uid = heapq.heappop(self._waiting)
+            self._ready.append(uid)
+        if self.max_eps > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.max_eps)
+            self._refilled_at = now
+
+        released: List[Any] = []
+        while self._ready and (self.max_eps <= 0 or self._tokens >= 1.0):
+            uid = self._ready.popleft()
+            released.append(self._pending.pop(uid))
+            self._last_release[uid] = now
+            if self.max_eps > 0:
+                self._tokens -= 1.0
+        if released:
+            self.stats.released += len(released)
+            self.stats.pending = len(self._pending)
+            self._prune(now)
+        return released
+
+    def _next_delay_locked(self) -> Optional[float]:
+        if self._ready:
+            if self.max_eps <= 0 or self._tokens >= 1.0:
+                return 0.0
+            return (1.0 - self._tokens) / self.max_eps
+        if self._waiting:
+            return max(0.0, self._waiting[0][0] - self._clock())
+        return None
+
+    def _prune(self, now: float) -> None:
+        if len(self._last_release) <= 2 * len(self._pending) + 1024:
+            return
+        horizon = now - self.min_interval_s
+        self._last_release = {
+            uid: released_at
+            for uid, released_at in self._last_release.items()
+            if released_at > horizon or uid in self._pending
+        }
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+import re
 import xml.etree.ElementTree as ET
 
-from farmstack.time_utils import add_seconds
+from farmstack.envelope import Envelope, Loc, as_envelope
+from farmstack.time_utils import add_seconds, format_ts
+
+EnvelopeLike = Union[Envelope, Dict[str, Any]]
 
 
 def _coalesce(*values: Optional[str]) -> Optional[str]:
@@ -17,95 +23,253 @@ def _format_float(value: float, precision: int) -> str:
     return f"{value:.{precision}f}"
 
 
-def _resolve_loc(envelope: Dict[str, Any], meta: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    if envelope.get("loc"):
-        return envelope.get("loc")
-    if meta and meta.get("loc"):
-        return meta.get("loc")
-    if meta and isinstance(meta.get("data"), dict) and meta["data"].get("loc"):
-        return meta["data"].get("loc")
+def _resolve_loc(envelope: Envelope, meta: Optional[Envelope]) -> Optional[Loc]:
+    if envelope.loc is not None:
+        return envelope.loc
+    if meta is not None and meta.loc is not None:
+        return meta.loc
+    if meta is not None and isinstance(meta.data, dict) and meta.data.get("loc"):
+        return Loc.from_dict(meta.data["loc"])
     return None
 
 
-def _resolve_meta_tak(meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    if not meta:
+def _resolve_meta_tak(meta: Optional[Envelope]) -> Dict[str, Any]:
+    if meta is None:
         return {}
-    data = meta.get("data")
-    if isinstance(data, dict):
-        tak = data.get("tak")
+    if isinstance(meta.data, dict):
+        tak = meta.data.get("tak")
         if isinstance(tak, dict):
             return tak
     return {}
 
 
-def build_cot_xml(
-    envelope: Dict[str, Any],
-    meta: Optional[Dict[str, Any]],
+@dataclass
+class CotEvent:
+    uid: str
+    type: str
+    time: str
+    start: str
+    stale: str
+    how: str
+    lat: float
+    lon: float
+    hae: float = 0.0
+    ce: float = 9999999.0
+    le: float = 9999999.0
+    callsign: Optional[str] = None
+    remarks: Optional[str] = None
+
+
+class CotProfile:
+    """CoT mapping rules compiled once from the bridge config.
+
+    Defaults, the asset-kind and event-type tables and the geofence
+    classification are resolved up front; the (cot type, how, default stale)
+    triple for each (class, asset kind, event type, source system)
+    combination is memoized.
+    """
+
+    __slots__ = (
+        "contact_cot_type",
+        "alert_cot_type",
+        "geofence_cot_type",
+        "stale_s_default",
+        "how_machine",
+        "how_manual",
+        "kind_cot_types",
+        "event_cot_types",
+        "max_memo",
+        "_memo",
+    )
+
+    def __init__(self, config: Dict[str, Any], max_memo: int = 4096) -> None:
+        defaults = config.get("cot_defaults") or {}
+        self.contact_cot_type = defaults.get("contact_cot_type", "a-f-G-U-C")
+        self.alert_cot_type = defaults.get("alert_cot_type", "b-a")
+        self.geofence_cot_type = defaults.get("geofence_cot_type", "b-a-g")
+        self.stale_s_default = defaults.get("stale_s_default", 300)
+        self.how_machine = defaults.get("how_machine", "m-g")
+        self.how_manual = defaults.get("how_manual", "h-e")
+        self.kind_cot_types: Dict[str, str] = {
+            kind: cfg["cot_type"]
+            for kind, cfg in (config.get("asset_kind_map") or {}).items()
+            if isinstance(cfg, dict) and cfg.get("cot_type")
+        }
+        self.event_cot_types: Dict[str, str] = {
+            event_type: cfg["cot_type"]
+            for event_type, cfg in (config.get("event_type_map") or {}).items()
+            if isinstance(cfg, dict) and cfg.get("cot_type")
+        }
+        self.max_memo = max_memo
+        self._memo: Dict[Tuple[bool, Any, Any, Any], Tuple[str, str, Any]] = {}
+
+    def event_cot_type(self, event_type: Optional[str]) -> str:
+        cot_type = self.event_cot_types.get(event_type) if event_type else None
+        if cot_type:
+            return cot_type
+        if event_type and ("geofence" in event_type or "breach" in event_type):
+            return self.geofence_cot_type
+        return self.alert_cot_type
+
+    def resolve(
+        self,
+        is_event: bool,
+        asset_kind: Optional[str],
+        event_type: Optional[str],
+        system: Optional[str],
+    ) -> Tuple[str, str, Any]:
+        key = (is_event, asset_kind, event_type, system)
+        resolved = self._memo.get(key)
+        if resolved is None:
+            if is_event:
+                cot_type = self.event_cot_type(event_type)
+            else:
+                cot_type = self.kind_cot_types.get(asset_kind) or self.contact_cot_type
+            how = self.how_manual if system == "manual" else self.how_machine
+            resolved = (cot_type, how, self.stale_s_default)
+            # Event types come from topics, so keep the memo bounded.
+            if len(self._memo) >= self.max_memo:
+                self._memo.clear()
+            self._memo[key] = resolved
+        return resolved
+
+
+def resolve_cot_event(
+    envelope: EnvelopeLike,
+    meta: Optional[EnvelopeLike],
     event_type: Optional[str],
-    config: Dict[str, Any],
-) -> Optional[str]:
-    site = envelope.get("site")
-    asset = envelope.get("asset", {})
-    asset_id = asset.get("id")
-    asset_kind = asset.get("kind")
-    message_class = envelope.get("class")
-    ts = envelope.get("ts")
-    src = envelope.get("src", {})
+    config: Union[CotProfile, Dict[str, Any]],
+) -> Optional[CotEvent]:
+    envelope = as_envelope(envelope)
+    meta = as_envelope(meta) if meta else None
+    site = envelope.site
+    asset = envelope.asset
+    asset_id = asset.id if asset is not None else None
+    message_class = envelope.msg_class
+    ts = envelope.ts
 
     loc = _resolve_loc(envelope, meta)
     if not loc:
         return None
 
+    profile = config if isinstance(config, CotProfile) else CotProfile(config)
     tak_meta = _resolve_meta_tak(meta)
-    defaults = config.get("cot_defaults", {})
-    asset_kind_map = config.get("asset_kind_map", {})
-    event_type_map = config.get("event_type_map", {})
-
     is_event = message_class == "evt"
+    cot_type, how, stale_s_default = profile.resolve(
+        is_event,
+        asset.kind if asset is not None else None,
+        event_type if is_event else None,
+        envelope.src.system if envelope.src is not None else None,
+    )
+
     if is_event:
         uid = f"farm.{site}.alert.{asset_id}.{event_type}"
-        event_cfg = event_type_map.get(event_type, {})
-        cot_type = event_cfg.get("cot_type")
-        if not cot_type:
-            if event_type and ("geofence" in event_type or "breach" in event_type):
-                cot_type = defaults.get("geofence_cot_type", "b-a-g")
-            else:
-                cot_type = defaults.get("alert_cot_type", "b-a")
     else:
         uid = _coalesce(tak_meta.get("uid"), f"farm.{site}.{asset_id}")
-        kind_cfg = asset_kind_map.get(asset_kind, {})
-        cot_type = _coalesce(
-            tak_meta.get("cot_type"),
-            kind_cfg.get("cot_type"),
-            defaults.get("contact_cot_type", "a-f-G-U-C"),
-        )
-
-    how = defaults.get("how_machine", "m-g")
-    if src.get("system") == "manual":
-        how = defaults.get("how_manual", "h-e")
-
-    ttl_s = envelope.get("ttl_s")
+        cot_type = tak_meta.get("cot_type") or cot_type
+
+    ttl_s = envelope.ttl_s
     if ttl_s is None:
-        ttl_s = tak_meta.get("stale_s_default", defaults.get("stale_s_default", 300))
+        ttl_s = tak_meta.get("stale_s_default", stale_s_default)
 
     stale = add_seconds(ts, int(ttl_s))
 
     callsign = _coalesce(
         tak_meta.get("callsign"),
-        asset.get("name"),
+        asset.name if asset is not None else None,
         asset_id,
     )
 
+    remarks = None
+    if is_event and event_type:
+        remarks = f"event_type={event_type} id={envelope.id}"
+
+    return CotEvent(
+        uid=uid,
+        type=cot_type,
+        time=ts,
+        start=ts,
+        stale=stale,
+        how=how,
+        lat=float(loc.lat),
+        lon=float(loc.lon),
+        hae=float(loc.hae_m if loc.hae_m is not None else 0.0),
+        ce=float(loc.ce_m if loc.ce_m is not None else 9999999.0),
+        le=float(loc.le_m if loc.le_m is not None else 9999999.0),
+        callsign=callsign,
+        remarks=remarks,
+    )
+
+
+_ATTRIB_ESCAPES = str.maketrans(
+    {
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        '"': "&quot;",
+        "\r": "&#13;",
+        "\n": "&#10;",
+        "\t": "&#09;",
+    }
+)
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_NEEDS_ESCAPE = re.compile(r'[&<>"\r\n\t]')
+
+_EVENT_TEMPLATE = (
+    '<event version="2.0" uid="%s" type="%s" time="%s" start="%s" stale="%s" how="%s">'
+    '<point lat="%.6f" lon="%.6f" hae="%.1f" ce="%.1f" le="%.1f" />'
+    "%s</event>"
+)
+_CONTACT_TEMPLATE = '<contact callsign="%s" />'
+_REMARKS_TEMPLATE = "<remarks>%s</remarks>"
+
+
+def _attr(value: str) -> str:
+    if _NEEDS_ESCAPE.search(value) is None:
+        return value
+    return value.translate(_ATTRIB_ESCAPES)
+
+
+def render_cot_xml(cot: CotEvent) -> str:
+    if cot.callsign is None and cot.remarks is None:
+        detail = "<detail />"
+    else:
+        detail = "<detail>"
+        if cot.callsign is not None:
+            detail += _CONTACT_TEMPLATE % _attr(cot.callsign)
+        if cot.remarks:
+            detail += _REMARKS_TEMPLATE % cot.remarks.translate(_TEXT_ESCAPES)
+        elif cot.remarks is not None:
+            detail += "<remarks />"
+        detail += "</detail>"
+    return _EVENT_TEMPLATE % (
+        _attr(cot.uid),
+        _attr(cot.type),
+        _attr(cot.time),
+        _attr(cot.start),
+        _attr(cot.stale),
+        _attr(cot.how),
+        cot.lat,
+        cot.lon,
+        cot.hae,
+        cot.ce,
+        cot.le,
+        detail,
+    )
+
+
+def render_cot_xml_etree(cot: CotEvent) -> str:
+    """Reference serializer; render_cot_xml must stay byte-identical to it."""
     event = ET.Element(
         "event",
         {
             "version": "2.0",
-            "uid": uid,
-            "type": cot_type,
-            "time": ts,
-            "start": ts,
-            "stale": stale,
-            "how": how,
+            "uid": cot.uid,
+            "type": cot.type,
+            "time": cot.time,
+            "start": cot.start,
+            "stale": cot.stale,
+            "how": cot.how,
         },
     )
 
@@ -113,21 +277,51 @@ def build_cot_xml(
         event,
         "point",
         {
-            "lat": _format_float(float(loc.get("lat")), 6),
-            "lon": _format_float(float(loc.get("lon")), 6),
-            "hae": _format_float(float(loc.get("hae_m", 0.0)), 1),
-            "ce": _format_float(float(loc.get("ce_m", 9999999.0)), 1),
-            "le": _format_float(float(loc.get("le_m", 9999999.0)), 1),
+            "lat": _format_float(cot.lat, 6),
+            "lon": _format_float(cot.lon, 6),
+            "hae": _format_float(cot.hae, 1),
+            "ce": _format_float(cot.ce, 1),
+            "le": _format_float(cot.le, 1),
         },
     )
     _ = point
 
     detail = ET.SubElement(event, "detail")
-    ET.SubElement(detail, "contact", {"callsign": callsign})
+    if cot.callsign is not None:
+        ET.SubElement(detail, "contact", {"callsign": cot.callsign})
 
-    if is_event and event_type:
-        remarks_text = f"event_type={event_type} id={envelope.get('id')}"
+    if cot.remarks is not None:
         remarks = ET.SubElement(detail, "remarks")
-        remarks.text = remarks_text
+        remarks.text = cot.remarks
+
+    return ET.tostring(event, encoding="utf-8", xml_declaration=False).decode("utf-8")
+
+
+def build_cot_xml(
+    envelope: EnvelopeLike,
+    meta: Optional[EnvelopeLike],
+    event_type: Optional[str],
+    config: Union[CotProfile, Dict[str, Any]],
+) -> Optional[str]:
+    cot = resolve_cot_event(envelope, meta, event_type, config)
+    if cot is None:
+        return None
+    return render_cot_xml(cot)
+
+
+def ping_event(uid: str, now: Optional[datetime] = None, stale_s: int = 60) -> CotEvent:
+    ts = format_ts((now or datetime.now(tz=timezone.utc)).replace(microsecond=0))
+    return CotEvent(
+        uid=f"{uid}-ping",
+        type="t-x-c-t",
+        time=ts,
+        start=ts,
+        stale=add_seconds(ts, stale_s),
+        how="h-g-i-g-o",
+        lat=0.0,
+        lon=0.0,
+    )
+
 
-    return ET.tostring(event, encoding="utf-8", xml_declaration=False).decode("utf-8")
\ No newline at end of file
+def build_ping_xml(uid: str, now: Optional[datetime] = None, stale_s: int = 60) -> str:
+    return render_cot_xml(ping_event(uid, now, stale_s))
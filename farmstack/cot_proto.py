@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Union
+
+from farmstack.cot import (
+    _REMARKS_TEMPLATE,
+    _TEXT_ESCAPES,
+    CotEvent,
+    CotProfile,
+    EnvelopeLike,
+    render_cot_xml,
+    resolve_cot_event,
+)
+from farmstack.time_utils import parse_ts
+
+COT_FORMATS = ("xml", "stream", "mesh")
+
+# TAK Protocol v1 headers: mesh is 0xbf 0x01 0xbf, stream is 0xbf + varint length.
+_MESH_HEADER = b"\xbf\x01\xbf"
+_STREAM_MAGIC = b"\xbf"
+
+
+def _epoch_ms(ts: str) -> int:
+    return int(parse_ts(ts).timestamp() * 1000)
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _render_remarks_xml(remarks: str) -> str:
+    # Same escaping as the XML renderer, so both formats carry identical remarks.
+    return _REMARKS_TEMPLATE % remarks.translate(_TEXT_ESCAPES)
+
+
+def cot_event_to_message(cot: CotEvent) -> Any:
+    # takproto pulls in protobuf; only deployments that emit protobuf need it.
+    from takproto.proto import TakMessage
+
+    message = TakMessage()
+    event = message.cotEvent
+    event.type = cot.type
+    event.uid = cot.uid
+    event.how = cot.how
+    event.sendTime = _epoch_ms(cot.time)
+    event.startTime = _epoch_ms(cot.start)
+    event.staleTime = _epoch_ms(cot.stale)
+    # Round like the XML path so both encodings carry identical coordinates.
+    event.lat = round(cot.lat, 6)
+    event.lon = round(cot.lon, 6)
+    event.hae = round(cot.hae, 1)
+    event.ce = round(cot.ce, 1)
+    event.le = round(cot.le, 1)
+    if cot.callsign is not None:
+        event.detail.contact.callsign = cot.callsign
+    if cot.remarks is not None:
+        event.detail.xmlDetail = _render_remarks_xml(cot.remarks)
+    return message
+
+
+def encode_cot(cot: CotEvent, fmt: str = "xml", delimiter: bytes = b"\n") -> bytes:
+    """Encode a resolved CoT event as wire bytes.
+
+    ``xml`` yields UTF-8 CoT XML followed by ``delimiter``; ``stream`` and
+    ``mesh`` yield TAK Protocol v1 frames, which carry their own framing.
+    """
+    if fmt == "xml":
+        return render_cot_xml(cot).encode("utf-8") + delimiter
+    body = cot_event_to_message(cot).SerializeToString()
+    if fmt == "stream":
+        return _STREAM_MAGIC + _encode_varint(len(body)) + body
+    if fmt == "mesh":
+        return _MESH_HEADER + body
+    raise ValueError(f"unknown CoT format: {fmt}")
+
+
+def build_cot_proto(
+    envelope: EnvelopeLike,
+    meta: Optional[EnvelopeLike],
+    event_type: Optional[str],
+    config: Union[CotProfile, Dict[str, Any]],
+    fmt: str = "stream",
+) -> Optional[bytes]:
+    cot = resolve_cot_event(envelope, meta, event_type, config)
+    if cot is None:
+        return None
+    return encode_cot(cot, fmt)
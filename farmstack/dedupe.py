@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+
+class DedupeCache:
+    """Sliding-window duplicate detector with O(1) amortized cost per id.
+
+    Entries are kept in last-seen order, so expiry only ever pops from the
+    oldest end and a re-seen id moves to the tail with a fresh timestamp.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        window_s: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.window_s = window_s
+        self._clock = clock
+        self._cache: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def seen(self, message_id: str) -> bool:
+        now = self._clock()
+        self._evict(now)
+        duplicate = message_id in self._cache
+        self._cache[message_id] = now
+        if duplicate:
+            self._cache.move_to_end(message_id)
+        elif len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return duplicate
+
+    def _evict(self, now: float) -> None:
+        cache = self._cache
+        horizon = now - self.window_s
+        while cache:
+            oldest = next(iter(cache))
+            if cache[oldest] >= horizon:
+                return
+            cache.popitem(last=False)
+
+
+class _BloomFilter:
+    def __init__(self, num_bits: int, num_hashes: int) -> None:
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray((num_bits + 7) // 8)
+
+    def contains(self, indexes: List[int]) -> bool:
+        bits = self.bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in indexes)
+
+    def add(self, indexes: List[int]) -> None:
+        bits = self.bits
+        for index in indexes:
+            bits[index >> 3] |= 1 << (index & 7)
+
+
+class BloomDedupeCache:
+    """Probabilistic duplicate detector for windows with millions of ids.
+
+    Two Bloom filter generations rotate every ``window_s``, or sooner once
+    the current one holds ``max_entries`` ids, so memory stays fixed and a
+    fresh id is reported as a duplicate with probability of roughly
+    ``false_positive_rate``. An id is remembered for one to two generations:
+    one to two windows while fewer than ``max_entries`` ids arrive per
+    window. Above that rate a generation lasts less than ``window_s``, and a
+    duplicate arriving more than ``max_entries`` to ``2 * max_entries`` ids
+    later can be missed, so size ``max_entries`` for the peak rate.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        window_s: int,
+        false_positive_rate: float = 0.001,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.window_s = window_s
+        self._clock = clock
+        # Each id is checked against both generations, so split the error budget.
+        per_filter_rate = false_positive_rate / 2
+        self._num_bits = max(
+            64, int(math.ceil(-max_entries * math.log(per_filter_rate) / (math.log(2) ** 2)))
+        )
+        self._num_hashes = max(1, int(round(self._num_bits / max_entries * math.log(2))))
+        self._current = _BloomFilter(self._num_bits, self._num_hashes)
+        self._previous = _BloomFilter(self._num_bits, self._num_hashes)
+        self._count = 0
+        self._rotated_at = clock()
+
+    def seen(self, message_id: str) -> bool:
+        now = self._clock()
+        if now - self._rotated_at >= self.window_s or self._count >= self.max_entries:
+            self._rotate(now)
+        indexes = self._indexes(message_id)
+        if self._current.contains(indexes):
+            return True
+        self._current.add(indexes)
+        self._count += 1
+        return self._previous.contains(indexes)
+
+    def _rotate(self, now: float) -> None:
+        if now - self._rotated_at >= 2 * self.window_s:
+            self._previous = _BloomFilter(self._num_bits, self._num_hashes)
+        else:
+            self._previous = self._current
+        self._current = _BloomFilter(self._num_bits, self._num_hashes)
+        self._count = 0
+        self._rotated_at = now
+
+    def _indexes(self, message_id: str) -> List[int]:
+        digest = hashlib.blake2b(message_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._num_bits for i in range(self._num_hashes)]
+
+
+class SqliteDedupeStore:
+    """Duplicate detector shared by several processes through one SQLite file.
+
+    Replicas that split a shared MQTT subscription point this at the same
+    database (e.g. on a shared volume) so redeliveries landing on different
+    replicas are still dropped. Semantics match ``DedupeCache``: an id seen
+    within ``window_s`` of its last sighting is a duplicate.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        window_s: int,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.window_s = window_s
+        self.purge_every = purge_every
+        self._clock = clock
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS dedupe (id TEXT PRIMARY KEY, ts REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS dedupe_ts ON dedupe (ts)")
+
+    def seen(self, message_id: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT ts FROM dedupe WHERE id = ?", (message_id,)).fetchone()
+                self._conn.execute("INSERT OR REPLACE INTO dedupe (id, ts) VALUES (?, ?)", (message_id, now))
+                self._calls += 1
+                if self._calls % self.purge_every == 0:
+                    self._conn.execute("DELETE FROM dedupe WHERE ts < ?", (now - self.window_s,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row is not None and now - row[0] <= self.window_s
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+# Field names and order follow contracts/schemas/envelope.v1.schema.json;
+# tests/test_envelope.py fails if the two drift apart. "class" is a keyword,
+# so the attribute is ``msg_class``.
+
+
+@dataclass(slots=True)
+class Asset:
+    id: Optional[str] = None
+    kind: Optional[str] = None
+    name: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Asset:
+        return cls(raw.get("id"), raw.get("kind"), raw.get("name"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "kind": self.kind}
+        if self.name is not None:
+            out["name"] = self.name
+        return out
+
+
+@dataclass(slots=True)
+class Src:
+    system: Optional[str] = None
+    gw: Optional[str] = None
+    id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Src:
+        return cls(raw.get("system"), raw.get("gw"), raw.get("id"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"system": self.system}
+        if self.gw is not None:
+            out["gw"] = self.gw
+        if self.id is not None:
+            out["id"] = self.id
+        return out
+
+
+@dataclass(slots=True)
+class Loc:
+    lat: float
+    lon: float
+    hae_m: Optional[float] = None
+    ce_m: Optional[float] = None
+    le_m: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Loc:
+        return cls(raw.get("lat"), raw.get("lon"), raw.get("hae_m"), raw.get("ce_m"), raw.get("le_m"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"lat": self.lat, "lon": self.lon}
+        for key in ("hae_m", "ce_m", "le_m"):
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value
+        return out
+
+
+@dataclass(slots=True)
+class Envelope:
+    """A decoded farm envelope.
+
+    Decode payloads that already passed schema validation: unknown keys are
+    dropped and missing optional fields read as ``None``. ``data`` stays a
+    dict because its shape depends on the class.
+    """
+
+    v: Optional[int] = None
+    id: Optional[str] = None
+    ts: Optional[str] = None
+    site: Optional[str] = None
+    msg_class: Optional[str] = None
+    asset: Optional[Asset] = None
+    src: Optional[Src] = None
+    loc: Optional[Loc] = None
+    ttl_s: Optional[int] = None
+    tags: Optional[Dict[str, str]] = None
+    data: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Envelope:
+        asset = raw.get("asset")
+        src = raw.get("src")
+        loc = raw.get("loc")
+        return cls(
+            raw.get("v"),
+            raw.get("id"),
+            raw.get("ts"),
+            raw.get("site"),
+            raw.get("class"),
+            Asset.from_dict(asset) if isinstance(asset, dict) else None,
+            Src.from_dict(src) if isinstance(src, dict) else None,
+            Loc.from_dict(loc) if isinstance(loc, dict) and loc else None,
+            raw.get("ttl_s"),
+            raw.get("tags"),
+            raw.get("data"),
+        )
+
+    @classmethod
+    def decode(cls, raw: Union[str, bytes]) -> Envelope:
+        return cls.from_dict(json.loads(raw))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "v": self.v,
+            "id": self.id,
+            "ts": self.ts,
+            "site": self.site,
+            "class": self.msg_class,
+            "asset": self.asset.to_dict() if self.asset is not None else None,
+            "src": self.src.to_dict() if self.src is not None else None,
+        }
+        if self.loc is not None:
+            out["loc"] = self.loc.to_dict()
+        if self.ttl_s is not None:
+            out["ttl_s"] = self.ttl_s
+        if self.tags is not None:
+            out["tags"] = self.tags
+        out["data"] = self.data
+        return out
+
+    def encode(self) -> bytes:
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+
+    @property
+    def asset_id(self) -> Optional[str]:
+        return self.asset.id if self.asset is not None else None
+
+
+def as_envelope(value: Union[Envelope, Dict[str, Any]]) -> Envelope:
+    return value if isinstance(value, Envelope) else Envelope.from_dict(value)
+
+
+def parse_asset_id(topic: Optional[str], envelope: Envelope) -> Optional[str]:
+    """Asset id from ``farm/<site>/<class>/<asset_id>/...``, else from the envelope."""
+    parts = topic.split("/") if topic else []
+    if len(parts) >= 4:
+        return parts[3]
+    return envelope.asset_id
+
+
+def parse_event_type(topic: Optional[str], envelope: Envelope) -> Optional[str]:
+    """Dotted event type from the topic suffix, else from ``data.event_type``."""
+    parts = topic.split("/") if topic else []
+    event_type = "/".join(parts[4:]) or (envelope.data or {}).get("event_type")
+    return event_type.replace("/", ".") if event_type else None
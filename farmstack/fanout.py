@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from farmstack.cot import CotEvent
+from farmstack.cot_proto import encode_cot
+from farmstack.sendqueue import PrioritySendQueue, SendWorkers
+
+
+@dataclass
+class DestinationHealth:
+    name: str
+    up: bool = True
+    frames_sent: int = 0
+    send_failures: int = 0
+    consecutive_failures: int = 0
+    last_success: float = 0.0
+    last_error: str = ""
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Destination:
+    """One CoT endpoint with its own send queue, workers and retry policy.
+
+    A failed send is retried up to ``retries`` times with exponential
+    backoff starting at ``retry_backoff_s``; while a destination is stuck
+    only its own queue fills and applies its overflow policy, so a dead
+    endpoint never slows the others. Frames are only coalesced for senders
+    with ``coalesces`` set, which write a batch in one piece; any other
+    sender gets one frame per send, so a retry never repeats frames that
+    already went out.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sender: Any,
+        queue: PrioritySendQueue,
+        fmt: str = "xml",
+        delimiter: bytes = b"\n",
+        workers: int = 1,
+        flush_ms: float = 0.0,
+        flush_bytes: int = 0,
+        retries: int = 0,
+        retry_backoff_s: float = 0.5,
+        on_sent: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.name = name
+        self.sender = sender
+        self.queue = queue
+        self.encoding = (fmt, delimiter)
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        self.health = DestinationHealth(name)
+        self._on_sent = on_sent
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._workers = SendWorkers(
+            queue,
+            lambda frame: self._deliver(sender.send, frame, 1),
+            workers=workers,
+            name=f"cot-{name}",
+            send_batch=(
+                (lambda frames: self._deliver(sender.send_batch, frames, len(frames)))
+                if getattr(sender, "coalesces", False)
+                else None
+            ),
+            flush_ms=flush_ms,
+            flush_bytes=flush_bytes,
+        )
+
+    def start(self) -> None:
+        self._workers.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._workers.stop(timeout)
+        self.sender.close()
+
+    def _deliver(self, send: Callable[[Any], None], payload: Any, frames: int) -> None:
+        delay = self.retry_backoff_s
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                send(payload)
+            except Exception as exc:  # pylint: disable=broad-except
+                with self._lock:
+                    self.health.send_failures += 1
+                    self.health.consecutive_failures += 1
+                    self.health.last_error = str(exc)
+                    self.health.up = False
+                if attempt == self.retries or self._stopping.wait(delay):
+                    raise
+                delay *= 2
+                continue
+            if self._on_sent is not None:
+                self._on_sent(time.perf_counter() - started)
+            with self._lock:
+                self.health.frames_sent += frames
+                self.health.consecutive_failures = 0
+                self.health.last_success = time.time()
+                self.health.up = True
+            return
+
+
+class FanOut:
+    """Encode each CoT event once per wire format and queue it everywhere.
+
+    Destinations sharing a format and delimiter receive the same ``bytes``
+    object, so adding a destination costs a queue slot, not an encode.
+    """
+
+    def __init__(self, destinations: List[Destination]) -> None:
+        self.destinations = destinations
+
+    def publish(self, cot: CotEvent, priority: int = 0, expires_at: Optional[float] = None) -> int:
+        """Queue ``cot`` for every destination; returns how many accepted it.
+
+        With ``expires_at`` set, destinations shed the frame instead of
+        sending it if it is still queued at that (epoch) time.
+        """
+        frames: Dict[Tuple[str, bytes], bytes] = {}
+        accepted = 0
+        for destination in self.destinations:
+            frame = frames.get(destination.encoding)
+            if frame is None:
+                fmt, delimiter = destination.encoding
+                frame = frames[destination.encoding] = encode_cot(cot, fmt, delimiter)
+            if destination.queue.put(frame, priority, expires_at):
+                accepted += 1
+        return accepted
+
+    def start(self) -> None:
+        for destination in self.destinations:
+            destination.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for destination in self.destinations:
+            destination.stop(timeout)
+
+    def health(self) -> List[Dict[str, Any]]:
+        return [destination.health.as_dict() for destination in self.destinations]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
+
+from farmstack.envelope import Envelope, as_envelope
 
 
 def resolve_log_type(event_type: str, config: Dict[str, Any]) -> str:
@@ -14,10 +16,10 @@ def resolve_log_type(event_type: str, config: Dict[str, Any]) -> str:
     return config.get("log_type_default", "observation")
 
 
-def _resolve_farmos_asset_uuid(meta: Optional[Dict[str, Any]]) -> Optional[str]:
-    if not meta:
+def _resolve_farmos_asset_uuid(meta: Optional[Envelope]) -> Optional[str]:
+    if meta is None:
         return None
-    data = meta.get("data")
+    data = meta.data
     if not isinstance(data, dict):
         return None
     links = data.get("links")
@@ -27,23 +29,28 @@ def _resolve_farmos_asset_uuid(meta: Optional[Dict[str, Any]]) -> Optional[str]:
 
 
 def build_log_payload(
-    envelope: Dict[str, Any],
+    envelope: Union[Envelope, Dict[str, Any]],
     event_type: str,
     log_type: str,
-    meta: Optional[Dict[str, Any]],
+    meta: Optional[Union[Envelope, Dict[str, Any]]],
+    raw: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    message = envelope.get("data", {}).get("message", "")
-    asset_uuid = _resolve_farmos_asset_uuid(meta)
+    """Build the farmOS log; ``raw`` is the message as received, kept verbatim in the log data."""
+    if raw is None:
+        raw = envelope if isinstance(envelope, dict) else envelope.to_dict()
+    envelope = as_envelope(envelope)
+    message = (envelope.data or {}).get("message", "")
+    asset_uuid = _resolve_farmos_asset_uuid(as_envelope(meta) if meta else None)
 
     payload: Dict[str, Any] = {
         "data": {
             "type": f"log--{log_type}",
             "attributes": {
                 "name": event_type,
-                "timestamp": envelope.get("ts"),
+                "timestamp": envelope.ts,
                 "status": "done",
                 "notes": message,
-                "data": envelope,
+                "data": raw,
             },
         }
     }
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from uuid import NAMESPACE_URL, uuid5
+
+from farmstack.envelope import Envelope, as_envelope
+
+BBox = Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+Coords = Sequence[Tuple[float, float]]  # (lon, lat) pairs, as in KML/GeoJSON
+
+_KML_NS = "{http://www.opengis.net/kml/2.2}"
+
+DEFAULT_NAME_FIELDS = ("name", "NAME", "Name")
+
+
+def _bbox(points: Coords) -> BBox:
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+class _Ring:
+    """Closed ring with its edges bucketed into horizontal bands.
+
+    Ray casting only has to look at the edges in the band holding the query
+    latitude, which keeps point-in-polygon cheap for rings with thousands of
+    vertices.
+    """
+
+    __slots__ = ("bbox", "_y0", "_band_h", "_bands")
+
+    def __init__(self, points: Coords, edges_per_band: int = 8) -> None:
+        if points[0] != points[-1]:
+            points = list(points) + [points[0]]
+        self.bbox = _bbox(points)
+        min_y, max_y = self.bbox[1], self.bbox[3]
+        count = max(1, (len(points) - 1) // edges_per_band)
+        self._y0 = min_y
+        self._band_h = (max_y - min_y) / count or 1.0
+        self._bands: List[List[Tuple[float, float, float, float]]] = [[] for _ in range(count)]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            if y1 == y2:
+                continue  # horizontal edges never cross a horizontal ray
+            low = self._band(min(y1, y2))
+            high = self._band(max(y1, y2))
+            for index in range(low, high + 1):
+                self._bands[index].append((x1, y1, x2, y2))
+
+    def _band(self, y: float) -> int:
+        return min(len(self._bands) - 1, max(0, int((y - self._y0) / self._band_h)))
+
+    def contains(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bbox
+        if x < min_x or x > max_x or y < min_y or y > max_y:
+            return False
+        inside = False
+        for x1, y1, x2, y2 in self._bands[self._band(y)]:
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+
+class _Polygon:
+    __slots__ = ("zone", "outer", "holes", "bbox")
+
+    def __init__(self, zone: "Zone", outer: Coords, holes: Iterable[Coords] = ()) -> None:
+        self.zone = zone
+        self.outer = _Ring(outer)
+        self.holes = [_Ring(hole) for hole in holes if len(hole) >= 3]
+        self.bbox = self.outer.bbox
+
+    def contains(self, x: float, y: float) -> bool:
+        if not self.outer.contains(x, y):
+            return False
+        return not any(hole.contains(x, y) for hole in self.holes)
+
+
+@dataclass
+class Zone:
+    id: str
+    name: str
+    # Each polygon is an outer ring followed by any hole rings.
+    polygons: List[List[Coords]] = field(default_factory=list)
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+
+class STRTree:
+    """Static Sort-Tile-Recursive R-tree over bounding boxes."""
+
+    def __init__(self, items: Sequence[Tuple[BBox, Any]], node_capacity: int = 16) -> None:
+        self.node_capacity = node_capacity
+        self.size = len(items)
+        level: List[Tuple[BBox, Any, bool]] = [(bbox, item, True) for bbox, item in items]
+        while len(level) > node_capacity:
+            level = [self._parent(group) for group in self._tiles(level)]
+        self._root: Optional[Tuple[BBox, Any, bool]] = self._parent(level) if level else None
+
+    def _tiles(self, entries: List[Tuple[BBox, Any, bool]]) -> List[List[Tuple[BBox, Any, bool]]]:
+        capacity = self.node_capacity
+        leaves = -(-len(entries) // capacity)
+        slices = max(1, int(leaves ** 0.5 + 0.999999))
+        per_slice = slices * capacity
+        by_x = sorted(entries, key=lambda entry: entry[0][0] + entry[0][2])
+        groups = []
+        for start in range(0, len(by_x), per_slice):
+            by_y = sorted(by_x[start:start + per_slice], key=lambda entry: entry[0][1] + entry[0][3])
+            groups.extend(by_y[index:index + capacity] for index in range(0, len(by_y), capacity))
+        return groups
+
+    @staticmethod
+    def _parent(children: List[Tuple[BBox, Any, bool]]) -> Tuple[BBox, Any, bool]:
+        bbox = (
+            min(child[0][0] for child in children),
+            min(child[0][1] for child in children),
+            max(child[0][2] for child in children),
+            max(child[0][3] for child in children),
+        )
+        return (bbox, children, False)
+
+    def query_point(self, x: float, y: float) -> List[Any]:
+        found: List[Any] = []
+        if self._root is None:
+            return found
+        stack = [self._root]
+        while stack:
+            (min_x, min_y, max_x, max_y), payload, is_leaf = stack.pop()
+            if x < min_x or x > max_x or y < min_y or y > max_y:
+                continue
+            if is_leaf:
+                found.append(payload)
+            else:
+                stack.extend(payload)
+        return found
+
+
+class GeofenceIndex:
+    """Answers "which zones contain this point" for many zones at once.
+
+    Every polygon part of every zone goes into one STR-tree by bounding box;
+    a query walks the tree, then runs banded ray casting on the few parts
+    whose box holds the point.
+    """
+
+    def __init__(self, zones: Iterable[Zone]) -> None:
+        self.zones: Dict[str, Zone] = {}
+        parts: List[Tuple[BBox, _Polygon]] = []
+        for zone in zones:
+            self.zones[zone.id] = zone
+            for rings in zone.polygons:
+                if len(rings[0]) < 3:
+                    continue
+                polygon = _Polygon(zone, rings[0], rings[1:])
+                parts.append((polygon.bbox, polygon))
+        self._tree = STRTree(parts)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def zones_at(self, lat: float, lon: float) -> Set[str]:
+        return {
+            polygon.zone.id
+            for polygon in self._tree.query_point(lon, lat)
+            if polygon.contains(lon, lat)
+        }
+
+
+class GeofenceTracker:
+    """Turns positions into zone enter/exit transitions per asset."""
+
+    def __init__(self, index: GeofenceIndex) -> None:
+        self.index = index
+        self._inside: Dict[str, Set[str]] = {}
+
+    def update(self, asset_id: str, lat: float, lon: float) -> Tuple[List[str], List[str]]:
+        current = self.index.zones_at(lat, lon)
+        previous = self._inside.get(asset_id, set())
+        if current == previous:
+            return [], []
+        if current:
+            self._inside[asset_id] = current
+        else:
+            self._inside.pop(asset_id, None)
+        return sorted(current - previous), sorted(previous - current)
+
+
+def _parse_coordinates(text: Optional[str]) -> List[Tuple[float, float]]:
+    points = []
+    for token in (text or "").split():
+        parts = token.split(",")
+        if len(parts) >= 2:
+            points.append((float(parts[0]), float(parts[1])))
+    return points
+
+
+def _zone_name(properties: Dict[str, Any], name_fields: Sequence[str], default: str) -> str:
+    for name_field in name_fields:
+        value = properties.get(name_field)
+        if value not in (None, ""):
+            return str(value).strip()
+    return default
+
+
+def load_kml_zones(path: Path, name_fields: Sequence[str] = DEFAULT_NAME_FIELDS) -> List[Zone]:
+    zones = []
+    root = ET.parse(path).getroot()
+    for index, placemark in enumerate(root.iter(f"{_KML_NS}Placemark")):
+        properties = {
+            data.get("name"): data.text
+            for data in placemark.iter(f"{_KML_NS}SimpleData")
+        }
+        properties.update(
+            (data.get("name"), data.findtext(f"{_KML_NS}value"))
+            for data in placemark.iter(f"{_KML_NS}Data")
+        )
+        polygons = []
+        for polygon in placemark.iter(f"{_KML_NS}Polygon"):
+            outer = _parse_coordinates(
+                polygon.findtext(f"{_KML_NS}outerBoundaryIs/{_KML_NS}LinearRing/{_KML_NS}coordinates")
+            )
+            holes = [
+                _parse_coordinates(ring.text)
+                for ring in polygon.findall(
+                    f"{_KML_NS}innerBoundaryIs/{_KML_NS}LinearRing/{_KML_NS}coordinates"
+                )
+            ]
+            if outer:
+                polygons.append([outer] + holes)
+        if not polygons:
+            continue
+        zone_id = placemark.get("id") or f"{path.stem}.{index + 1}"
+        name = (placemark.findtext(f"{_KML_NS}name") or "").strip()
+        name = name or _zone_name(properties, name_fields, zone_id)
+        zones.append(Zone(id=zone_id, name=name, polygons=polygons, properties=properties))
+    return zones
+
+
+def load_geojson_zones(path: Path, name_fields: Sequence[str] = DEFAULT_NAME_FIELDS) -> List[Zone]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    features = data.get("features", [data] if data.get("type") == "Feature" else [])
+    zones = []
+    for index, feature in enumerate(features):
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        zone_id = str(feature.get("id") or properties.get("id") or f"{path.stem}.{index + 1}")
+        zones.append(
+            Zone(
+                id=zone_id,
+                name=_zone_name(properties, name_fields, zone_id),
+                polygons=[[[(float(x), float(y)) for x, y, *_ in ring] for ring in rings] for rings in polygons],
+                properties=properties,
+            )
+        )
+    return zones
+
+
+def load_zones(paths: Iterable[str], name_fields: Sequence[str] = DEFAULT_NAME_FIELDS) -> List[Zone]:
+    """Load zones from KML and GeoJSON files; directories are globbed."""
+    zones: List[Zone] = []
+    for raw in paths:
+        path = Path(raw)
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        for file in files:
+            suffix = file.suffix.lower()
+            if suffix == ".kml":
+                zones.extend(load_kml_zones(file, name_fields))
+            elif suffix in (".geojson", ".json"):
+                zones.extend(load_geojson_zones(file, name_fields))
+    return zones
+
+
+def build_geofence_event(
+    tele: Union[Envelope, Dict[str, Any]],
+    site: str,
+    transition: str,
+    zone: Zone,
+    ttl_s: int = 600,
+    severity: str = "warning",
+) -> Dict[str, Any]:
+    """Build the ``geofence.enter``/``geofence.exit`` evt envelope for a position.
+
+    The id is derived from the triggering position, so a redelivered
+    position yields the same event id and is deduplicated downstream.
+    """
+    tele = as_envelope(tele)
+    asset = tele.asset.to_dict() if tele.asset is not None else {}
+    event_type = f"geofence.{transition}"
+    verb = "entered" if transition == "enter" else "left"
+    envelope: Dict[str, Any] = {
+        "v": 1,
+        "id": str(uuid5(NAMESPACE_URL, f"{tele.id}/{event_type}/{zone.id}")),
+        "ts": tele.ts,
+        "site": site,
+        "class": "evt",
+        "asset": asset,
+        "src": {"system": "script", "id": "geofence-engine"},
+        "ttl_s": ttl_s,
+        "tags": {"zone": zone.name},
+        "data": {
+            "event_type": event_type,
+            "severity": severity,
+            "message": f"{asset.get('name') or asset.get('id')} {verb} {zone.name}",
+            "zone_id": zone.id,
+            "zone_name": zone.name,
+        },
+    }
+    if tele.loc is not None:
+        envelope["loc"] = tele.loc.to_dict()
+    return envelope
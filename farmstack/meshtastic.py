@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
 from farmstack.time_utils import format_ts
 
 
+def _metrics(battery_level: Any, rssi: Any) -> Dict[str, Any]:
+    # tele.v1 types both as numbers, so a packet without them must leave them out.
+    metrics: Dict[str, Any] = {}
+    if battery_level is not None:
+        metrics["battery_pct"] = battery_level
+    if rssi is not None:
+        metrics["rssi_dbm"] = rssi
+    return metrics
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value != value  # NaN is the numpy spelling of None
+
+
 def normalize_meshtastic(
     raw: Dict[str, Any],
     site: str,
@@ -15,7 +30,8 @@ def normalize_meshtastic(
     payload = raw.get("payload", {})
     lat = payload.get("latitude")
     lon = payload.get("longitude")
-    if lat is None or lon is None:
+    altitude = payload.get("altitude")
+    if _missing(lat) or _missing(lon):
         return None
 
     ts = raw.get("ts") or raw.get("timestamp")
@@ -50,18 +66,153 @@ def normalize_meshtastic(
         "loc": {
             "lat": float(lat),
             "lon": float(lon),
-            "hae_m": float(payload.get("altitude", 0.0)),
+            "hae_m": 0.0 if _missing(altitude) else float(altitude),
             "ce_m": float(loc_defaults.get("ce_m", 10.0)),
             "le_m": float(loc_defaults.get("le_m", 15.0)),
         },
         "ttl_s": int(config.get("ttl_s_default", 120)),
         "data": {
             "stream": "position",
-            "metrics": {
-                "battery_pct": payload.get("battery_level"),
-                "rssi_dbm": payload.get("rssi"),
-            },
+            "metrics": _metrics(payload.get("battery_level"), payload.get("rssi")),
         },
     }
 
     return envelope
+
+
+@dataclass
+class MeshtasticColumns:
+    """Raw Meshtastic position packets as parallel columns, one entry per packet.
+
+    Missing values are ``None``; the numeric columns may also be numpy arrays
+    with NaN for missing. ``ts`` already holds ``ts`` or ``timestamp``.
+    """
+
+    id: List[Optional[str]] = field(default_factory=list)
+    ts: List[Optional[str]] = field(default_factory=list)
+    node: List[Optional[str]] = field(default_factory=list)
+    from_: List[Optional[str]] = field(default_factory=list)
+    latitude: Any = field(default_factory=list)
+    longitude: Any = field(default_factory=list)
+    altitude: Any = field(default_factory=list)
+    battery_level: List[Any] = field(default_factory=list)
+    rssi: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def from_raw(cls, raws: Iterable[Dict[str, Any]]) -> MeshtasticColumns:
+        raws = list(raws)
+        payloads = [raw.get("payload", {}) for raw in raws]
+        return cls(
+            id=[raw.get("id") for raw in raws],
+            ts=[raw.get("ts") or raw.get("timestamp") for raw in raws],
+            node=[raw.get("node") for raw in raws],
+            from_=[raw.get("from") for raw in raws],
+            latitude=[payload.get("latitude") for payload in payloads],
+            longitude=[payload.get("longitude") for payload in payloads],
+            altitude=[payload.get("altitude") for payload in payloads],
+            battery_level=[payload.get("battery_level") for payload in payloads],
+            rssi=[payload.get("rssi") for payload in payloads],
+        )
+
+    def __len__(self) -> int:
+        return len(self.node)
+
+
+def _positions(
+    columns: MeshtasticColumns, asset_ids: List[Optional[str]]
+) -> Tuple[List[int], List[float], List[float], List[float]]:
+    """Rows to keep and their lat, lon and altitude as Python floats."""
+    try:
+        # numpy is optional: only backfills need it, and the loop below gives
+        # the same answer, just slower.
+        import numpy as np
+    except ImportError:
+        keep: List[int] = []
+        lats: List[float] = []
+        lons: List[float] = []
+        alts: List[float] = []
+        for row, asset_id in enumerate(asset_ids):
+            lat, lon = columns.latitude[row], columns.longitude[row]
+            if _missing(lat) or _missing(lon) or not asset_id:
+                continue
+            altitude = columns.altitude[row]
+            keep.append(row)
+            lats.append(float(lat))
+            lons.append(float(lon))
+            alts.append(0.0 if _missing(altitude) else float(altitude))
+        return keep, lats, lons, alts
+
+    # None becomes NaN in a float array, so missing coordinates fall out of
+    # the mask and a missing altitude takes the 0.0 default.
+    lat = np.asarray(columns.latitude, dtype=np.float64)
+    lon = np.asarray(columns.longitude, dtype=np.float64)
+    alt = np.asarray(columns.altitude, dtype=np.float64)
+    has_asset = np.fromiter(map(bool, asset_ids), dtype=bool, count=len(asset_ids))
+    rows = np.flatnonzero(has_asset & ~np.isnan(lat) & ~np.isnan(lon))
+    alt = np.where(np.isnan(alt), 0.0, alt)
+    return rows.tolist(), lat[rows].tolist(), lon[rows].tolist(), alt[rows].tolist()
+
+
+def normalize_meshtastic_batch(
+    columns: MeshtasticColumns,
+    site: str,
+    config: Dict[str, Any],
+) -> Iterator[Dict[str, Any]]:
+    """Normalize a batch of packets; the same envelopes as ``normalize_meshtastic``.
+
+    Filtering and coordinate conversion run over whole columns (with numpy
+    when it is installed). Envelopes are built as the iterator is consumed,
+    so a large backfill never holds more than one chunk of them.
+    """
+    asset_ids = [node or sender for node, sender in zip(columns.node, columns.from_)]
+    rows, lats, lons, alts = _positions(columns, asset_ids)
+
+    asset_kind = config.get("asset_kind_default", "meshtastic-node")
+    name_prefix = config.get("asset_name_prefix", "")
+    loc_defaults = config.get("loc_defaults", {})
+    ce_m = float(loc_defaults.get("ce_m", 10.0))
+    le_m = float(loc_defaults.get("le_m", 15.0))
+    ttl_s = int(config.get("ttl_s_default", 120))
+    now: Optional[str] = None
+
+    def kept(column: Any) -> List[Any]:
+        return [column[row] for row in rows]
+
+    assets = kept(asset_ids)
+    names = [f"{name_prefix}{asset_id}" for asset_id in assets] if name_prefix else assets
+    for message_id, ts, asset_id, name, sender, lat, lon, hae_m, battery, rssi in zip(
+        kept(columns.id), kept(columns.ts), assets, names, kept(columns.from_),
+        lats, lons, alts, kept(columns.battery_level), kept(columns.rssi),
+    ):
+        if not ts:
+            if now is None:
+                now = format_ts(datetime.now(tz=timezone.utc))
+            ts = now
+        yield {
+            "v": 1,
+            "id": message_id or str(uuid4()),
+            "ts": ts,
+            "site": site,
+            "class": "tele",
+            "asset": {
+                "id": asset_id,
+                "kind": asset_kind,
+                "name": name,
+            },
+            "src": {
+                "system": "meshtastic",
+                "id": sender,
+            },
+            "loc": {
+                "lat": lat,
+                "lon": lon,
+                "hae_m": hae_m,
+                "ce_m": ce_m,
+                "le_m": le_m,
+            },
+            "ttl_s": ttl_s,
+            "data": {
+                "stream": "position",
+                "metrics": _metrics(battery, rssi),
+            },
+        }
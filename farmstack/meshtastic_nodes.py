@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set
+
+_COLUMNS = ("node", "long_name", "short_name", "hw_model", "lat", "lon", "hae_m", "position_ts")
+
+
+@dataclass(slots=True)
+class NodeInfo:
+    node: str  # "!a1b2c3d4"
+    long_name: Optional[str] = None
+    short_name: Optional[str] = None
+    hw_model: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    hae_m: Optional[float] = None
+    position_ts: Optional[str] = None
+
+    def names(self) -> Dict[str, str]:
+        names = {"long_name": self.long_name, "short_name": self.short_name, "hw_model": self.hw_model}
+        return {key: value for key, value in names.items() if value}
+
+
+class NodeInfoCache:
+    """What the normalizer knows about each Meshtastic node, kept across restarts.
+
+    Names and hardware come from NODEINFO packets, the position from the
+    node's latest position. Lookups are served from memory. The SQLite file
+    at ``path`` is read once at start; NODEINFO changes are written at once,
+    positions every ``flush_every_s``. With ``path=None`` nothing persists.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        flush_every_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.flush_every_s = flush_every_s
+        self._clock = clock
+        self._nodes: Dict[str, NodeInfo] = {}
+        self._dirty: Set[str] = set()
+        self._last_flush = clock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS nodes (node TEXT PRIMARY KEY, long_name TEXT, short_name TEXT, "
+                "hw_model TEXT, lat REAL, lon REAL, hae_m REAL, position_ts TEXT)"
+            )
+            for row in self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM nodes"):
+                self._nodes[row[0]] = NodeInfo(*row)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def get(self, node: str) -> Optional[NodeInfo]:
+        return self._nodes.get(node)
+
+    def observe(self, envelope: Dict[str, Any]) -> None:
+        """Record the names or position carried by a normalized envelope."""
+        node_id = (envelope.get("src") or {}).get("id")
+        if not node_id:
+            return
+        data = envelope.get("data") or {}
+        loc = envelope.get("loc")
+        node = self._nodes.get(node_id)
+        if node is None:
+            node = self._nodes[node_id] = NodeInfo(node_id)
+        if data.get("stream") == "nodeinfo":
+            names = data.get("node") or {}
+            node.long_name = names.get("long_name") or node.long_name
+            node.short_name = names.get("short_name") or node.short_name
+            node.hw_model = names.get("hw_model") or node.hw_model
+            self._dirty.add(node_id)
+            self.flush()
+        elif loc and data.get("stream") == "position":
+            if node.position_ts and envelope.get("ts", "") < node.position_ts:
+                return  # a late duplicate from another gateway
+            node.lat, node.lon, node.hae_m = loc["lat"], loc["lon"], loc.get("hae_m")
+            node.position_ts = envelope.get("ts")
+            self._dirty.add(node_id)
+            if self._clock() - self._last_flush >= self.flush_every_s:
+                self.flush()
+
+    def enrich(self, envelope: Dict[str, Any], name_prefix: str = "") -> Dict[str, Any]:
+        """Name the asset after its node and fill in a missing ``loc``, in place.
+
+        Telemetry and NODEINFO packets carry no position, so they get the
+        node's last known one.
+        """
+        node = self._nodes.get((envelope.get("src") or {}).get("id"))
+        if node is None:
+            return envelope
+        names = node.names()
+        if names:
+            if node.long_name:
+                envelope["asset"]["name"] = f"{name_prefix}{node.long_name}"
+            envelope["data"].setdefault("node", names)
+        if "loc" not in envelope and node.lat is not None and node.lon is not None:
+            loc = {"lat": node.lat, "lon": node.lon}
+            if node.hae_m is not None:
+                loc["hae_m"] = node.hae_m
+            envelope["loc"] = loc
+        return envelope
+
+    def flush(self) -> None:
+        self._last_flush = self._clock()
+        if self._conn is None or not self._dirty:
+            self._dirty.clear()
+            return
+        rows = [tuple(getattr(self._nodes[node], column) for column in _COLUMNS) for node in self._dirty]
+        self._dirty.clear()
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO nodes ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
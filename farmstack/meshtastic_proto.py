@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import base64
+import os
+import sys
+import time
+import types
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from farmstack.meshtastic import normalize_meshtastic
+from farmstack.time_utils import format_ts
+
+# The *_pb2 modules vendored with the TAK Meshtastic gateway. Only these are
+# loaded, not the meshtastic client package around them.
+DEFAULT_PROTO_DIR = (
+    Path(__file__).resolve().parents[1] / "tak_meshtastic_gateway_venv" / "Lib" / "site-packages" / "meshtastic"
+)
+
+# Firmware default channel key ("AQ==" in the app). A one-byte PSK n selects
+# this key with its last byte bumped by n - 1.
+DEFAULT_KEY = bytes.fromhex("d4f1bb3a20290759f0bcffabcf4e6901")
+
+DROP_REASONS = ("invalid_protobuf", "unknown_channel", "decrypt", "unsupported_port", "no_location")
+
+_DEVICE_METRICS = {
+    "battery_level": "battery_pct",
+    "voltage": "voltage_v",
+    "channel_utilization": "channel_util_pct",
+    "air_util_tx": "air_util_tx_pct",
+    "uptime_seconds": "uptime_s",
+}
+_ENVIRONMENT_METRICS = {
+    "temperature": "temp_c",
+    "relative_humidity": "humidity_pct",
+    "barometric_pressure": "pressure_hpa",
+}
+
+_protobufs: Optional[types.SimpleNamespace] = None
+
+
+def load_protobufs(proto_dir: Optional[str] = None) -> types.SimpleNamespace:
+    """Import the Meshtastic protobuf modules once.
+
+    The generated modules import each other as ``meshtastic.<name>_pb2``, so
+    unless a real ``meshtastic`` package is already loaded, an empty package
+    pointing at ``MESHTASTIC_PROTO_DIR`` stands in for it.
+    """
+    global _protobufs  # pylint: disable=global-statement
+    if _protobufs is None:
+        if "meshtastic" not in sys.modules:
+            package = types.ModuleType("meshtastic")
+            package.__path__ = [str(proto_dir or os.getenv("MESHTASTIC_PROTO_DIR") or DEFAULT_PROTO_DIR)]
+            sys.modules["meshtastic"] = package
+        from google.protobuf.message import DecodeError
+        from meshtastic import mesh_pb2, mqtt_pb2, portnums_pb2, telemetry_pb2
+
+        # Enum attribute lookups are slow on protobuf's Python wrappers, so
+        # resolve the supported ports to plain ints once.
+        port_value = portnums_pb2.PortNum.Value
+        _protobufs = types.SimpleNamespace(
+            mesh=mesh_pb2,
+            mqtt=mqtt_pb2,
+            portnums=portnums_pb2,
+            telemetry=telemetry_pb2,
+            DecodeError=DecodeError,
+            ports={
+                port_value("POSITION_APP"): ("position", mesh_pb2.Position),
+                port_value("TELEMETRY_APP"): ("telemetry", telemetry_pb2.Telemetry),
+                port_value("NODEINFO_APP"): ("nodeinfo", mesh_pb2.User),
+            },
+        )
+    return _protobufs
+
+
+def channel_key(psk: str) -> Optional[bytes]:
+    """AES key for a base64 channel PSK as shown in the app; ``None`` means unencrypted."""
+    raw = base64.b64decode(psk)
+    if not raw or raw == b"\x00":
+        return None
+    if len(raw) == 1:
+        return DEFAULT_KEY[:-1] + bytes([(DEFAULT_KEY[-1] + raw[0] - 1) & 0xFF])
+    if len(raw) > 32:
+        raise ValueError(f"channel PSK is {len(raw)} bytes, expected at most 32")
+    return raw.ljust(16 if len(raw) <= 16 else 32, b"\x00")
+
+
+class ChannelCiphers:
+    """AES-CTR decryption for the configured channels.
+
+    Meshtastic's CTR nonce is the packet id (u64 LE) and sender node (u32 LE)
+    followed by a 32-bit block counter. Building the key stream from one
+    long-lived AES-ECB context per channel avoids setting up a cipher for
+    every packet.
+    """
+
+    def __init__(self, channels: Dict[str, str]) -> None:
+        self.keys = {name: channel_key(psk) for name, psk in channels.items()}
+        self._ecb: Dict[str, Any] = {}
+
+    def __contains__(self, channel: str) -> bool:
+        return channel in self.keys
+
+    def _encryptor(self, channel: str) -> Any:
+        ecb = self._ecb.get(channel)
+        if ecb is None:
+            # cryptography is only needed once an encrypted channel is configured.
+            from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+            ecb = self._ecb[channel] = Cipher(algorithms.AES(self.keys[channel]), modes.ECB()).encryptor()
+        return ecb
+
+    def decrypt(self, channel: str, packet_id: int, from_node: int, data: bytes) -> bytes:
+        """Decrypt (or, CTR being symmetric, encrypt) one packet payload."""
+        if self.keys[channel] is None:
+            return data
+        prefix = packet_id.to_bytes(8, "little") + from_node.to_bytes(4, "little")
+        blocks = b"".join(prefix + counter.to_bytes(4, "big") for counter in range((len(data) + 15) // 16))
+        keystream = self._encryptor(channel).update(blocks)
+        size = len(data)
+        return (int.from_bytes(data, "little") ^ int.from_bytes(keystream[:size], "little")).to_bytes(size, "little")
+
+
+@dataclass
+class DecodedPacket:
+    port: str  # position, telemetry or nodeinfo
+    node: str  # "!a1b2c3d4"
+    packet_id: int
+    rx_time: int
+    rx_rssi: int
+    rx_snr: float
+    channel: str
+    gateway: str
+    message: Any  # mesh_pb2.Position, telemetry_pb2.Telemetry or mesh_pb2.User
+
+
+@dataclass
+class MeshtasticProtoStats:
+    packets: int = 0
+    decoded: int = 0
+    invalid_protobuf: int = 0
+    unknown_channel: int = 0
+    decrypt: int = 0
+    unsupported_port: int = 0
+    no_location: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def decode_service_envelope(
+    raw: bytes, ciphers: ChannelCiphers
+) -> Tuple[Optional[DecodedPacket], Optional[str]]:
+    """Parse a ServiceEnvelope from ``msh/<region>/2/e/<channel>/<gateway>``.
+
+    Returns the decoded packet, or ``None`` and a drop reason.
+    """
+    pb = load_protobufs()
+    service = pb.mqtt.ServiceEnvelope()
+    try:
+        service.ParseFromString(raw)
+    except pb.DecodeError:
+        return None, "invalid_protobuf"
+    # The channel list is an allow-list for plaintext uplinks too.
+    if service.channel_id not in ciphers:
+        return None, "unknown_channel"
+    packet = service.packet
+    if packet.WhichOneof("payload_variant") == "encrypted":
+        data = pb.mesh.Data()
+        try:
+            data.ParseFromString(
+                ciphers.decrypt(service.channel_id, packet.id, getattr(packet, "from"), packet.encrypted)
+            )
+        except pb.DecodeError:
+            return None, "decrypt"
+        if not data.portnum:
+            return None, "decrypt"  # a wrong key tends to parse as an empty Data
+    else:
+        data = packet.decoded
+
+    port = pb.ports.get(data.portnum)
+    if port is None:
+        return None, "unsupported_port"
+    message = port[1]()
+    try:
+        message.ParseFromString(data.payload)
+    except pb.DecodeError:
+        return None, "invalid_protobuf"
+    return (
+        DecodedPacket(
+            port=port[0],
+            node=f"!{getattr(packet, 'from'):08x}",
+            packet_id=packet.id,
+            rx_time=packet.rx_time,
+            rx_rssi=packet.rx_rssi,
+            rx_snr=packet.rx_snr,
+            channel=service.channel_id,
+            gateway=service.gateway_id,
+            message=message,
+        ),
+        None,
+    )
+
+
+def encode_service_envelope(
+    port: str,
+    message: Any,
+    from_node: int,
+    packet_id: int,
+    channel: str,
+    gateway: str = "",
+    ciphers: Optional[ChannelCiphers] = None,
+    rx_time: int = 0,
+    rx_rssi: int = 0,
+) -> bytes:
+    """Wrap ``message`` the way firmware uplinks it; for tests and benchmarks."""
+    pb = load_protobufs()
+    ports = {"position": "POSITION_APP", "telemetry": "TELEMETRY_APP", "nodeinfo": "NODEINFO_APP"}
+    data = pb.mesh.Data(portnum=pb.portnums.PortNum.Value(ports[port]), payload=message.SerializeToString())
+    service = pb.mqtt.ServiceEnvelope(channel_id=channel, gateway_id=gateway)
+    packet = service.packet
+    setattr(packet, "from", from_node)
+    packet.id = packet_id
+    packet.rx_time = rx_time
+    packet.rx_rssi = rx_rssi
+    if ciphers is not None and ciphers.keys.get(channel) is not None:
+        packet.encrypted = ciphers.decrypt(channel, packet_id, from_node, data.SerializeToString())
+    else:
+        packet.decoded.CopyFrom(data)
+    return service.SerializeToString()
+
+
+def _message_id(packet: DecodedPacket) -> str:
+    return f"{packet.node[1:]}-{packet.packet_id:08x}"
+
+
+def _packet_ts(packet: DecodedPacket, sent: int = 0) -> Optional[str]:
+    """Sender time when the message carries one, else gateway receive time."""
+    epoch = sent or packet.rx_time
+    if not epoch:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+def _number(value: Any) -> Any:
+    # float32 fields decode as e.g. 4.099999904632568; keep the digits that were sent.
+    return round(value, 3) if isinstance(value, float) else value
+
+
+def _radio_metrics(packet: DecodedPacket) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {}
+    if packet.rx_rssi:
+        metrics["rssi_dbm"] = packet.rx_rssi
+    if packet.rx_snr:
+        metrics["snr_db"] = _number(packet.rx_snr)
+    return metrics
+
+
+def _tele_envelope(
+    packet: DecodedPacket, site: str, config: Dict[str, Any], ts: Optional[str], data: Dict[str, Any]
+) -> Dict[str, Any]:
+    name_prefix = config.get("asset_name_prefix", "")
+    return {
+        "v": 1,
+        "id": _message_id(packet),
+        "ts": ts or format_ts(datetime.now(tz=timezone.utc)),
+        "site": site,
+        "class": "tele",
+        "asset": {
+            "id": packet.node,
+            "kind": config.get("asset_kind_default", "meshtastic-node"),
+            "name": f"{name_prefix}{packet.node}",
+        },
+        "src": {"system": "meshtastic", "id": packet.node},
+        "ttl_s": int(config.get("ttl_s_default", 120)),
+        "data": data,
+    }
+
+
+def packet_to_envelope(
+    packet: DecodedPacket, site: str, config: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Turn a decoded packet into a tele envelope, or ``None`` and a drop reason.
+
+    Positions go through ``normalize_meshtastic`` so they match the JSON path.
+    The envelope id comes from the sender and packet id, so one packet heard
+    by several gateways is dropped as a duplicate downstream.
+    """
+    message = packet.message
+    if packet.port == "position":
+        if not (message.latitude_i or message.longitude_i):
+            return None, "no_location"
+        payload: Dict[str, Any] = {
+            "latitude": round(message.latitude_i * 1e-7, 7),
+            "longitude": round(message.longitude_i * 1e-7, 7),
+            "altitude": float(message.altitude),
+        }
+        if packet.rx_rssi:
+            payload["rssi"] = packet.rx_rssi
+        raw = {
+            "id": _message_id(packet),
+            "ts": _packet_ts(packet, message.time),
+            "from": packet.node,
+            "node": packet.node,
+            "payload": payload,
+        }
+        envelope = normalize_meshtastic(raw, site, config)
+    elif packet.port == "nodeinfo":
+        node = {"long_name": message.long_name, "short_name": message.short_name}
+        if message.hw_model:
+            node["hw_model"] = load_protobufs().mesh.HardwareModel.Name(message.hw_model)
+        data = {"stream": "nodeinfo", "node": node}
+        envelope = _tele_envelope(packet, site, config, _packet_ts(packet), data)
+    else:
+        metrics = _radio_metrics(packet)
+        variant = message.WhichOneof("variant")
+        names = _ENVIRONMENT_METRICS if variant == "environment_metrics" else _DEVICE_METRICS
+        if variant is not None:
+            for field, value in getattr(message, variant).ListFields():
+                if field.name in names:
+                    metrics[names[field.name]] = _number(value)
+        stream = variant.replace("_metrics", "") if variant else "telemetry"
+        data = {"stream": stream, "metrics": metrics}
+        envelope = _tele_envelope(packet, site, config, _packet_ts(packet, message.time), data)
+
+    if envelope is None:
+        return None, "no_location"
+    if packet.gateway:
+        envelope["src"]["gw"] = packet.gateway
+    return envelope, None
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Seconds; spans the microsecond-scale parse/encode stages up to slow sends.
+DEFAULT_BUCKETS = (
+    0.000005,
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        # += is a read-modify-write; send workers share counters.
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative-bucket histogram; ``observe`` is a bisect and three adds.
+
+    Observations and ``snapshot`` share a lock, so an exposition never shows
+    a ``_count`` that disagrees with the buckets.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Family:
+    def __init__(self, name: str, kind: str, help_text: str) -> None:
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.series: Dict[LabelKey, Any] = {}
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsRegistry:
+    """Counters, histograms and callback gauges and counters rendered as Prometheus text."""
+
+    def __init__(self) -> None:
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._series(name, "counter", help_text, labels, Counter)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._series(name, "histogram", help_text, labels, lambda: Histogram(buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._series(name, "gauge", help_text, labels, lambda: read)
+
+    def callback_counter(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """A counter whose value ``read`` returns, for totals another object already keeps."""
+        self._series(name, "counter", help_text, labels, lambda: read)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for key, series in list(family.series.items()):
+                if isinstance(series, Histogram):
+                    counts, total, observed = series.snapshot()
+                    cumulative = 0
+                    for bound, count in zip(series.buckets, counts):
+                        cumulative += count
+                        lines.append(
+                            f"{family.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}"
+                        )
+                    lines.append(f"{family.name}_bucket{_format_labels(key, ('le', '+Inf'))} {observed}")
+                    lines.append(f"{family.name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{family.name}_count{_format_labels(key)} {observed}")
+                elif isinstance(series, Counter):
+                    lines.append(f"{family.name}{_format_labels(key)} {_format_value(series.value)}")
+                else:
+                    try:
+                        value = float(series())
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logging.debug("Metric %s failed: %s", family.name, exc)
+                        continue
+                    lines.append(f"{family.name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _series(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        labels: Optional[Dict[str, str]],
+        factory: Callable[[], Any],
+    ) -> Any:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = _Family(name, kind, help_text)
+            elif family.kind != kind:
+                raise ValueError(f"metric {name} already registered as {family.kind}")
+            key = _label_key(labels)
+            series = family.series.get(key)
+            if series is None:
+                series = family.series[key] = factory()
+            return series
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - http.server signature
+            return
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info("Serving metrics on http://%s:%s/metrics", host, port)
+    return server
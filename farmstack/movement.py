@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Tuple
+
+from farmstack.cot import CotEvent
+from farmstack.time_utils import parse_ts
+
+EARTH_RADIUS_M = 6371008.8
+
+# CoT uses 9999999 for "unknown" circular error.
+_UNKNOWN_CE = 9999999.0
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass
+class MovementStats:
+    checked: int = 0
+    suppressed: int = 0
+    refreshed: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class MovementFilter:
+    """Suppress position CoT for assets that have not really moved.
+
+    An event for a uid is admitted when it is the first one, when it lies
+    farther than ``max(min_distance_m, ce_factor * ce)`` from the last
+    sent point, or once ``refresh_fraction`` of the last sent event's
+    lifetime (time to stale) has elapsed, so TAK never shows a parked asset
+    as stale. ``admit`` only decides; the caller calls ``sent`` once the
+    event is really on its way, so a position dropped after admission is
+    never used as the reference. Times come from the events themselves,
+    which keeps decisions stable while a backlog drains. At most
+    ``max_entries`` uids are remembered, least recently sent first out.
+    """
+
+    def __init__(
+        self,
+        min_distance_m: float = 5.0,
+        ce_factor: float = 1.0,
+        refresh_fraction: float = 0.75,
+        max_entries: int = 10000,
+    ) -> None:
+        self.min_distance_m = min_distance_m
+        self.ce_factor = ce_factor
+        self.refresh_fraction = refresh_fraction
+        self.max_entries = max_entries
+        self.stats = MovementStats()
+        # uid -> (lat, lon, refresh_at epoch seconds)
+        self._last: OrderedDict[str, Tuple[float, float, float]] = OrderedDict()
+        # sent() may run on the conflator's release thread.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def admit(self, cot: CotEvent) -> bool:
+        self.stats.checked += 1
+        now = parse_ts(cot.time).timestamp()
+        with self._lock:
+            last = self._last.get(cot.uid)
+        if last is not None:
+            lat, lon, refresh_at = last
+            threshold = self.min_distance_m
+            if cot.ce < _UNKNOWN_CE:
+                threshold = max(threshold, self.ce_factor * cot.ce)
+            if haversine_m(lat, lon, cot.lat, cot.lon) <= threshold:
+                if now < refresh_at:
+                    self.stats.suppressed += 1
+                    return False
+                self.stats.refreshed += 1
+        return True
+
+    def sent(self, cot: CotEvent) -> None:
+        """Make ``cot`` the point later positions of its uid are measured against."""
+        now = parse_ts(cot.time).timestamp()
+        stale = parse_ts(cot.stale).timestamp()
+        with self._lock:
+            self._last[cot.uid] = (cot.lat, cot.lon, now + self.refresh_fraction * (stale - now))
+            self._last.move_to_end(cot.uid)
+            if len(self._last) > self.max_entries:
+                self._last.popitem(last=False)
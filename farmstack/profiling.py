@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+PROFILE_KINDS = ("cpu", "memory")
+
+FrameKey = Tuple[str, int, str]
+
+
+def _frame_key(frame: Any) -> FrameKey:
+    code = frame.f_code
+    return (code.co_filename, frame.f_lineno, code.co_name)
+
+
+def _frame_label(key: FrameKey) -> str:
+    filename, lineno, name = key
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def sample_cpu(duration_s: float, interval_s: float = 0.01) -> Tuple[Counter, int]:
+    """Sample the stacks of every other thread for ``duration_s``.
+
+    Returns a counter of root-first stacks and the number of sampling ticks.
+    Sampling only reads ``sys._current_frames()``, so the cost to the
+    profiled threads is one GIL hand-off per tick.
+    """
+    stacks: Counter = Counter()
+    ticks = 0
+    own_id = threading.get_ident()
+    deadline = time.monotonic() + duration_s
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame))
+                frame = frame.f_back
+            stacks[tuple(reversed(stack))] += 1
+        ticks += 1
+        time.sleep(interval_s)
+    return stacks, ticks
+
+
+def write_cpu_profile(stacks: Counter, ticks: int, interval_s: float, path: Path, top: int = 40) -> None:
+    """Write a collapsed-stack file (``path``) and a text summary next to it.
+
+    The ``.folded`` file feeds flamegraph.pl or speedscope directly; the
+    ``.txt`` summary ranks functions by self and total samples.
+    """
+    self_samples: Counter = Counter()
+    total_samples: Counter = Counter()
+    with path.open("w", encoding="utf-8") as handle:
+        for stack, count in stacks.most_common():
+            handle.write(";".join(_frame_label(key) for key in stack) + f" {count}\n")
+            if stack:
+                self_samples[stack[-1][::2]] += count
+            for name in {key[::2] for key in stack}:
+                total_samples[name] += count
+
+    samples = sum(stacks.values()) or 1
+    lines = [
+        f"{ticks} ticks at {interval_s * 1000:.1f}ms, {samples} thread samples",
+        "",
+        f"{'self%':>7} {'total%':>7}  function",
+    ]
+    for name, count in self_samples.most_common(top):
+        filename, func = name
+        lines.append(
+            f"{100.0 * count / samples:7.2f} {100.0 * total_samples[name] / samples:7.2f}  "
+            f"{func} ({filename})"
+        )
+    path.with_suffix(".txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def diff_memory(duration_s: float, frames: int = 10) -> Tuple[Any, Any]:
+    """Snapshot tracemalloc, wait ``duration_s`` and snapshot again.
+
+    Tracing is switched on only for the window unless it was already running,
+    so idle services pay nothing for it.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(duration_s)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    return before, after
+
+
+def write_memory_diff(before: Any, after: Any, path: Path, top: int = 40) -> None:
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    before = before.filter_traces(ignore)
+    after = after.filter_traces(ignore)
+    current = sum(stat.size for stat in after.statistics("filename"))
+    lines = [f"traced {current / 1024:.1f} KiB at end of window", "", "Top growth by line:"]
+    lines.extend(str(stat) for stat in after.compare_to(before, "lineno")[:top])
+    lines.extend(["", "Top growth by traceback:"])
+    for stat in after.compare_to(before, "traceback")[: max(top // 4, 1)]:
+        lines.append(str(stat))
+        lines.extend(f"    {line}" for line in stat.traceback.format())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class Profiler:
+    """On-demand CPU sampling and tracemalloc diffs for a running service.
+
+    ``trigger`` runs one time-boxed capture on a background thread and
+    writes it under ``output_dir``; a second trigger while one is running is
+    ignored. Captures are started by SIGUSR1 (cpu) / SIGUSR2 (memory) once
+    ``install_signal_handlers`` is called, or by ``handle_control`` with a
+    cmd envelope (or bare JSON) whose data is e.g.
+    ``{"kind": "cpu", "duration_s": 30}``.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        output_dir: str = "/data/profiles",
+        default_duration_s: float = 30.0,
+        max_duration_s: float = 300.0,
+        interval_s: float = 0.01,
+    ) -> None:
+        self.service = service
+        self.output_dir = Path(output_dir)
+        self.default_duration_s = default_duration_s
+        self.max_duration_s = max_duration_s
+        self.interval_s = interval_s
+        self._busy = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._busy.locked()
+
+    def trigger(self, kind: str, duration_s: Optional[float] = None) -> bool:
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"unknown profile kind: {kind}")
+        if not self._busy.acquire(blocking=False):
+            logging.warning("Profile already running, ignoring %s request", kind)
+            return False
+        duration = min(max(float(duration_s or self.default_duration_s), 0.1), self.max_duration_s)
+        self._thread = threading.Thread(
+            target=self._run, args=(kind, duration), name=f"profile-{kind}", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def handle_control(self, payload: bytes) -> bool:
+        try:
+            request: Dict[str, Any] = json.loads(payload.decode("utf-8")) if payload.strip() else {}
+            if isinstance(request.get("data"), dict):
+                request = request["data"]
+            return self.trigger(str(request.get("kind", "cpu")), request.get("duration_s"))
+        except (ValueError, TypeError, AttributeError) as exc:
+            logging.warning("Invalid profile request: %s", exc)
+            return False
+
+    def install_signal_handlers(self) -> None:
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.trigger("cpu"))
+        signal.signal(signal.SIGUSR2, lambda signum, frame: self.trigger("memory"))
+
+    def _run(self, kind: str, duration_s: float) -> None:
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+            logging.info("Starting %.0fs %s profile", duration_s, kind)
+            if kind == "cpu":
+                stacks, ticks = sample_cpu(duration_s, self.interval_s)
+                path = self.output_dir / f"{self.service}-cpu-{stamp}.folded"
+                write_cpu_profile(stacks, ticks, self.interval_s, path)
+            else:
+                before, after = diff_memory(duration_s)
+                path = self.output_dir / f"{self.service}-memory-{stamp}.txt"
+                write_memory_diff(before, after, path)
+            logging.info("Wrote %s profile to %s", kind, path)
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error("Profile %s failed: %s", kind, exc)
+        finally:
+            self._busy.release()
+
+
+def control_topic(site: str, service: str) -> str:
+    return f"farm/{site}/cmd/{service}/profile"
+
+
+def profiler_from_env(service: str) -> Profiler:
+    return Profiler(
+        service,
+        output_dir=os.getenv("PROFILE_DIR", "/data/profiles"),
+        default_duration_s=float(os.getenv("PROFILE_DURATION_S", "30")),
+    )
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from farmstack.cot import CotProfile, resolve_cot_event
+from farmstack.cot_proto import encode_cot
+from farmstack.dedupe import DedupeCache
+from farmstack.envelope import Envelope, parse_asset_id, parse_event_type
+from farmstack.schema import SchemaRegistry, default_schema_registry
+from farmstack.time_utils import parse_ts
+
+SCHEMA_MAP = {
+    "tele": "tele.v1.schema.json",
+    "evt": "evt.v1.schema.json",
+    "meta": "meta.v1.schema.json",
+}
+
+DROP_REASONS = ("invalid_json", "schema", "missing_asset", "missing_id", "duplicate", "no_location")
+
+# (topic, payload, drop reason); payload is None whenever a reason is set.
+Decoded = Tuple[Optional[str], Optional[Dict[str, Any]], Optional[str]]
+
+_registry: Optional[SchemaRegistry] = None
+
+
+@dataclass
+class ReplayStats:
+    records: int = 0
+    emitted: int = 0
+    bytes_out: int = 0
+    meta_updates: int = 0
+    invalid_json: int = 0
+    schema: int = 0
+    missing_asset: int = 0
+    missing_id: int = 0
+    duplicate: int = 0
+    no_location: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def decode_record(line: str, registry: SchemaRegistry) -> Decoded:
+    """Parse and validate one JSONL record.
+
+    A record is either a bare envelope or a capture entry of the form
+    ``{"topic": ..., "payload": ...}`` whose payload may itself be a string.
+    """
+    try:
+        record = json.loads(line)
+        topic = None
+        if isinstance(record, dict) and "payload" in record and "topic" in record:
+            topic = record["topic"]
+            record = record["payload"]
+            if isinstance(record, (str, bytes)):
+                record = json.loads(record)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, None, "invalid_json"
+    if not isinstance(record, dict):
+        return topic, None, "invalid_json"
+    schema_name = SCHEMA_MAP.get(record.get("class"))
+    if schema_name:
+        try:
+            registry.validate(schema_name, record)
+        except ValueError:
+            return topic, None, "schema"
+    return topic, record, None
+
+
+def decode_chunk(lines: List[str]) -> List[Decoded]:
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        _registry = default_schema_registry()
+    return [decode_record(line, _registry) for line in lines]
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = (line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parallel_decode(chunks: Iterator[List[str]], workers: int) -> Iterator[List[Decoded]]:
+    # Keep a bounded number of chunks in flight so memory stays flat on
+    # arbitrarily large inputs while results come back in input order.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(decode_chunk, chunk))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CotReplayer:
+    """Run recorded envelopes through the bridge pipeline without a broker.
+
+    Decoding and schema validation may fan out to ``workers`` processes;
+    meta resolution, dedupe and encoding stay in this process and in input
+    order, so the output matches what the live bridge would have sent. The
+    dedupe window follows envelope timestamps rather than the wall clock.
+    """
+
+    def __init__(
+        self,
+        config: Union[CotProfile, Dict[str, Any]],
+        fmt: str = "xml",
+        delimiter: bytes = b"\n",
+        dedupe_entries: int = 512,
+        dedupe_window_s: int = 180,
+    ) -> None:
+        self.profile = config if isinstance(config, CotProfile) else CotProfile(config)
+        self.fmt = fmt
+        self.delimiter = delimiter
+        self.stats = ReplayStats()
+        self.meta_cache: Dict[str, Envelope] = {}
+        self._now = 0.0
+        self.dedupe = DedupeCache(dedupe_entries, dedupe_window_s, clock=lambda: self._now)
+
+    def run(self, lines: Iterable[str], workers: int = 0, chunk_size: int = 1000) -> Iterator[bytes]:
+        chunks = _chunks(lines, chunk_size)
+        decoded = _parallel_decode(chunks, workers) if workers > 1 else map(decode_chunk, chunks)
+        for batch in decoded:
+            for topic, payload, reason in batch:
+                frame = self._process(topic, payload, reason)
+                if frame is not None:
+                    yield frame
+
+    def _process(
+        self,
+        topic: Optional[str],
+        payload: Optional[Dict[str, Any]],
+        reason: Optional[str],
+    ) -> Optional[bytes]:
+        stats = self.stats
+        stats.records += 1
+        if payload is None:
+            self._drop(reason or "invalid_json")
+            return None
+
+        envelope = Envelope.from_dict(payload)
+        asset_id = parse_asset_id(topic, envelope)
+        if not asset_id:
+            self._drop("missing_asset")
+            return None
+
+        msg_class = envelope.msg_class
+        if msg_class == "meta":
+            self.meta_cache[asset_id] = envelope
+            stats.meta_updates += 1
+            return None
+
+        message_id = envelope.id
+        if not message_id:
+            self._drop("missing_id")
+            return None
+        try:
+            # Never step back: a late record would otherwise let the next
+            # eviction drop ids that are still inside the window.
+            self._now = max(self._now, parse_ts(envelope.ts).timestamp())
+        except (AttributeError, TypeError, ValueError):
+            pass
+        if self.dedupe.seen(message_id):
+            self._drop("duplicate")
+            return None
+
+        event_type = parse_event_type(topic, envelope) if msg_class == "evt" else None
+        cot = resolve_cot_event(envelope, self.meta_cache.get(asset_id), event_type, self.profile)
+        if cot is None:
+            self._drop("no_location")
+            return None
+        frame = encode_cot(cot, self.fmt, self.delimiter)
+        stats.emitted += 1
+        stats.bytes_out += len(frame)
+        return frame
+
+    def _drop(self, reason: str) -> None:
+        setattr(self.stats, reason, getattr(self.stats, reason) + 1)
@@ -1,46 +1,366 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
+import logging
+import marshal
+import os
+import random
+import stat
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from jsonschema import Draft202012Validator, RefResolver
+from farmstack.schema_codegen import CODEGEN_VERSION, CompiledSchema, compile_bundle, load_bundle
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
+
+# (schema path, message); the path is "<schema file>#/<keyword path>".
+SchemaError = Tuple[str, str]
+
+_worker_registry: Optional[SchemaRegistry] = None
+
+
+@dataclass
+class ItemResult:
+    index: int
+    schema: Optional[str]
+    errors: List[SchemaError] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+@dataclass
+class BatchResult:
+    items: List[ItemResult] = field(default_factory=list)
+    valid: int = 0
+    invalid: int = 0
+    # Failing keyword location -> number of items that failed there.
+    by_schema_path: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"valid": self.valid, "invalid": self.invalid, "by_schema_path": self.by_schema_path}
 
 
 @dataclass
 class SchemaRegistry:
     base_dir: Path
+    fast_path: bool = True
+    # Persist generated validators here, keyed by a hash of the schema files.
+    cache_dir: Optional[Path] = None
 
     def __post_init__(self) -> None:
         self._schemas: Dict[str, Dict[str, Any]] = {}
         self._validators: Dict[str, Draft202012Validator] = {}
         self._store: Dict[str, Dict[str, Any]] = {}
+        self.digest = ""
+        self.cache_hit = False
         self._load_schemas()
+        # Generated checks only answer valid/invalid; jsonschema still
+        # explains failures and covers schemas the generator cannot compile.
+        self._fast: Dict[str, Callable[[Any], bool]] = load_bundle(self._bundle()) if self.fast_path else {}
 
     def _load_schemas(self) -> None:
-        for path in self.base_dir.glob("*.json"):
-            schema = json.loads(path.read_text(encoding="utf-8"))
+        digest = hashlib.sha256(f"{CODEGEN_VERSION}:{sys.implementation.cache_tag}".encode("utf-8"))
+        for path in sorted(self.base_dir.glob("*.json")):
+            raw = path.read_bytes()
+            digest.update(path.name.encode("utf-8") + b"\0" + raw + b"\0")
+            schema = json.loads(raw)
             schema_id = schema.get("$id", path.name)
             self._schemas[path.name] = schema
             self._store[schema_id] = schema
             self._store[path.name] = schema
+        self.digest = digest.hexdigest()
+
+    def _bundle(self) -> Dict[str, CompiledSchema]:
+        if self.cache_dir is None:
+            return compile_bundle(self._schemas, self._store)
+        path = Path(self.cache_dir) / f"schemas-{self.digest[:16]}.marshal"
+        try:
+            # The cached code is exec'd, so it is only trusted if nobody but
+            # this user could have written it.
+            if _trusted(path.parent) and _trusted(path):
+                digest, bundle = marshal.loads(path.read_bytes())
+                if digest == self.digest:
+                    self.cache_hit = True
+                    return bundle
+            else:
+                logging.warning("Ignoring schema cache %s: writable by other users", path)
+        except FileNotFoundError:
+            pass
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.warning("Ignoring unreadable schema cache %s: %s", path, exc)
+
+        bundle = compile_bundle(self._schemas, self._store)
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(marshal.dumps((self.digest, bundle)))
+            os.replace(tmp, path)
+        except OSError as exc:
+            logging.warning("Could not write schema cache %s: %s", path, exc)
+        return bundle
 
     def validator(self, schema_filename: str) -> Draft202012Validator:
         if schema_filename not in self._validators:
+            # jsonschema is the slowest import in every service and is only
+            # needed to explain failures, so it loads on the first one.
+            from jsonschema import Draft202012Validator, RefResolver
+
             schema = self._schemas[schema_filename]
             resolver = RefResolver.from_schema(schema, store=self._store)
             self._validators[schema_filename] = Draft202012Validator(schema, resolver=resolver)
         return self._validators[schema_filename]
 
-    def validate(self, schema_filename: str, payload: Dict[str, Any]) -> None:
+    def is_valid(self, schema_filename: str, payload: Dict[str, Any]) -> bool:
+        fast = self._fast.get(schema_filename)
+        if fast is not None:
+            return fast(payload)
+        return self.validator(schema_filename).is_valid(payload)
+
+    def errors(self, schema_filename: str, payload: Any) -> List[SchemaError]:
+        fast = self._fast.get(schema_filename)
+        if fast is not None and fast(payload):
+            return []
         validator = self.validator(schema_filename)
         errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
+        return [
+            (f"{schema_filename}#/" + "/".join(map(str, error.absolute_schema_path)), error.message)
+            for error in errors
+        ]
+
+    def validate(self, schema_filename: str, payload: Dict[str, Any]) -> None:
+        errors = self.errors(schema_filename, payload)
         if errors:
-            messages = "; ".join(error.message for error in errors)
+            messages = "; ".join(message for _, message in errors)
             raise ValueError(f"schema validation failed: {messages}")
 
+    def check_chunk(self, payloads: List[Any], schema_filename: Optional[str] = None) -> List[ItemResult]:
+        """Validate payloads without raising; ``index`` is the position in ``payloads``."""
+        results = []
+        for index, payload in enumerate(payloads):
+            name = schema_filename
+            if name is None and isinstance(payload, dict):
+                name = f"{payload.get('class')}.v1.schema.json"
+            if name is None or name not in self._schemas:
+                kind = payload.get("class") if isinstance(payload, dict) else type(payload).__name__
+                results.append(ItemResult(index, None, [("class", f"no schema for {kind!r}")]))
+            else:
+                results.append(ItemResult(index, name, self.errors(name, payload)))
+        return results
+
+    def validate_many(
+        self,
+        payloads: Iterable[Any],
+        schema_filename: Optional[str] = None,
+        chunk_size: int = 1000,
+        workers: int = 0,
+        failures_only: bool = False,
+    ) -> BatchResult:
+        """Validate many envelopes and aggregate the failures.
+
+        Each payload is checked against ``schema_filename`` or, if not given,
+        the schema for its ``class``. Nothing is raised for invalid input:
+        every item gets an ``ItemResult`` (in input order) and failures are
+        counted per schema path. With ``workers > 1`` chunks are validated in
+        a process pool. Pickling the payloads costs about as much as the
+        generated checks, so the pool only pays off when many items fail.
+        ``failures_only`` keeps memory flat on large inputs by dropping the
+        results of valid items.
+        """
+        result = BatchResult()
+        by_path: Counter = Counter()
+        offset = 0
+        for chunk in self._checked_chunks(payloads, schema_filename, chunk_size, workers):
+            for item in chunk:
+                item.index += offset
+                if item.errors:
+                    result.invalid += 1
+                    # Count each failing location once per item.
+                    by_path.update({path for path, _ in item.errors})
+                else:
+                    result.valid += 1
+            result.items.extend(item for item in chunk if item.errors or not failures_only)
+            offset += len(chunk)
+        result.by_schema_path = dict(by_path.most_common())
+        return result
+
+    def _checked_chunks(
+        self,
+        payloads: Iterable[Any],
+        schema_filename: Optional[str],
+        chunk_size: int,
+        workers: int,
+    ) -> Iterator[List[ItemResult]]:
+        iterator = iter(payloads)
+        chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+        if workers <= 1:
+            for chunk in chunks:
+                yield self.check_chunk(chunk, schema_filename)
+            return
+        # A bounded window of chunks in flight keeps memory flat while
+        # results come back in input order.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.base_dir, self.fast_path, self.cache_dir),
+        ) as pool:
+            pending: Deque[Future] = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_check_chunk, chunk, schema_filename))
+                if len(pending) >= workers * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
 
 def default_schema_registry() -> SchemaRegistry:
     base_dir = Path(__file__).resolve().parents[1] / "contracts" / "schemas"
-    return SchemaRegistry(base_dir=base_dir)
\ No newline at end of file
+    cache_dir = os.getenv("SCHEMA_CACHE_DIR")
+    return SchemaRegistry(base_dir=base_dir, cache_dir=Path(cache_dir) if cache_dir else None)
+
+
+def _trusted(path: Path) -> bool:
+    info = path.stat()
+    return info.st_uid == os.geteuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _init_worker(base_dir: Path, fast_path: bool, cache_dir: Optional[Path]) -> None:
+    global _worker_registry  # pylint: disable=global-statement
+    _worker_registry = SchemaRegistry(base_dir, fast_path=fast_path, cache_dir=cache_dir)
+
+
+def _check_chunk(payloads: List[Any], schema_filename: Optional[str]) -> List[ItemResult]:
+    assert _worker_registry is not None
+    return _worker_registry.check_chunk(payloads, schema_filename)
+
+
+def payload_shape(value: Any) -> Hashable:
+    """Structural fingerprint of a decoded JSON value: keys and value types, not values."""
+    if isinstance(value, dict):
+        return tuple([(key, payload_shape(item)) for key, item in value.items()])
+    if isinstance(value, list):
+        return (list, frozenset(payload_shape(item) for item in value))
+    return type(value)
+
+
+@dataclass
+class ValidationStats:
+    validated: int = 0
+    skipped: int = 0
+    failures: int = 0
+    saved_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ValidationPolicy:
+    """Validate trusted producers by sampling once their output has proven stable.
+
+    Payloads are grouped by (``src.system``, schema, structural shape). The
+    first ``warmup`` payloads of a group are fully validated, after which
+    only ``sample_rate`` of them are. Any failure from a source puts all of
+    its groups back into warmup. Sources not in ``trusted_sources`` are always
+    validated. ``stats.saved_s`` is the validation time skipped, estimated
+    from the running mean cost of full checks per schema, minus the time spent
+    fingerprinting; with generated validators the two are close, so the net
+    figure is what says whether sampling pays for a given source.
+    """
+
+    def __init__(
+        self,
+        registry: SchemaRegistry,
+        trusted_sources: Iterable[str] = (),
+        warmup: int = 100,
+        sample_rate: float = 0.05,
+        max_shapes: int = 4096,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.registry = registry
+        self.trusted_sources = frozenset(trusted_sources)
+        self.warmup = warmup
+        self.sample_rate = sample_rate
+        self.max_shapes = max_shapes
+        self.stats = ValidationStats()
+        self._random = (rng or random.Random()).random
+        self._seen: Dict[Tuple[str, str, Hashable], int] = {}
+        self._cost: Dict[str, float] = {}
+
+    def validate(self, schema_filename: str, payload: Dict[str, Any]) -> None:
+        src = payload.get("src")
+        source = src.get("system") if isinstance(src, dict) else None
+        if source not in self.trusted_sources:
+            self._validate(schema_filename, payload, source)
+            return
+
+        started = time.perf_counter()
+        key = (source, schema_filename, payload_shape(payload))
+        seen = self._seen.get(key, 0)
+        skip = seen >= self.warmup and self._random() >= self.sample_rate
+        self.stats.saved_s -= time.perf_counter() - started
+        if skip:
+            self.stats.skipped += 1
+            self.stats.saved_s += self._cost.get(schema_filename, 0.0)
+            return
+        self._validate(schema_filename, payload, source)
+        if len(self._seen) >= self.max_shapes and key not in self._seen:
+            self._seen.clear()
+        self._seen[key] = seen + 1
+
+    def _validate(self, schema_filename: str, payload: Dict[str, Any], source: Optional[str]) -> None:
+        self.stats.validated += 1
+        started = time.perf_counter()
+        try:
+            self.registry.validate(schema_filename, payload)
+        except ValueError:
+            self.stats.failures += 1
+            for key in [key for key in self._seen if key[0] == source]:
+                del self._seen[key]
+            raise
+        # Failures take the slow jsonschema path, so only successes feed the
+        # cost estimate used for saved_s.
+        elapsed = time.perf_counter() - started
+        cost = self._cost.get(schema_filename)
+        self._cost[schema_filename] = elapsed if cost is None else cost + (elapsed - cost) / 16
+
+
+def build_validator(
+    registry: SchemaRegistry, config: Optional[Dict[str, Any]] = None
+) -> Union[SchemaRegistry, ValidationPolicy]:
+    """The validator for a ``validation`` config section; full checks unless ``mode: sampled``."""
+    config = config or {}
+    mode = config.get("mode", "full")
+    if mode == "full":
+        return registry
+    if mode != "sampled":
+        raise ValueError(f"unknown validation mode: {mode}")
+    return ValidationPolicy(
+        registry,
+        trusted_sources=config.get("trusted_sources", ()),
+        warmup=config.get("warmup", 100),
+        sample_rate=config.get("sample_rate", 0.05),
+    )
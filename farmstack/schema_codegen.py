@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import marshal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
+
+# Bump when generated code changes shape, so persisted bundles are rebuilt.
+CODEGEN_VERSION = 1
+
+# name -> (marshalled code object, constants, entry point function name)
+CompiledSchema = Tuple[bytes, Dict[str, Any], str]
+
+# Keywords that only annotate and never affect validity (format is an
+# annotation in 2020-12 unless a format checker is enabled, as here).
+_ANNOTATIONS = {
+    "$schema",
+    "$id",
+    "$comment",
+    "$defs",
+    "definitions",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "format",
+    "readOnly",
+    "writeOnly",
+    "deprecated",
+}
+_SUPPORTED = _ANNOTATIONS | {
+    "type",
+    "const",
+    "enum",
+    "required",
+    "properties",
+    "additionalProperties",
+    "minProperties",
+    "maxProperties",
+    "minLength",
+    "maxLength",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+    "items",
+    "minItems",
+    "maxItems",
+    "allOf",
+    "$ref",
+}
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    # jsonschema treats 1.0 as an integer.
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool) "
+    "or isinstance({v}, float) and {v}.is_integer())",
+}
+
+_NUMBER = "(isinstance({v}, (int, float)) and not isinstance({v}, bool))"
+
+
+class UnsupportedSchema(ValueError):
+    """Raised when a schema uses a keyword the generator cannot compile."""
+
+
+def _json_equal(left: Any, right: Any) -> bool:
+    # JSON equality: booleans are not numbers, 1 == 1.0, containers compare deeply.
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool) and left == right
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left == right
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(_json_equal(left[key], right[key]) for key in left)
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(_json_equal(a, b) for a, b in zip(left, right))
+    return type(left) is type(right) and left == right
+
+
+class _Generator:
+    def __init__(self, store: Dict[str, Dict[str, Any]]) -> None:
+        self.store = store
+        self.constants: Dict[str, Any] = {}
+        self.functions: Dict[int, str] = {}
+        self.bodies: List[str] = []
+        self._pending: List[Tuple[str, Any, str]] = []
+        self._counter = 0
+
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _constant(self, value: Any) -> str:
+        name = self._name("_c")
+        self.constants[name] = value
+        return name
+
+    def function_for(self, schema: Any, base_uri: str) -> str:
+        key = id(schema)
+        if key not in self.functions:
+            name = self._name("_v")
+            self.functions[key] = name
+            self._pending.append((name, schema, base_uri))
+        return self.functions[key]
+
+    def drain(self) -> None:
+        while self._pending:
+            name, schema, base_uri = self._pending.pop()
+            lines = [f"def {name}(v0):"]
+            lines.extend(self._emit(schema, "v0", base_uri, 1))
+            lines.append("    return True")
+            self.bodies.append("\n".join(lines))
+
+    def _resolve(self, ref: str, base_uri: str) -> Tuple[Any, str]:
+        target = urljoin(base_uri, ref) if base_uri else ref
+        document_uri, fragment = urldefrag(target)
+        document = self.store.get(document_uri)
+        if document is None:
+            document = self.store.get(document_uri.rsplit("/", 1)[-1])
+        if document is None:
+            raise UnsupportedSchema(f"unresolvable $ref {ref}")
+        node: Any = document
+        for token in [part for part in fragment.split("/") if part]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            node = node[int(token)] if isinstance(node, list) else node[token]
+        return node, document.get("$id", document_uri) if isinstance(document, dict) else document_uri
+
+    def _emit(self, schema: Any, v: str, base_uri: str, depth: int) -> List[str]:
+        pad = "    " * depth
+        if schema is True or schema == {}:
+            return []
+        if schema is False:
+            return [f"{pad}return False"]
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"schema must be an object or boolean, got {schema!r}")
+        unknown = set(schema) - _SUPPORTED
+        if unknown:
+            raise UnsupportedSchema(f"unsupported keywords: {', '.join(sorted(unknown))}")
+        if "$id" in schema:
+            base_uri = urljoin(base_uri, schema["$id"]) if base_uri else schema["$id"]
+
+        lines: List[str] = []
+        if "$ref" in schema:
+            target, target_base = self._resolve(schema["$ref"], base_uri)
+            lines.append(f"{pad}if not {self.function_for(target, target_base)}({v}): return False")
+
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            if any(name not in _TYPE_CHECKS for name in types):
+                raise UnsupportedSchema(f"unknown type {schema['type']!r}")
+            check = " or ".join(_TYPE_CHECKS[name].format(v=v) for name in types)
+            lines.append(f"{pad}if not ({check}): return False")
+
+        if "const" in schema:
+            lines.append(self._equality(schema["const"], v, pad))
+        if "enum" in schema:
+            options = self._constant(list(schema["enum"]))
+            if all(isinstance(option, str) for option in schema["enum"]):
+                lines.append(f"{pad}if not (isinstance({v}, str) and {v} in {options}): return False")
+            else:
+                lines.append(f"{pad}if not any(_json_equal({v}, o) for o in {options}): return False")
+
+        lines.extend(self._emit_string(schema, v, pad))
+        lines.extend(self._emit_number(schema, v, pad))
+        lines.extend(self._emit_object(schema, v, base_uri, depth))
+        lines.extend(self._emit_array(schema, v, base_uri, depth))
+
+        for subschema in schema.get("allOf", []):
+            lines.extend(self._emit(subschema, v, base_uri, depth))
+        return lines
+
+    def _equality(self, value: Any, v: str, pad: str) -> str:
+        if isinstance(value, str):
+            return f"{pad}if not (isinstance({v}, str) and {v} == {value!r}): return False"
+        if isinstance(value, bool):
+            return f"{pad}if {v} is not {value!r}: return False"
+        if value is None:
+            return f"{pad}if {v} is not None: return False"
+        if isinstance(value, (int, float)):
+            return f"{pad}if not ({_NUMBER.format(v=v)} and {v} == {value!r}): return False"
+        return f"{pad}if not _json_equal({v}, {self._constant(value)}): return False"
+
+    def _emit_string(self, schema: Dict[str, Any], v: str, pad: str) -> List[str]:
+        checks = []
+        if "minLength" in schema:
+            checks.append(f"len({v}) < {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            checks.append(f"len({v}) > {int(schema['maxLength'])}")
+        if not checks:
+            return []
+        return [f"{pad}if isinstance({v}, str) and ({' or '.join(checks)}): return False"]
+
+    def _emit_number(self, schema: Dict[str, Any], v: str, pad: str) -> List[str]:
+        checks = []
+        for keyword, operator in (
+            ("minimum", "<"),
+            ("maximum", ">"),
+            ("exclusiveMinimum", "<="),
+            ("exclusiveMaximum", ">="),
+        ):
+            if keyword in schema:
+                checks.append(f"{v} {operator} {schema[keyword]!r}")
+        if not checks:
+            return []
+        return [f"{pad}if {_NUMBER.format(v=v)} and ({' or '.join(checks)}): return False"]
+
+    def _emit_object(self, schema: Dict[str, Any], v: str, base_uri: str, depth: int) -> List[str]:
+        keywords = ("required", "properties", "additionalProperties", "minProperties", "maxProperties")
+        if not any(keyword in schema for keyword in keywords):
+            return []
+        pad = "    " * (depth + 1)
+        lines = [f"{'    ' * depth}if isinstance({v}, dict):"]
+        for key in schema.get("required", []):
+            lines.append(f"{pad}if {key!r} not in {v}: return False")
+        if "minProperties" in schema:
+            lines.append(f"{pad}if len({v}) < {int(schema['minProperties'])}: return False")
+        if "maxProperties" in schema:
+            lines.append(f"{pad}if len({v}) > {int(schema['maxProperties'])}: return False")
+        properties = schema.get("properties", {})
+        for key, subschema in properties.items():
+            child = self._name("v")
+            body = self._emit(subschema, child, base_uri, depth + 2)
+            if body:
+                lines.append(f"{pad}if {key!r} in {v}:")
+                lines.append(f"{pad}    {child} = {v}[{key!r}]")
+                lines.extend(body)
+        additional = schema.get("additionalProperties", True)
+        if additional is not True and additional != {}:
+            known = self._constant(frozenset(properties))
+            child = self._name("v")
+            body = self._emit(additional, child, base_uri, depth + 3)
+            lines.append(f"{pad}for _k, {child} in {v}.items():")
+            lines.append(f"{pad}    if _k not in {known}:")
+            lines.extend(body)
+        return lines if len(lines) > 1 else []
+
+    def _emit_array(self, schema: Dict[str, Any], v: str, base_uri: str, depth: int) -> List[str]:
+        if not any(keyword in schema for keyword in ("items", "minItems", "maxItems")):
+            return []
+        pad = "    " * (depth + 1)
+        lines = [f"{'    ' * depth}if isinstance({v}, list):"]
+        if "minItems" in schema:
+            lines.append(f"{pad}if len({v}) < {int(schema['minItems'])}: return False")
+        if "maxItems" in schema:
+            lines.append(f"{pad}if len({v}) > {int(schema['maxItems'])}: return False")
+        if "items" in schema:
+            if not isinstance(schema["items"], (dict, bool)):
+                raise UnsupportedSchema("array-form items is not supported")
+            child = self._name("v")
+            body = self._emit(schema["items"], child, base_uri, depth + 2)
+            if body:
+                lines.append(f"{pad}for {child} in {v}:")
+                lines.extend(body)
+        return lines if len(lines) > 1 else []
+
+
+def generate_validators(
+    schemas: Dict[str, Dict[str, Any]],
+    store: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """Generate Python source for one validator per schema.
+
+    Returns the source, the constants it references and a map from schema
+    name to generated function name. Raises ``UnsupportedSchema`` if any
+    schema needs a keyword the generator does not handle.
+    """
+    generator = _Generator(store if store is not None else schemas)
+    entry_points = {
+        name: generator.function_for(schema, schema.get("$id", name)) for name, schema in schemas.items()
+    }
+    generator.drain()
+    return "\n\n\n".join(generator.bodies) + "\n", generator.constants, entry_points
+
+
+def compile_bundle(
+    schemas: Dict[str, Dict[str, Any]],
+    store: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, CompiledSchema]:
+    """Generate and byte-compile validators in a form that can be persisted.
+
+    Schemas the generator cannot handle are left out, so callers fall back
+    to jsonschema for them. The code objects are only loadable by the same
+    Python version.
+    """
+    bundle: Dict[str, CompiledSchema] = {}
+    for name, schema in schemas.items():
+        try:
+            source, constants, entry_points = generate_validators({name: schema}, store or schemas)
+        except UnsupportedSchema:
+            continue
+        code = compile(source, f"<schema {name}>", "exec")
+        bundle[name] = (marshal.dumps(code), constants, entry_points[name])
+    return bundle
+
+
+def load_bundle(bundle: Dict[str, CompiledSchema]) -> Dict[str, Callable[[Any], bool]]:
+    validators: Dict[str, Callable[[Any], bool]] = {}
+    for name, (code, constants, entry_point) in bundle.items():
+        namespace: Dict[str, Any] = {"_json_equal": _json_equal, **constants}
+        exec(marshal.loads(code), namespace)  # pylint: disable=exec-used
+        validators[name] = namespace[entry_point]
+    return validators
+
+
+def compile_validators(
+    schemas: Dict[str, Dict[str, Any]],
+    store: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Callable[[Any], bool]]:
+    """Compile schemas into ``payload -> bool`` functions.
+
+    Schemas the generator cannot handle are left out, so callers fall back
+    to jsonschema for them.
+    """
+    return load_bundle(compile_bundle(schemas, store))
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+
+@dataclass
+class QueueStats:
+    enqueued: int = 0
+    dequeued: int = 0
+    batches: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    wait_s_total: float = 0.0
+    wait_s_max: float = 0.0
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def wait_s_avg(self) -> float:
+        return self.wait_s_total / self.dequeued if self.dequeued else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["wait_s_avg"] = self.wait_s_avg
+        return data
+
+
+class StaleShedder:
+    """Decides when a position is too old to be worth sending.
+
+    Shedding only applies while the bridge is draining a backlog: for
+    retained messages, for the first ``after_connect_s`` seconds after each
+    (re)connect, and while a send queue holds ``queue_depth`` or more
+    frames. Live traffic is always sent, so a producer whose clock runs
+    behind the bridge's is never shed for arriving "already stale".
+    """
+
+    def __init__(
+        self,
+        grace_s: float = 0.0,
+        after_connect_s: float = 60.0,
+        queue_depth: int = 0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.grace_s = grace_s
+        self.after_connect_s = after_connect_s
+        self.queue_depth = queue_depth
+        self._clock = clock
+        self._connected_at = float("-inf")
+
+    def connected(self) -> None:
+        self._connected_at = self._clock()
+
+    def in_backlog(self, retained: bool = False, depth: int = 0) -> bool:
+        return (
+            retained
+            or self._clock() - self._connected_at < self.after_connect_s
+            or (self.queue_depth > 0 and depth >= self.queue_depth)
+        )
+
+    def deadline(self, stale_at: float, retained: bool = False, depth: int = 0) -> Optional[float]:
+        """Epoch time after which to shed an item going stale at ``stale_at``, or None to keep it."""
+        if not self.in_backlog(retained, depth):
+            return None
+        return stale_at - self.grace_s
+
+    def expired(self, deadline: Optional[float]) -> bool:
+        return deadline is not None and deadline <= self._clock()
+
+
+class PrioritySendQueue:
+    """Bounded multi-level FIFO; level 0 is drained before level 1 and so on.
+
+    When full, ``drop_new`` rejects the incoming item, ``drop_oldest`` evicts
+    the oldest item of the lowest-priority level that is not more important
+    than the incoming one (rejecting the incoming item if there is none), and
+    ``block`` waits up to ``block_timeout_s`` for room before rejecting.
+
+    Items put with ``expires_at`` (epoch seconds) are shed as ``stale``
+    instead of being returned once that time has passed, so a backlog built
+    up during an outage drains without sending out-of-date positions.
+    """
+
+    def __init__(
+        self,
+        max_depth: int,
+        levels: int = 2,
+        overflow: str = "drop_oldest",
+        block_timeout_s: float = 0.5,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.max_depth = max_depth
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_s
+        self.stats = QueueStats()
+        self._levels: List[Deque[Tuple[float, Optional[float], Any]]] = [deque() for _ in range(levels)]
+        self._depth = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return self._depth
+
+    def put(self, item: Any, priority: int = 0, expires_at: Optional[float] = None) -> bool:
+        level = min(max(priority, 0), len(self._levels) - 1)
+        with self._lock:
+            if self._depth >= self.max_depth and not self._make_room(level):
+                return False
+            self._levels[level].append((time.monotonic(), expires_at, item))
+            self._depth += 1
+            self.stats.enqueued += 1
+            self.stats.depth = self._depth
+            if self._depth > self.stats.max_depth:
+                self.stats.max_depth = self._depth
+            self._not_empty.notify()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        with self._lock:
+            if not self._depth and not self._closed:
+                self._not_empty.wait(timeout)
+            return self._pop()
+
+    def get_batch(
+        self,
+        timeout: Optional[float] = None,
+        window_s: float = 0.0,
+        max_bytes: int = 0,
+        size: Callable[[Any], int] = len,
+    ) -> List[Any]:
+        """Wait up to ``timeout`` for one item, then coalesce more behind it.
+
+        Items already queued are taken immediately; after that the batch stays
+        open for at most ``window_s`` past the first item, which bounds the
+        latency added by coalescing. The batch closes early once it holds
+        ``max_bytes`` as measured by ``size``.
+        """
+        with self._lock:
+            if not self._depth and not self._closed:
+                self._not_empty.wait(timeout)
+            first = self._pop()
+            if first is None:
+                return []
+            batch = [first]
+            total = size(first)
+            deadline = time.monotonic() + window_s
+            while total < max_bytes:
+                if not self._depth:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        break
+                    self._not_empty.wait(remaining)
+                    continue
+                item = self._pop()
+                if item is None:
+                    continue
+                batch.append(item)
+                total += size(item)
+            self.stats.batches += 1
+            return batch
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def _pop(self) -> Optional[Any]:
+        for items in self._levels:
+            while items:
+                enqueued_at, expires_at, item = items.popleft()
+                self._depth -= 1
+                self.stats.depth = self._depth
+                if expires_at is not None and expires_at <= time.time():
+                    self._count_drop("stale")
+                    self._not_full.notify()
+                    continue
+                wait_s = time.monotonic() - enqueued_at
+                self.stats.dequeued += 1
+                self.stats.wait_s_total += wait_s
+                if wait_s > self.stats.wait_s_max:
+                    self.stats.wait_s_max = wait_s
+                self._not_full.notify()
+                return item
+        return None
+
+    def _make_room(self, level: int) -> bool:
+        if self.overflow == "block":
+            deadline = time.monotonic() + self.block_timeout_s
+            while self._depth >= self.max_depth:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    self._count_drop("block_timeout")
+                    return False
+                self._not_full.wait(remaining)
+            return True
+        if self.overflow == "drop_oldest":
+            for victim_level in range(len(self._levels) - 1, level - 1, -1):
+                if self._levels[victim_level]:
+                    self._levels[victim_level].popleft()
+                    self._depth -= 1
+                    self._count_drop("evicted")
+                    return True
+        self._count_drop("rejected")
+        return False
+
+    def _count_drop(self, reason: str) -> None:
+        self.stats.dropped[reason] = self.stats.dropped.get(reason, 0) + 1
+
+
+class SendWorkers:
+    def __init__(
+        self,
+        queue: PrioritySendQueue,
+        send: Callable[[Any], None],
+        workers: int = 1,
+        name: str = "sender",
+        send_batch: Optional[Callable[[List[Any]], None]] = None,
+        flush_ms: float = 0.0,
+        flush_bytes: int = 0,
+    ) -> None:
+        self.queue = queue
+        self.send = send
+        self.send_batch = send_batch
+        self.flush_s = flush_ms / 1000.0
+        self.flush_bytes = flush_bytes
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{index}", daemon=True)
+            for index in range(max(workers, 1))
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        if self.send_batch is not None and self.flush_bytes > 0:
+            self._run_batched()
+            return
+        while True:
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                if self._stop.is_set():
+                    return
+                continue
+            try:
+                self.send(item)
+            except Exception as exc:  # pylint: disable=broad-except
+                logging.error("Failed to send CoT: %s", exc)
+
+    def _run_batched(self) -> None:
+        assert self.send_batch is not None
+        while True:
+            batch = self.queue.get_batch(
+                timeout=0.5,
+                window_s=self.flush_s,
+                max_bytes=self.flush_bytes,
+            )
+            if not batch:
+                if self._stop.is_set():
+                    return
+                continue
+            try:
+                self.send_batch(batch)
+            except Exception as exc:  # pylint: disable=broad-except
+                logging.error("Failed to send %s CoT events: %s", len(batch), exc)
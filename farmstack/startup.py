@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import List, Optional, Tuple
+
+
+def process_age_s() -> Optional[float]:
+    """Seconds since this process was exec'd, from /proc (Linux only).
+
+    Covers interpreter start-up and module imports, which happen before any
+    of our code can take a timestamp.
+    """
+    try:
+        with open("/proc/self/stat", encoding="ascii") as handle:
+            # Field 22 is the start time in clock ticks since boot; the command
+            # name (field 2) may contain spaces, so split after its ')'.
+            start_ticks = int(handle.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as handle:
+            uptime = float(handle.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupTimer:
+    """Time the phases from process start to the first handled message.
+
+    Create it first thing in ``main()``; everything before that is reported
+    as ``imports``. ``mark(phase)`` closes a phase and ``first_message()``
+    logs the whole breakdown once.
+    """
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.phases: List[Tuple[str, float]] = []
+        self.done = False
+        self._last = time.perf_counter()
+        age = process_age_s()
+        if age is not None:
+            self.phases.append(("imports", age))
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total_s(self) -> float:
+        return sum(elapsed for _, elapsed in self.phases)
+
+    def report(self) -> str:
+        parts = ", ".join(f"{phase} {elapsed:.3f}s" for phase, elapsed in self.phases)
+        return f"{self.service} startup {self.total_s:.3f}s: {parts}"
+
+    def first_message(self) -> None:
+        if self.done:
+            return
+        self.done = True
+        self.mark("first_message")
+        logging.info("%s", self.report())
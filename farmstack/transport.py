@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import logging
+import random
+import select
+import socket
+import ssl
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class ConnectionStats:
+    handshakes: int = 0
+    resumed_sessions: int = 0
+    reconnects: int = 0
+    connect_failures: int = 0
+    send_failures: int = 0
+    heartbeats: int = 0
+    frames_sent: int = 0
+    bytes_sent: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class StreamConnection:
+    """Long-lived TCP (optionally TLS) stream that reconnects with backoff.
+
+    Writes are serialized under a lock so the connection can be shared by
+    several threads. When the link drops the next write reconnects; failed
+    connects back off exponentially (with jitter) up to ``backoff_max_s`` and
+    writes during the backoff window fail fast with ``ConnectionError``.
+    A failed write is retried ``retries`` times on a fresh connection; set
+    it to 0 when the caller retries itself. TLS sessions are reused across
+    reconnects so the server can resume them.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        server_hostname: Optional[str] = None,
+        connect_timeout_s: float = 5.0,
+        backoff_initial_s: float = 0.5,
+        backoff_max_s: float = 30.0,
+        heartbeat_s: float = 0.0,
+        heartbeat_payload: Optional[Callable[[], bytes]] = None,
+        retries: int = 1,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.server_hostname = server_hostname
+        self.connect_timeout_s = connect_timeout_s
+        self.backoff_initial_s = backoff_initial_s
+        self.backoff_max_s = backoff_max_s
+        self.heartbeat_s = heartbeat_s
+        self.heartbeat_payload = heartbeat_payload
+        self.retries = retries
+        self.stats = ConnectionStats()
+
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._session: Optional[ssl.SSLSession] = None
+        self._has_connected = False
+        self._backoff_s = 0.0
+        self._next_attempt = 0.0
+        self._last_send = 0.0
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def send(self, data: bytes) -> None:
+        with self._lock:
+            self._send_locked(data)
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._drop(None)
+
+    def _send_locked(self, data: bytes) -> None:
+        # A half-open link usually surfaces on the first write; retry on a
+        # fresh connection before reporting the failure.
+        for attempt in range(self.retries + 1):
+            sock = self._ensure_connected()
+            try:
+                sock.sendall(data)
+                break
+            except OSError as exc:
+                self.stats.send_failures += 1
+                self._drop(exc)
+                if attempt == self.retries:
+                    raise
+        self.stats.frames_sent += 1
+        self.stats.bytes_sent += len(data)
+        self._last_send = time.monotonic()
+
+    def _ensure_connected(self) -> socket.socket:
+        if self._sock is not None and self._alive(self._sock):
+            return self._sock
+        if self._sock is not None:
+            self._drop(ConnectionResetError("peer closed the connection"))
+
+        now = time.monotonic()
+        if now < self._next_attempt:
+            raise ConnectionError(
+                f"{self.host}:{self.port} unavailable, next reconnect in {self._next_attempt - now:.1f}s"
+            )
+        try:
+            sock = self._connect()
+        except OSError:
+            self.stats.connect_failures += 1
+            self._backoff_s = min(
+                self.backoff_max_s,
+                self._backoff_s * 2 if self._backoff_s else self.backoff_initial_s,
+            )
+            self._next_attempt = now + self._backoff_s * random.uniform(0.5, 1.0)
+            raise
+
+        if self._has_connected:
+            self.stats.reconnects += 1
+        self._has_connected = True
+        self._backoff_s = 0.0
+        self._next_attempt = 0.0
+        self._last_send = time.monotonic()
+        self._sock = sock
+        logging.info("Stream connected to %s:%s %s", self.host, self.port, self.stats.as_dict())
+        self._start_heartbeat()
+        return sock
+
+    def _connect(self) -> socket.socket:
+        raw = socket.create_connection((self.host, self.port), timeout=self.connect_timeout_s)
+        raw.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        raw.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if self.ssl_context is None:
+            return raw
+        try:
+            ssock = self.ssl_context.wrap_socket(
+                raw,
+                server_hostname=self.server_hostname,
+                session=self._session,
+            )
+        except (OSError, ValueError):
+            raw.close()
+            if self._session is None:
+                raise
+            # The server may reject a stale session; fall back to a full handshake.
+            self._session = None
+            raw = socket.create_connection((self.host, self.port), timeout=self.connect_timeout_s)
+            ssock = self.ssl_context.wrap_socket(raw, server_hostname=self.server_hostname)
+        self.stats.handshakes += 1
+        if ssock.session_reused:
+            self.stats.resumed_sessions += 1
+        self._session = ssock.session
+        return ssock
+
+    def _alive(self, sock: socket.socket) -> bool:
+        # Drain anything the server pushed to us and detect an orderly close,
+        # without blocking the writer.
+        try:
+            while True:
+                readable, _, _ = select.select([sock], [], [], 0)
+                pending = isinstance(sock, ssl.SSLSocket) and sock.pending() > 0
+                if not readable and not pending:
+                    return True
+                sock.setblocking(False)
+                try:
+                    chunk = sock.recv(65536)
+                except (ssl.SSLWantReadError, BlockingIOError):
+                    return True
+                finally:
+                    sock.settimeout(self.connect_timeout_s)
+                if not chunk:
+                    return False
+        except (OSError, ValueError):
+            return False
+
+    def _drop(self, exc: Optional[BaseException]) -> None:
+        sock = self._sock
+        self._sock = None
+        if sock is None:
+            return
+        if isinstance(sock, ssl.SSLSocket):
+            # Session tickets may arrive after the handshake (TLS 1.3).
+            self._session = sock.session or self._session
+        if exc is not None:
+            logging.warning("Stream to %s:%s dropped: %s", self.host, self.port, exc)
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def _start_heartbeat(self) -> None:
+        if self.heartbeat_s <= 0 or self._heartbeat_thread is not None:
+            return
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop,
+            name=f"heartbeat-{self.host}:{self.port}",
+            daemon=True,
+        )
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(self.heartbeat_s / 2, 0.05)
+        while not self._stop.wait(interval):
+            with self._lock:
+                if self._sock is None:
+                    if time.monotonic() < self._next_attempt:
+                        continue
+                    try:
+                        self._ensure_connected()
+                    except OSError:
+                        continue
+                if time.monotonic() - self._last_send < self.heartbeat_s:
+                    if self._sock is not None and not self._alive(self._sock):
+                        self._drop(ConnectionResetError("peer closed the connection"))
+                    continue
+                if self.heartbeat_payload is None:
+                    continue
+                try:
+                    self._send_locked(self.heartbeat_payload())
+                    self.stats.heartbeats += 1
+                except OSError as exc:
+                    logging.debug("Heartbeat to %s:%s failed: %s", self.host, self.port, exc)
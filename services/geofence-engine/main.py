@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import paho.mqtt.client as mqtt
+import yaml
+from pydantic import BaseModel, ConfigDict, Field
+
+from farmstack.envelope import Envelope, parse_asset_id
+from farmstack.geofence import GeofenceIndex, GeofenceTracker, build_geofence_event, load_zones
+from farmstack.profiling import control_topic, profiler_from_env
+from farmstack.schema import default_schema_registry
+from farmstack.startup import StartupTimer
+
+
+class GeofenceConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    site_default: str = "farmstead"
+    zone_paths: List[str] = Field(default_factory=lambda: ["/overlays"])
+    name_fields: List[str] = Field(default_factory=lambda: ["name", "NAME", "Name"])
+    event_ttl_s: int = 600
+    severity: str = "warning"
+
+
+def load_config(path: str) -> GeofenceConfig:
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    return GeofenceConfig.model_validate(data)
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    startup = StartupTimer("geofence-engine")
+
+    config_path = os.getenv("GEOFENCE_CONFIG", "/configs/geofence-engine.yaml")
+    config = load_config(config_path)
+    startup.mark("config")
+    site = os.getenv("SITE", config.site_default)
+
+    mqtt_host = os.getenv("MQTT_HOST", "mqtt-broker")
+    mqtt_port = int(os.getenv("MQTT_PORT", "1883"))
+    mqtt_user = os.getenv("MQTT_USERNAME")
+    mqtt_pass = os.getenv("MQTT_PASSWORD")
+
+    started = time.perf_counter()
+    zones = load_zones(config.zone_paths, config.name_fields)
+    tracker = GeofenceTracker(GeofenceIndex(zones))
+    startup.mark("zones")
+    logging.info(
+        "Indexed %s geofence zones (%s polygons) in %.2fs",
+        len(zones),
+        sum(len(zone.polygons) for zone in zones),
+        time.perf_counter() - started,
+    )
+
+    schema_registry = default_schema_registry()
+    startup.mark("schemas_cached" if schema_registry.cache_hit else "schemas")
+
+    profiler = profiler_from_env("geofence-engine")
+    profile_topic = control_topic(site, "geofence-engine")
+
+    def on_connect(client: mqtt.Client, userdata: Any, flags: Dict[str, Any], rc: int) -> None:
+        if rc != 0:
+            logging.error("MQTT connect failed: rc=%s", rc)
+            return
+        base = f"farm/{site}"
+        client.subscribe(f"{base}/tele/+/position")
+        client.subscribe(profile_topic, qos=1)
+        logging.info("Subscribed to position telemetry under %s", base)
+
+    def on_message(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        startup.first_message()
+        try:
+            payload = json.loads(msg.payload.decode("utf-8"))
+        except json.JSONDecodeError:
+            logging.warning("Invalid JSON payload on %s", msg.topic)
+            return
+
+        try:
+            schema_registry.validate("tele.v1.schema.json", payload)
+        except ValueError as exc:
+            logging.warning("Schema validation failed: %s", exc)
+            return
+
+        envelope = Envelope.from_dict(payload)
+        loc = envelope.loc
+        if loc is None:
+            return
+        asset_id = parse_asset_id(msg.topic, envelope)
+        if not asset_id:
+            logging.warning("Missing asset id for topic %s", msg.topic)
+            return
+
+        entered, exited = tracker.update(asset_id, float(loc.lat), float(loc.lon))
+        for transition, zone_ids in (("exit", exited), ("enter", entered)):
+            for zone_id in zone_ids:
+                zone = tracker.index.zones[zone_id]
+                event = build_geofence_event(
+                    envelope, site, transition, zone, ttl_s=config.event_ttl_s, severity=config.severity
+                )
+                topic = f"farm/{site}/evt/{asset_id}/geofence.{transition}"
+                client.publish(topic, json.dumps(event), qos=1, retain=False)
+                logging.info("Asset %s %s zone %s", asset_id, transition, zone.name)
+
+    client = mqtt.Client()
+    if mqtt_user:
+        client.username_pw_set(mqtt_user, mqtt_pass)
+    mqtt_tls = os.getenv("MQTT_TLS", "false").lower() == "true"
+    if mqtt_tls:
+        mqtt_ca = os.getenv("MQTT_TLS_CA")
+        mqtt_cert = os.getenv("MQTT_TLS_CERT") or None
+        mqtt_key = os.getenv("MQTT_TLS_KEY") or None
+        if not mqtt_ca:
+            logging.warning("MQTT_TLS enabled but MQTT_TLS_CA not set; using system CAs")
+        client.tls_set(ca_certs=mqtt_ca, certfile=mqtt_cert, keyfile=mqtt_key)
+        if os.getenv("MQTT_TLS_INSECURE", "false").lower() == "true":
+            client.tls_insecure_set(True)
+
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.message_callback_add(profile_topic, lambda client, userdata, msg: profiler.handle_control(msg.payload))
+    profiler.install_signal_handlers()
+    startup.mark("setup")
+    client.connect(mqtt_host, mqtt_port, keepalive=60)
+    startup.mark("connect")
+    client.loop_forever()
+
+
+if __name__ == "__main__":
+    main()
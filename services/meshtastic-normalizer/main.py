@@ -1,15 +1,39 @@
 import json
 import logging
 import os
+import signal
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import paho.mqtt.client as mqtt
 import yaml
 from pydantic import BaseModel, ConfigDict, Field
 
 from farmstack.meshtastic import normalize_meshtastic
+from farmstack.meshtastic_nodes import NodeInfoCache
+from farmstack.meshtastic_proto import (
+    ChannelCiphers,
+    MeshtasticProtoStats,
+    decode_service_envelope,
+    load_protobufs,
+    packet_to_envelope,
+)
+from farmstack.profiling import control_topic, profiler_from_env
 from farmstack.schema import default_schema_registry
+from farmstack.startup import StartupTimer
+
+
+class ProtobufConfig(BaseModel):
+    enabled: bool = False
+    topics: List[str] = Field(default_factory=lambda: ["msh/+/2/e/#"])
+    channels: Dict[str, str] = Field(default_factory=lambda: {"LongFast": "AQ=="})
+    stats_every: int = 1000
+
+
+class NodeInfoConfig(BaseModel):
+    enabled: bool = True
+    sqlite_path: Optional[str] = None
+    flush_every_s: float = 30.0
 
 
 class NormalizerConfig(BaseModel):
@@ -20,6 +44,8 @@ class NormalizerConfig(BaseModel):
     asset_name_prefix: str = ""
     loc_defaults: Dict[str, float] = Field(default_factory=dict)
     ttl_s_default: int = 120
+    protobuf: ProtobufConfig = Field(default_factory=ProtobufConfig)
+    nodeinfo: NodeInfoConfig = Field(default_factory=NodeInfoConfig)
 
 
 def load_config(path: str) -> NormalizerConfig:
@@ -32,9 +58,11 @@ def main() -> None:
         level=os.getenv("LOG_LEVEL", "INFO"),
         format="%(asctime)s %(levelname)s %(message)s",
     )
+    startup = StartupTimer("meshtastic-normalizer")
 
     config_path = os.getenv("NORMALIZER_CONFIG", "/configs/meshtastic-normalizer.yaml")
     config = load_config(config_path)
+    startup.mark("config")
     site = os.getenv("SITE", config.site_default)
 
     mqtt_host = os.getenv("MQTT_HOST", "mqtt-broker")
@@ -43,6 +71,24 @@ def main() -> None:
     mqtt_pass = os.getenv("MQTT_PASSWORD")
 
     schema_registry = default_schema_registry()
+    startup.mark("schemas_cached" if schema_registry.cache_hit else "schemas")
+
+    normalize_config = config.model_dump()
+    ciphers: Optional[ChannelCiphers] = None
+    proto_stats = MeshtasticProtoStats()
+    if config.protobuf.enabled:
+        load_protobufs()
+        ciphers = ChannelCiphers(config.protobuf.channels)
+        startup.mark("protobufs")
+
+    nodes: Optional[NodeInfoCache] = None
+    if config.nodeinfo.enabled:
+        nodes = NodeInfoCache(config.nodeinfo.sqlite_path, flush_every_s=config.nodeinfo.flush_every_s)
+        logging.info("Loaded %d Meshtastic nodes from %s", len(nodes), config.nodeinfo.sqlite_path or "memory")
+        startup.mark("nodes")
+
+    profiler = profiler_from_env("meshtastic-normalizer")
+    profile_topic = control_topic(site, "meshtastic-normalizer")
 
     def on_connect(client: mqtt.Client, userdata: Any, flags: Dict[str, Any], rc: int) -> None:
         if rc != 0:
@@ -51,20 +97,14 @@ def main() -> None:
         base = f"farm/{site}/raw/meshtastic"
         client.subscribe(f"{base}/+/telemetry")
         client.subscribe(f"{base}/+/position")
+        client.subscribe(profile_topic, qos=1)
         logging.info("Subscribed to Meshtastic raw topics under %s", base)
+        if ciphers is not None:
+            for topic in config.protobuf.topics:
+                client.subscribe(topic)
+            logging.info("Subscribed to Meshtastic protobuf uplink on %s", ", ".join(config.protobuf.topics))
 
-    def on_message(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
-        try:
-            payload = json.loads(msg.payload.decode("utf-8"))
-        except json.JSONDecodeError:
-            logging.warning("Invalid JSON payload on %s", msg.topic)
-            return
-
-        envelope = normalize_meshtastic(payload, site, config.model_dump())
-        if not envelope:
-            logging.warning("Unable to normalize payload on %s", msg.topic)
-            return
-
+    def publish(client: mqtt.Client, envelope: Dict[str, Any], stream: str) -> None:
         try:
             schema_registry.validate("tele.v1.schema.json", envelope)
         except ValueError as exc:
@@ -76,10 +116,51 @@ def main() -> None:
             logging.warning("Missing asset id after normalization")
             return
 
-        topic = f"farm/{site}/tele/{asset_id}/position"
+        if nodes is not None:
+            # Only valid envelopes reach the cache; what enrichment adds is
+            # checked again before it goes out.
+            nodes.observe(envelope)
+            nodes.enrich(envelope, config.asset_name_prefix)
+            try:
+                schema_registry.validate("tele.v1.schema.json", envelope)
+            except ValueError as exc:
+                logging.warning("Enriched payload failed schema: %s", exc)
+                return
+
+        topic = f"farm/{site}/tele/{asset_id}/{stream}"
         client.publish(topic, json.dumps(envelope), qos=0, retain=False)
         logging.info("Published normalized telemetry for %s", asset_id)
 
+    def on_message(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        startup.first_message()
+        try:
+            payload = json.loads(msg.payload.decode("utf-8"))
+        except json.JSONDecodeError:
+            logging.warning("Invalid JSON payload on %s", msg.topic)
+            return
+
+        envelope = normalize_meshtastic(payload, site, normalize_config)
+        if not envelope:
+            logging.warning("Unable to normalize payload on %s", msg.topic)
+            return
+        publish(client, envelope, "position")
+
+    def on_protobuf(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        startup.first_message()
+        proto_stats.packets += 1
+        packet, reason = decode_service_envelope(msg.payload, ciphers)
+        envelope = None
+        if packet is not None:
+            envelope, reason = packet_to_envelope(packet, site, normalize_config)
+        if envelope is None:
+            setattr(proto_stats, reason, getattr(proto_stats, reason) + 1)
+            logging.debug("Dropped Meshtastic packet on %s: %s", msg.topic, reason)
+        else:
+            proto_stats.decoded += 1
+            publish(client, envelope, packet.port)
+        if proto_stats.packets % config.protobuf.stats_every == 0:
+            logging.info("Meshtastic protobuf ingest: %s", proto_stats.as_dict())
+
     client = mqtt.Client()
     if mqtt_user:
         client.username_pw_set(mqtt_user, mqtt_pass)
@@ -96,8 +177,21 @@ def main() -> None:
 
     client.on_connect = on_connect
     client.on_message = on_message
+    if ciphers is not None:
+        for topic in config.protobuf.topics:
+            client.message_callback_add(topic, on_protobuf)
+    client.message_callback_add(profile_topic, lambda client, userdata, msg: profiler.handle_control(msg.payload))
+    profiler.install_signal_handlers()
+    startup.mark("setup")
     client.connect(mqtt_host, mqtt_port, keepalive=60)
-    client.loop_forever()
+    startup.mark("connect")
+    # Stop cleanly on docker stop so positions not yet flushed reach the node cache.
+    signal.signal(signal.SIGTERM, lambda signum, frame: client.disconnect())
+    try:
+        client.loop_forever()
+    finally:
+        if nodes is not None:
+            nodes.close()
 
 
 if __name__ == "__main__":
@@ -3,22 +3,97 @@ import logging
 import os
 import socket
 import ssl
-import time
-from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from time import perf_counter
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 import paho.mqtt.client as mqtt
 import yaml
 from pydantic import BaseModel, ConfigDict, Field
 
-from farmstack.cot import build_cot_xml
-from farmstack.schema import default_schema_registry
+from farmstack.conflate import Conflator
+from farmstack.cot import CotEvent, CotProfile, ping_event, resolve_cot_event
+from farmstack.cot_proto import COT_FORMATS, encode_cot
+from farmstack.dedupe import BloomDedupeCache, DedupeCache, SqliteDedupeStore
+from farmstack.envelope import Envelope, parse_asset_id, parse_event_type
+from farmstack.fanout import Destination, FanOut
+from farmstack.metrics import MetricsRegistry, start_metrics_server
+from farmstack.movement import MovementFilter
+from farmstack.profiling import control_topic, profiler_from_env
+from farmstack.schema import ValidationPolicy, build_validator, default_schema_registry
+from farmstack.sendqueue import PrioritySendQueue, StaleShedder
+from farmstack.startup import StartupTimer
+from farmstack.time_utils import parse_ts
+from farmstack.transport import ConnectionStats, StreamConnection
 
 
 class DedupeConfig(BaseModel):
     max_entries: int = 512
     window_s: int = 180
+    mode: Literal["exact", "bloom", "sqlite"] = "exact"
+    false_positive_rate: float = 0.001
+    sqlite_path: str = "/data/dedupe.sqlite"
+
+
+class SendQueueConfig(BaseModel):
+    max_depth: int = 5000
+    workers: int = 1
+    overflow: Literal["drop_new", "drop_oldest", "block"] = "drop_oldest"
+    block_timeout_s: float = 0.5
+    priorities: Dict[str, int] = Field(default_factory=lambda: {"evt": 0, "tele": 1})
+
+
+class ConflationConfig(BaseModel):
+    enabled: bool = False
+    min_interval_s: float = 1.0
+    max_eps: float = 0.0
+    burst: Optional[int] = None
+
+
+class MovementConfig(BaseModel):
+    enabled: bool = False
+    min_distance_m: float = 5.0
+    ce_factor: float = 1.0
+    refresh_fraction: float = 0.75
+    max_entries: int = 10000
+
+
+class ValidationConfig(BaseModel):
+    mode: Literal["full", "sampled"] = "full"
+    trusted_sources: List[str] = Field(default_factory=lambda: ["meshtastic"])
+    warmup: int = 100
+    sample_rate: float = 0.05
+
+
+class StaleSheddingConfig(BaseModel):
+    enabled: bool = False
+    grace_s: float = 0.0
+    after_connect_s: float = 60.0
+    queue_depth: int = 1000
+
+
+class CoalesceConfig(BaseModel):
+    flush_ms: float = 0.0
+    flush_bytes: int = 16384
+
+
+class DestinationConfig(BaseModel):
+    name: str
+    kind: Literal["tak", "tcp", "udp", "multicast", "stdout"] = "tak"
+    host: Optional[str] = None
+    port: Optional[int] = None
+    format: Optional[Literal["xml", "stream", "mesh"]] = None
+    tls_ca: str = "/certs/ca.pem"
+    tls_cert: str = ""
+    tls_key: str = ""
+    tls_verify: bool = True
+    heartbeat_s: float = 30.0
+    reconnect_max_s: float = 30.0
+    multicast_ttl: int = 1
+    multicast_interface: Optional[str] = None
+    retries: int = 2
+    retry_backoff_s: float = 0.5
+    send_queue: Optional[SendQueueConfig] = None
 
 
 class BridgeConfig(BaseModel):
@@ -27,89 +102,262 @@ class BridgeConfig(BaseModel):
     site_default: str = "farmstead"
     cot_defaults: Dict[str, Any] = Field(default_factory=dict)
     dedupe: DedupeConfig = Field(default_factory=DedupeConfig)
+    send_queue: SendQueueConfig = Field(default_factory=SendQueueConfig)
+    coalesce: CoalesceConfig = Field(default_factory=CoalesceConfig)
+    conflation: ConflationConfig = Field(default_factory=ConflationConfig)
+    validation: ValidationConfig = Field(default_factory=ValidationConfig)
+    stale_shedding: StaleSheddingConfig = Field(default_factory=StaleSheddingConfig)
+    movement: MovementConfig = Field(default_factory=MovementConfig)
+    destinations: List[DestinationConfig] = Field(default_factory=list)
     asset_kind_map: Dict[str, Any] = Field(default_factory=dict)
     event_type_map: Dict[str, Any] = Field(default_factory=dict)
 
 
-class DedupeCache:
-    def __init__(self, max_entries: int, window_s: int) -> None:
-        self.max_entries = max_entries
-        self.window_s = window_s
-        self._cache: OrderedDict[str, float] = OrderedDict()
-
-    def seen(self, message_id: str) -> bool:
-        now = time.time()
-        if message_id in self._cache:
-            if now - self._cache[message_id] <= self.window_s:
-                return True
-        self._cache[message_id] = now
-        self._evict(now)
-        return False
-
-    def _evict(self, now: float) -> None:
-        while self._cache and len(self._cache) > self.max_entries:
-            self._cache.popitem(last=False)
-        stale_keys = [key for key, ts in self._cache.items() if now - ts > self.window_s]
-        for key in stale_keys:
-            self._cache.pop(key, None)
-
-
 class DevSinkSender:
-    def __init__(self, host: Optional[str], port: int, protocol: str) -> None:
+    def __init__(
+        self, host: Optional[str], port: int, protocol: str, cot_format: str = "xml", stream_retries: int = 1
+    ) -> None:
         self.host = host
         self.port = port
         self.protocol = protocol.lower()
-
-    def send(self, cot_xml: str) -> None:
+        self.cot_format = cot_format
+        self.connection: Optional[StreamConnection] = None
+        self._udp_sock: Optional[socket.socket] = None
+        self._udp_addr: Optional[Tuple[str, int]] = None
+        if self.host and self.protocol == "tcp":
+            self.connection = StreamConnection(self.host, self.port, retries=stream_retries)
+        elif self.host:
+            # Unconnected, so an ICMP port-unreachable from a sink that is not
+            # listening yet never surfaces as ConnectionRefusedError on send.
+            self._udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Only a TCP stream needs a delimiter between XML events, and only it
+        # can write a batch in one piece; datagrams carry one event each.
+        self.delimiter = b"\n" if self.connection is not None else b""
+        self.coalesces = self.connection is not None
+
+    def send(self, frame: bytes) -> None:
         if not self.host:
-            logging.info("CoT dev output\n%s", cot_xml)
+            if self.cot_format == "xml":
+                logging.info("CoT dev output\n%s", frame.decode("utf-8"))
+            else:
+                logging.info("CoT dev output: %s-byte TAK %s frame", len(frame), self.cot_format)
             return
-        if self.protocol == "tcp":
-            with socket.create_connection((self.host, self.port), timeout=5) as sock:
-                sock.sendall(cot_xml.encode("utf-8") + b"\n")
+        if self.connection is not None:
+            self.connection.send(frame)
             return
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.sendto(cot_xml.encode("utf-8"), (self.host, self.port))
+        if self._udp_sock is not None:
+            if self._udp_addr is None:
+                # Resolve once rather than on every datagram; a sink that is
+                # not resolvable yet is retried on the next send.
+                self._udp_addr = (socket.gethostbyname(self.host), self.port)
+            self._udp_sock.sendto(frame, self._udp_addr)
+
+    def send_batch(self, frames: List[bytes]) -> None:
+        assert self.connection is not None
+        self.connection.send(b"".join(frames))
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+        if self._udp_sock is not None:
+            self._udp_sock.close()
+            self._udp_sock = None
 
 
 class TlsTakSender:
-    def __init__(self, host: str, port: int, cafile: str, certfile: str, keyfile: str, verify: bool) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        cafile: str,
+        certfile: str,
+        keyfile: str,
+        verify: bool,
+        heartbeat_s: float = 30.0,
+        backoff_max_s: float = 30.0,
+        ping_uid: str = "farmstack-bridge",
+        cot_format: str = "xml",
+        stream_retries: int = 1,
+    ) -> None:
         self.host = host
         self.port = port
+        self.cot_format = cot_format
+        self.delimiter = b"\n"
+        self.coalesces = True
         self.context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH, cafile=cafile if verify else None)
         if not verify:
             self.context.check_hostname = False
             self.context.verify_mode = ssl.CERT_NONE
         if certfile and keyfile:
             self.context.load_cert_chain(certfile=certfile, keyfile=keyfile)
+        self.connection = StreamConnection(
+            host,
+            port,
+            ssl_context=self.context,
+            server_hostname=self.host if self.context.check_hostname else None,
+            backoff_max_s=backoff_max_s,
+            heartbeat_s=heartbeat_s,
+            heartbeat_payload=lambda: self.encode(ping_event(ping_uid)),
+            retries=stream_retries,
+        )
 
-    def send(self, cot_xml: str) -> None:
-        with socket.create_connection((self.host, self.port), timeout=5) as sock:
-            server_name = self.host if self.context.check_hostname else None
-            with self.context.wrap_socket(sock, server_hostname=server_name) as ssock:
-                ssock.sendall(cot_xml.encode("utf-8") + b"\n")
+    @property
+    def stats(self) -> ConnectionStats:
+        return self.connection.stats
 
+    def encode(self, cot: CotEvent) -> bytes:
+        return encode_cot(cot, self.cot_format)
 
-def load_config(path: str) -> BridgeConfig:
-    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
-    return BridgeConfig.model_validate(data)
+    def send(self, frame: bytes) -> None:
+        self.connection.send(frame)
+
+    def send_batch(self, frames: List[bytes]) -> None:
+        self.connection.send(b"".join(frames))
+
+    def close(self) -> None:
+        self.connection.close()
 
 
-def parse_event_type(topic: str, payload: Dict[str, Any]) -> Optional[str]:
-    parts = topic.split("/")
-    if len(parts) < 5:
-        return payload.get("data", {}).get("event_type")
-    event_type = "/".join(parts[4:])
-    if not event_type:
-        event_type = payload.get("data", {}).get("event_type")
-    return event_type.replace("/", ".") if event_type else None
+class MulticastSender:
+    """SA multicast for ATAK clients on the local network (239.2.3.1:6969)."""
+
+    def __init__(
+        self,
+        group: str,
+        port: int,
+        ttl: int = 1,
+        interface: Optional[str] = None,
+        cot_format: str = "xml",
+    ) -> None:
+        self.group = group
+        self.port = port
+        self.cot_format = cot_format
+        self._addr = (socket.gethostbyname(group), port)
+        self.delimiter = b""
+        self.coalesces = False
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        if interface:
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+
+    def send(self, frame: bytes) -> None:
+        self._sock.sendto(frame, self._addr)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def env_destination() -> DestinationConfig:
+    """The single destination described by TAK_MODE and friends."""
+    if os.getenv("TAK_MODE", "dev").lower() == "tak":
+        return DestinationConfig(
+            name="tak",
+            kind="tak",
+            host=os.getenv("TAK_HOST", "freetakserver"),
+            port=int(os.getenv("TAK_PORT", "8089")),
+            tls_ca=os.getenv("TAK_TLS_CA", "/certs/ca.pem"),
+            tls_cert=os.getenv("TAK_TLS_CERT", "/certs/server.pem"),
+            tls_key=os.getenv("TAK_TLS_KEY", "/certs/server.key"),
+            tls_verify=os.getenv("TAK_TLS_VERIFY", "true").lower() == "true",
+            heartbeat_s=float(os.getenv("TAK_HEARTBEAT_S", "30")),
+            reconnect_max_s=float(os.getenv("TAK_RECONNECT_MAX_S", "30")),
+        )
+    host = os.getenv("COT_SINK_HOST")
+    return DestinationConfig(
+        name="dev",
+        kind=os.getenv("COT_SINK_PROTOCOL", "udp").lower() if host else "stdout",
+        host=host,
+        port=int(os.getenv("COT_SINK_PORT", "9001")),
+    )
+
+
+def build_sender(
+    destination: DestinationConfig, cot_format: str, site: str
+) -> Union[DevSinkSender, TlsTakSender, MulticastSender]:
+    if destination.kind in ("udp", "multicast") and cot_format == "stream":
+        raise ValueError(f"destination {destination.name}: stream framing needs tcp or tak, use mesh for UDP")
+    if destination.kind in ("tak", "tcp") and cot_format == "mesh":
+        raise ValueError(f"destination {destination.name}: mesh framing needs udp or multicast, use stream for TCP")
+    # TAK Server inputs start in XML and only switch to protobuf after the
+    # t-x-takp-q/t-x-takp-r negotiation, which this sender does not do.
+    if destination.kind == "tak" and cot_format != "xml":
+        raise ValueError(f"destination {destination.name}: TAK server streams need xml framing")
+    # The destination retries failed sends with backoff; the stream only
+    # retries on its own when nothing above it will.
+    stream_retries = 0 if destination.retries else 1
+    if destination.kind == "tak":
+        return TlsTakSender(
+            host=destination.host or "freetakserver",
+            port=destination.port or 8089,
+            cafile=destination.tls_ca,
+            certfile=destination.tls_cert,
+            keyfile=destination.tls_key,
+            verify=destination.tls_verify,
+            heartbeat_s=destination.heartbeat_s,
+            backoff_max_s=destination.reconnect_max_s,
+            ping_uid=f"farm.{site}.bridge",
+            cot_format=cot_format,
+            stream_retries=stream_retries,
+        )
+    if destination.kind == "multicast":
+        return MulticastSender(
+            destination.host or "239.2.3.1",
+            destination.port or 6969,
+            ttl=destination.multicast_ttl,
+            interface=destination.multicast_interface,
+            cot_format=cot_format,
+        )
+    return DevSinkSender(
+        host=destination.host if destination.kind != "stdout" else None,
+        port=destination.port or 9001,
+        protocol=destination.kind,
+        cot_format=cot_format,
+        stream_retries=stream_retries,
+    )
+
+
+def register_destination_metrics(metrics: MetricsRegistry, destination: Destination) -> None:
+    labels = {"destination": destination.name}
+    queue_stats = destination.queue.stats
+    health = destination.health
+    metrics.gauge("cot_bridge_send_queue_depth", "CoT frames waiting to be sent", lambda: queue_stats.depth, labels)
+    metrics.gauge(
+        "cot_bridge_send_queue_max_depth", "Send queue high-water mark", lambda: queue_stats.max_depth, labels
+    )
+    metrics.gauge(
+        "cot_bridge_send_queue_wait_seconds_avg", "Mean queue wait", lambda: queue_stats.wait_s_avg, labels
+    )
+    metrics.gauge(
+        "cot_bridge_send_queue_wait_seconds_max", "Longest queue wait", lambda: queue_stats.wait_s_max, labels
+    )
+    for reason in ("evicted", "rejected", "block_timeout", "stale"):
+        metrics.callback_counter(
+            "cot_bridge_send_queue_dropped_total",
+            "Frames dropped by the send queue overflow policy",
+            lambda reason=reason: queue_stats.dropped.get(reason, 0),
+            dict(labels, reason=reason),
+        )
+    metrics.gauge("cot_bridge_destination_up", "1 if the last send succeeded", lambda: int(health.up), labels)
+    metrics.callback_counter(
+        "cot_bridge_destination_frames_sent_total", "Frames delivered", lambda: health.frames_sent, labels
+    )
+    metrics.callback_counter(
+        "cot_bridge_destination_send_failures_total", "Failed send attempts", lambda: health.send_failures, labels
+    )
+    connection = getattr(destination.sender, "connection", None)
+    if connection is not None:
+        for field_name in connection.stats.as_dict():
+            metrics.callback_counter(
+                f"cot_bridge_tak_{field_name}_total",
+                f"TAK stream {field_name.replace('_', ' ')}",
+                lambda field_name=field_name: getattr(connection.stats, field_name),
+                labels,
+            )
 
 
-def parse_asset_id(topic: str, payload: Dict[str, Any]) -> Optional[str]:
-    parts = topic.split("/")
-    if len(parts) >= 4:
-        return parts[3]
-    return payload.get("asset", {}).get("id")
+def load_config(path: str) -> BridgeConfig:
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    return BridgeConfig.model_validate(data)
 
 
 def main() -> None:
@@ -117,56 +365,237 @@ def main() -> None:
         level=os.getenv("LOG_LEVEL", "INFO"),
         format="%(asctime)s %(levelname)s %(message)s",
     )
+    startup = StartupTimer("mqtt-cot-bridge")
 
     config_path = os.getenv("BRIDGE_CONFIG", "/configs/mqtt-cot-bridge.yaml")
     config = load_config(config_path)
-    config_data = config.model_dump()
+    startup.mark("config")
+    cot_profile = CotProfile(config.model_dump())
 
     site = os.getenv("SITE", config.site_default)
     mqtt_host = os.getenv("MQTT_HOST", "mqtt-broker")
     mqtt_port = int(os.getenv("MQTT_PORT", "1883"))
     mqtt_user = os.getenv("MQTT_USERNAME")
     mqtt_pass = os.getenv("MQTT_PASSWORD")
+    share_group = os.getenv("MQTT_SHARE_GROUP")
 
-    tak_mode = os.getenv("TAK_MODE", "dev").lower()
-    if tak_mode == "tak":
-        sender = TlsTakSender(
-            host=os.getenv("TAK_HOST", "freetakserver"),
-            port=int(os.getenv("TAK_PORT", "8089")),
-            cafile=os.getenv("TAK_TLS_CA", "/certs/ca.pem"),
-            certfile=os.getenv("TAK_TLS_CERT", "/certs/server.pem"),
-            keyfile=os.getenv("TAK_TLS_KEY", "/certs/server.key"),
-            verify=os.getenv("TAK_TLS_VERIFY", "true").lower() == "true",
+    cot_format = os.getenv("TAK_PROTOCOL", "xml").lower()
+    if cot_format not in COT_FORMATS:
+        raise ValueError(f"TAK_PROTOCOL must be one of {', '.join(COT_FORMATS)}")
+    # An explicit destinations list replaces the single TAK_MODE sender.
+    destination_configs = config.destinations or [env_destination()]
+
+    schema_registry = default_schema_registry()
+    startup.mark("schemas_cached" if schema_registry.cache_hit else "schemas")
+    dedupe_config = config.dedupe
+    dedupe: Union[DedupeCache, BloomDedupeCache, SqliteDedupeStore]
+    if dedupe_config.mode == "sqlite":
+        dedupe = SqliteDedupeStore(dedupe_config.sqlite_path, dedupe_config.window_s)
+    elif dedupe_config.mode == "bloom":
+        dedupe = BloomDedupeCache(
+            dedupe_config.max_entries,
+            dedupe_config.window_s,
+            false_positive_rate=dedupe_config.false_positive_rate,
         )
-        logging.info("TAK mode enabled: TLS socket to %s", os.getenv("TAK_HOST", "freetakserver"))
     else:
-        sender = DevSinkSender(
-            host=os.getenv("COT_SINK_HOST"),
-            port=int(os.getenv("COT_SINK_PORT", "9001")),
-            protocol=os.getenv("COT_SINK_PROTOCOL", "udp"),
+        dedupe = DedupeCache(dedupe_config.max_entries, dedupe_config.window_s)
+    meta_cache: Dict[str, Envelope] = {}
+
+    metrics = MetricsRegistry()
+    stage_help = "Wall time per CoT bridge pipeline stage"
+    stage_decode = metrics.histogram("cot_bridge_stage_seconds", stage_help, {"stage": "decode"})
+    stage_validate = metrics.histogram("cot_bridge_stage_seconds", stage_help, {"stage": "validate"})
+    stage_dedupe = metrics.histogram("cot_bridge_stage_seconds", stage_help, {"stage": "dedupe"})
+    stage_build = metrics.histogram("cot_bridge_stage_seconds", stage_help, {"stage": "build"})
+    stage_enqueue = metrics.histogram("cot_bridge_stage_seconds", stage_help, {"stage": "enqueue"})
+    accepted = metrics.counter("cot_bridge_accepted_total", "CoT events queued for sending")
+    meta_updates = metrics.counter("cot_bridge_meta_updates_total", "Meta registry updates")
+    dropped = {
+        reason: metrics.counter("cot_bridge_dropped_total", "Messages dropped by reason", {"reason": reason})
+        for reason in (
+            "invalid_json",
+            "schema",
+            "missing_asset",
+            "missing_id",
+            "duplicate",
+            "no_location",
+            "stale",
+            "unmoved",
+            "queue_full",
+        )
+    }
+
+    shedder: Optional[StaleShedder] = None
+    if config.stale_shedding.enabled:
+        shedder = StaleShedder(
+            grace_s=config.stale_shedding.grace_s,
+            after_connect_s=config.stale_shedding.after_connect_s,
+            queue_depth=config.stale_shedding.queue_depth,
         )
-        logging.info("Dev mode enabled: CoT output to %s", os.getenv("COT_SINK_HOST", "stdout"))
 
-    schema_registry = default_schema_registry()
-    dedupe = DedupeCache(config.dedupe.max_entries, config.dedupe.window_s)
-    meta_cache: Dict[str, Dict[str, Any]] = {}
+    def expires_at(cot: CotEvent, msg_class: Optional[str], retained: bool = False) -> Optional[float]:
+        # Only positions are shed; an alert is delivered even if late.
+        if shedder is None or msg_class == "evt":
+            return None
+        depth = max((len(destination.queue) for destination in destinations), default=0)
+        return shedder.deadline(parse_ts(cot.stale).timestamp(), retained, depth)
+
+    queue_config = config.send_queue
+    levels = max(queue_config.priorities.values(), default=0) + 1
+    default_priority = levels - 1
+    destinations: List[Destination] = []
+    for destination_config in destination_configs:
+        name = destination_config.name
+        destination_format = destination_config.format or cot_format
+        sender = build_sender(destination_config, destination_format, site)
+        destination_queue_config = destination_config.send_queue or queue_config
+        destination_queue = PrioritySendQueue(
+            max_depth=destination_queue_config.max_depth,
+            levels=levels,
+            overflow=destination_queue_config.overflow,
+            block_timeout_s=destination_queue_config.block_timeout_s,
+        )
+        stage_send = metrics.histogram(
+            "cot_bridge_stage_seconds", stage_help, {"stage": "send", "destination": name}
+        )
+        destination = Destination(
+            name,
+            sender,
+            destination_queue,
+            fmt=destination_format,
+            delimiter=sender.delimiter,
+            workers=destination_queue_config.workers,
+            flush_ms=config.coalesce.flush_ms,
+            flush_bytes=config.coalesce.flush_bytes,
+            retries=destination_config.retries,
+            retry_backoff_s=destination_config.retry_backoff_s,
+            on_sent=stage_send.observe,
+        )
+        destinations.append(destination)
+        logging.info("CoT destination %s: %s (%s)", name, destination_config.kind, destination_format)
+        register_destination_metrics(metrics, destination)
+
+    fanout = FanOut(destinations)
+    fanout.start()
+    logging.info(
+        "CoT writes coalesce up to %s bytes, adding at most %sms latency",
+        config.coalesce.flush_bytes,
+        config.coalesce.flush_ms,
+    )
+
+    movement: Optional[MovementFilter] = None
+    if config.movement.enabled:
+        movement = MovementFilter(
+            min_distance_m=config.movement.min_distance_m,
+            ce_factor=config.movement.ce_factor,
+            refresh_fraction=config.movement.refresh_fraction,
+            max_entries=config.movement.max_entries,
+        )
+        movement_stats = movement.stats
+        metrics.callback_counter(
+            "cot_bridge_movement_refreshed_total",
+            "Unmoved positions re-sent before going stale",
+            lambda: movement_stats.refreshed,
+        )
+        metrics.gauge("cot_bridge_movement_tracked", "Uids with a remembered position", lambda: len(movement))
+        logging.info(
+            "Movement suppression enabled: %sm or %sx ce_m, refresh at %s of stale",
+            config.movement.min_distance_m,
+            config.movement.ce_factor,
+            config.movement.refresh_fraction,
+        )
 
-    def on_connect(client: mqtt.Client, userdata: Any, flags: Dict[str, Any], rc: int) -> None:
+    conflator: Optional[Conflator] = None
+    if config.conflation.enabled:
+        conflator = Conflator(
+            min_interval_s=config.conflation.min_interval_s,
+            max_eps=config.conflation.max_eps,
+            burst=config.conflation.burst,
+        )
+        tele_priority = queue_config.priorities.get("tele", default_priority)
+
+        def release_conflated(cot: CotEvent) -> None:
+            deadline = expires_at(cot, "tele")
+            if shedder is not None and shedder.expired(deadline):
+                dropped["stale"].inc()
+                return
+            if not fanout.publish(cot, tele_priority, deadline):
+                dropped["queue_full"].inc()
+                logging.warning("Send queues full, dropped conflated CoT for %s", cot.uid)
+                return
+            if movement is not None:
+                movement.sent(cot)
+            accepted.inc()
+
+        conflator.start(release_conflated)
+        conflation_stats = conflator.stats
+        metrics.callback_counter(
+            "cot_bridge_conflated_total", "Positions replaced before release", lambda: conflation_stats.conflated
+        )
+        metrics.gauge("cot_bridge_conflation_pending", "Uids with a pending position", lambda: conflation_stats.pending)
+        logging.info(
+            "Position conflation enabled: %ss per uid, %s events/s",
+            config.conflation.min_interval_s,
+            config.conflation.max_eps or "unlimited",
+        )
+
+    # Full validation unless a deployment opts into sampling.
+    validator = build_validator(schema_registry, config.validation.model_dump())
+    if isinstance(validator, ValidationPolicy):
+        validation_stats = validator.stats
+        metrics.callback_counter(
+            "cot_bridge_validation_skipped_total",
+            "Trusted messages accepted without a schema check",
+            lambda: validation_stats.skipped,
+        )
+        metrics.gauge(
+            "cot_bridge_validation_saved_seconds",
+            "Estimated CPU seconds saved by skipped schema checks",
+            lambda: validation_stats.saved_s,
+        )
+        logging.info(
+            "Sampled validation for %s: full for %s messages per shape, then %s",
+            ", ".join(config.validation.trusted_sources),
+            config.validation.warmup,
+            config.validation.sample_rate,
+        )
+
+    profiler = profiler_from_env("mqtt-cot-bridge")
+    profile_topic = control_topic(site, "mqtt-cot-bridge")
+
+    def on_connect(
+        client: mqtt.Client,
+        userdata: Any,
+        flags: Dict[str, Any],
+        rc: int,
+        properties: Any = None,
+    ) -> None:
         if rc != 0:
             logging.error("MQTT connect failed: rc=%s", rc)
             return
+        if shedder is not None:
+            shedder.connected()
         base = f"farm/{site}"
-        client.subscribe(f"{base}/tele/+/position")
-        client.subscribe(f"{base}/evt/+/#")
+        # Replicas in the same share group split tele/evt between them; meta
+        # stays a plain subscription so every replica keeps a full registry.
+        share = f"$share/{share_group}/" if share_group else ""
+        client.subscribe(f"{share}{base}/tele/+/position")
+        client.subscribe(f"{share}{base}/evt/+/#")
         client.subscribe(f"{base}/meta/+", qos=1)
-        logging.info("Subscribed to MQTT topics under %s", base)
+        client.subscribe(profile_topic, qos=1)
+        logging.info("Subscribed to MQTT topics under %s%s", share, base)
 
     def on_message(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        startup.first_message()
+        started = perf_counter()
         try:
             payload = json.loads(msg.payload.decode("utf-8"))
         except json.JSONDecodeError:
+            dropped["invalid_json"].inc()
             logging.warning("Invalid JSON payload on %s", msg.topic)
             return
+        decoded = perf_counter()
+        stage_decode.observe(decoded - started)
 
         msg_class = payload.get("class")
         schema_map = {
@@ -177,41 +606,95 @@ def main() -> None:
         schema_name = schema_map.get(msg_class)
         if schema_name:
             try:
-                schema_registry.validate(schema_name, payload)
+                validator.validate(schema_name, payload)
             except ValueError as exc:
+                dropped["schema"].inc()
                 logging.warning("Schema validation failed: %s", exc)
                 return
+        envelope = Envelope.from_dict(payload)
+        validated = perf_counter()
+        stage_validate.observe(validated - decoded)
 
-        asset_id = parse_asset_id(msg.topic, payload)
+        asset_id = parse_asset_id(msg.topic, envelope)
         if not asset_id:
+            dropped["missing_asset"].inc()
             logging.warning("Missing asset id for topic %s", msg.topic)
             return
 
         if msg_class == "meta":
-            meta_cache[asset_id] = payload
+            meta_cache[asset_id] = envelope
+            meta_updates.inc()
             logging.info("Updated meta cache for %s", asset_id)
             return
 
-        if not payload.get("id"):
+        if not envelope.id:
+            dropped["missing_id"].inc()
             logging.warning("Missing message id on %s", msg.topic)
             return
 
-        if dedupe.seen(payload["id"]):
-            logging.info("Duplicate message skipped: %s", payload["id"])
+        duplicate = dedupe.seen(envelope.id)
+        deduped = perf_counter()
+        stage_dedupe.observe(deduped - validated)
+        if duplicate:
+            dropped["duplicate"].inc()
+            logging.info("Duplicate message skipped: %s", envelope.id)
             return
 
-        event_type = parse_event_type(msg.topic, payload) if msg_class == "evt" else None
-        cot_xml = build_cot_xml(payload, meta_cache.get(asset_id), event_type, config_data)
-        if not cot_xml:
-            logging.warning("No location available for %s, skipping CoT", payload.get("id"))
+        event_type = parse_event_type(msg.topic, envelope) if msg_class == "evt" else None
+        cot = resolve_cot_event(envelope, meta_cache.get(asset_id), event_type, cot_profile)
+        if cot is None:
+            dropped["no_location"].inc()
+            logging.warning("No location available for %s, skipping CoT", envelope.id)
             return
 
-        try:
-            sender.send(cot_xml)
-        except Exception as exc:  # pylint: disable=broad-except
-            logging.error("Failed to send CoT: %s", exc)
+        # A backlog replayed after an outage is mostly positions that are
+        # already stale; shedding them here keeps recovery proportional to
+        # the number of live assets rather than the length of the outage.
+        deadline = expires_at(cot, msg_class, bool(msg.retain))
+        if shedder is not None and shedder.expired(deadline):
+            dropped["stale"].inc()
+            logging.debug("Shed stale CoT for %s (stale %s)", envelope.id, cot.stale)
+            return
+
+        if movement is not None and msg_class != "evt" and not movement.admit(cot):
+            dropped["unmoved"].inc()
+            return
 
-    client = mqtt.Client()
+        # Alerts are never conflated; only the newest position per uid matters.
+        # Accepted is counted when the conflator releases the position, so
+        # replaced positions only show up in cot_bridge_conflated_total.
+        if conflator is not None and msg_class != "evt":
+            conflator.offer(cot.uid, cot)
+            stage_build.observe(perf_counter() - deduped)
+            return
+
+        built = perf_counter()
+        stage_build.observe(built - deduped)
+
+        # Encoding happens once per wire format inside publish.
+        priority = queue_config.priorities.get(msg_class, default_priority)
+        queued = fanout.publish(cot, priority, deadline)
+        stage_enqueue.observe(perf_counter() - built)
+        if not queued:
+            dropped["queue_full"].inc()
+            logging.warning("All send queues full, dropped CoT for %s", envelope.id)
+            return
+        # Only a queued position becomes the movement reference.
+        if movement is not None and msg_class != "evt":
+            movement.sent(cot)
+        accepted.inc()
+
+    metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+    if metrics_port:
+        start_metrics_server(metrics, metrics_port)
+
+    if share_group:
+        client = mqtt.Client(protocol=mqtt.MQTTv5)
+        logging.info("Shared subscription group %s (MQTT v5)", share_group)
+        if dedupe_config.mode != "sqlite":
+            logging.warning("MQTT_SHARE_GROUP set without dedupe.mode=sqlite; replicas dedupe independently")
+    else:
+        client = mqtt.Client()
     if mqtt_user:
         client.username_pw_set(mqtt_user, mqtt_pass)
     mqtt_tls = os.getenv("MQTT_TLS", "false").lower() == "true"
@@ -227,7 +710,11 @@ def main() -> None:
 
     client.on_connect = on_connect
     client.on_message = on_message
+    client.message_callback_add(profile_topic, lambda client, userdata, msg: profiler.handle_control(msg.payload))
+    profiler.install_signal_handlers()
+    startup.mark("setup")
     client.connect(mqtt_host, mqtt_port, keepalive=60)
+    startup.mark("connect")
     client.loop_forever()
 
 
@@ -3,15 +3,17 @@ import logging
 import os
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict
 
 import paho.mqtt.client as mqtt
-import requests
 import yaml
 from pydantic import BaseModel, ConfigDict, Field
 
+from farmstack.envelope import Envelope, parse_asset_id, parse_event_type
 from farmstack.farmos import build_log_payload, resolve_log_type
+from farmstack.profiling import control_topic, profiler_from_env
 from farmstack.schema import default_schema_registry
+from farmstack.startup import StartupTimer
 
 
 class IdempotencyConfig(BaseModel):
@@ -51,31 +53,16 @@ def load_config(path: str) -> LoggerConfig:
     return LoggerConfig.model_validate(data)
 
 
-def parse_event_type(topic: str, payload: Dict[str, Any]) -> Optional[str]:
-    parts = topic.split("/")
-    if len(parts) < 5:
-        return payload.get("data", {}).get("event_type")
-    event_type = "/".join(parts[4:])
-    if not event_type:
-        event_type = payload.get("data", {}).get("event_type")
-    return event_type.replace("/", ".") if event_type else None
-
-
-def parse_asset_id(topic: str, payload: Dict[str, Any]) -> Optional[str]:
-    parts = topic.split("/")
-    if len(parts) >= 4:
-        return parts[3]
-    return payload.get("asset", {}).get("id")
-
-
 def main() -> None:
     logging.basicConfig(
         level=os.getenv("LOG_LEVEL", "INFO"),
         format="%(asctime)s %(levelname)s %(message)s",
     )
+    startup = StartupTimer("mqtt-farmos-logger")
 
     config_path = os.getenv("FARMOS_CONFIG", "/configs/mqtt-farmos-logger.yaml")
     config = load_config(config_path)
+    startup.mark("config")
     config_data = config.model_dump()
 
     site = os.getenv("SITE", config.site_default)
@@ -91,7 +78,11 @@ def main() -> None:
 
     idempotency = IdempotencyStore(config.idempotency.sqlite_path)
     schema_registry = default_schema_registry()
-    meta_cache: Dict[str, Dict[str, Any]] = {}
+    startup.mark("schemas_cached" if schema_registry.cache_hit else "schemas")
+    meta_cache: Dict[str, Envelope] = {}
+
+    profiler = profiler_from_env("mqtt-farmos-logger")
+    profile_topic = control_topic(site, "mqtt-farmos-logger")
 
     def on_connect(client: mqtt.Client, userdata: Any, flags: Dict[str, Any], rc: int) -> None:
         if rc != 0:
@@ -101,9 +92,11 @@ def main() -> None:
         client.subscribe(f"{base}/evt/+/#", qos=1)
         client.subscribe(f"{base}/meta/+", qos=1)
         client.subscribe(f"{base}/state/+/status", qos=1)
+        client.subscribe(profile_topic, qos=1)
         logging.info("Subscribed to MQTT topics under %s", base)
 
     def on_message(client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        startup.first_message()
         try:
             payload = json.loads(msg.payload.decode("utf-8"))
         except json.JSONDecodeError:
@@ -124,31 +117,32 @@ def main() -> None:
                 logging.warning("Schema validation failed: %s", exc)
                 return
 
-        asset_id = parse_asset_id(msg.topic, payload)
+        envelope = Envelope.from_dict(payload)
+        asset_id = parse_asset_id(msg.topic, envelope)
         if not asset_id:
             logging.warning("Missing asset id for topic %s", msg.topic)
             return
 
         if msg_class == "meta":
-            meta_cache[asset_id] = payload
+            meta_cache[asset_id] = envelope
             logging.info("Updated meta cache for %s", asset_id)
             return
 
-        if not payload.get("id"):
+        if not envelope.id:
             logging.warning("Missing message id on %s", msg.topic)
             return
 
-        if idempotency.seen(payload["id"]):
-            logging.info("Duplicate message skipped: %s", payload["id"])
+        if idempotency.seen(envelope.id):
+            logging.info("Duplicate message skipped: %s", envelope.id)
             return
 
         if msg_class == "state":
-            event_type = f"state.status.{payload.get('data', {}).get('status', 'unknown')}"
+            event_type = f"state.status.{(envelope.data or {}).get('status', 'unknown')}"
         else:
-            event_type = parse_event_type(msg.topic, payload) or "evt.unknown"
+            event_type = parse_event_type(msg.topic, envelope) or "evt.unknown"
 
         log_type = resolve_log_type(event_type, config_data)
-        log_payload = build_log_payload(payload, event_type, log_type, meta_cache.get(asset_id))
+        log_payload = build_log_payload(envelope, event_type, log_type, meta_cache.get(asset_id), raw=payload)
 
         endpoint = farmos_log_endpoint
         if not endpoint.startswith("/"):
@@ -159,10 +153,14 @@ def main() -> None:
         if farmos_mode == "farmos" and farmos_token:
             headers["Authorization"] = f"Bearer {farmos_token}"
 
+        # requests (with urllib3 and certifi) is the heaviest import here and
+        # only needed once there is something to log.
+        import requests
+
         try:
             response = requests.post(post_url, json=log_payload, headers=headers, timeout=10)
             response.raise_for_status()
-            idempotency.mark(payload["id"], payload.get("ts", ""))
+            idempotency.mark(envelope.id, envelope.ts or "")
             logging.info("Logged event %s to farmOS (%s)", event_type, log_type)
         except Exception as exc:  # pylint: disable=broad-except
             logging.error("Failed to log to farmOS: %s", exc)
@@ -183,7 +181,11 @@ def main() -> None:
 
     client.on_connect = on_connect
     client.on_message = on_message
+    client.message_callback_add(profile_topic, lambda client, userdata, msg: profiler.handle_control(msg.payload))
+    profiler.install_signal_handlers()
+    startup.mark("setup")
     client.connect(mqtt_host, mqtt_port, keepalive=60)
+    startup.mark("connect")
     client.loop_forever()
 
 
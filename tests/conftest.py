@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """A settable stand-in for ``time.time``/``time.monotonic``."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
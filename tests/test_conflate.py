@@ -0,0 +1,31 @@
+from farmstack.conflate import Conflator
+
+
+def test_conflator_keeps_newest_position_per_uid(clock) -> None:
+    conflator = Conflator(min_interval_s=1.0, clock=clock)
+
+    conflator.offer("tractor", "p1")
+    assert conflator.poll() == ["p1"]
+
+    conflator.offer("tractor", "p2")
+    conflator.offer("tractor", "p3")
+    assert conflator.poll() == []
+    assert conflator.next_delay() == 1.0
+
+    clock.now += 1.0
+    assert conflator.poll() == ["p3"]
+    assert conflator.stats.conflated == 1
+    assert conflator.stats.released == 2
+
+
+def test_conflator_global_budget_is_fair_across_uids(clock) -> None:
+    conflator = Conflator(min_interval_s=0.0, max_eps=2.0, burst=2, clock=clock)
+
+    for uid in ("a", "b", "c", "d"):
+        conflator.offer(uid, f"{uid}1")
+    conflator.offer("a", "a2")
+
+    assert conflator.poll() == ["a2", "b1"]
+    assert conflator.poll() == []
+    clock.now += 1.0
+    assert conflator.poll() == ["c1", "d1"]
@@ -0,0 +1,67 @@
+import itertools
+import json
+from pathlib import Path
+
+import yaml
+
+from farmstack.cot import CotProfile, build_cot_xml
+
+
+def _baseline_mapping(config: dict, is_event: bool, kind: str, event_type: str, system: str) -> tuple:
+    # The ``.get()`` chain resolve_cot_event used before CotProfile existed.
+    defaults = config.get("cot_defaults", {})
+    if is_event:
+        cot_type = config.get("event_type_map", {}).get(event_type, {}).get("cot_type")
+        if not cot_type:
+            if event_type and ("geofence" in event_type or "breach" in event_type):
+                cot_type = defaults.get("geofence_cot_type", "b-a-g")
+            else:
+                cot_type = defaults.get("alert_cot_type", "b-a")
+    else:
+        cot_type = config.get("asset_kind_map", {}).get(kind, {}).get("cot_type") or defaults.get(
+            "contact_cot_type", "a-f-G-U-C"
+        )
+    how = defaults.get("how_manual", "h-e") if system == "manual" else defaults.get("how_machine", "m-g")
+    return cot_type, how, defaults.get("stale_s_default", 300)
+
+
+def test_cot_profile_matches_raw_config_mapping() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    profile = CotProfile(config)
+
+    kinds = ["tractor", "gate", "light", "unknown-kind"]
+    event_types = ["gate.open", "security.breach", "zone.geofence.exit", "pump.fault", "misc"]
+    systems = ["meshtastic", "manual"]
+    for is_event, kind, event_type, system in itertools.product([False, True], kinds, event_types, systems):
+        assert profile.resolve(is_event, kind, event_type, system) == _baseline_mapping(
+            config, is_event, kind, event_type, system
+        )
+
+
+def test_cot_profile_uses_shipped_config_values() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    profile = CotProfile(config)
+    tele = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+    evt = json.loads(Path("contracts/examples/evt.gate-open.json").read_text(encoding="utf-8"))
+
+    assert profile.resolve(False, "gate", None, "meshtastic") == ("a-f-G-I", "m-g", 300)
+    assert profile.resolve(False, "unknown-kind", None, "manual") == ("a-f-G-U-C", "h-e", 300)
+    assert profile.resolve(True, "gate", "pump.fault", "plc") == ("b-a", "m-g", 300)
+    assert profile.resolve(True, "gate", "zone.geofence.exit", "plc") == ("b-a-g", "m-g", 300)
+    assert profile.resolve(True, "gate", "misc", "plc") == ("b-a", "m-g", 300)
+
+    tractor = dict(tele, asset=dict(tele["asset"], kind="tractor"), src={"system": "meshtastic"})
+    xml = build_cot_xml(tractor, None, None, profile)
+    assert 'type="a-f-G-U-C"' in xml and 'how="m-g"' in xml
+    manual = dict(evt, src={"system": "manual"}, loc=tele["loc"])
+    xml = build_cot_xml(manual, None, "gate.open", profile)
+    assert 'type="b-a-g"' in xml and 'how="h-e"' in xml
+
+
+def test_cot_profile_memoizes_resolution() -> None:
+    profile = CotProfile({"event_type_map": {"gate.open": {"cot_type": "b-a-g"}}}, max_memo=2)
+
+    assert profile.resolve(True, "gate", "gate.open", "manual") == ("b-a-g", "h-e", 300)
+    assert profile.resolve(True, "gate", "fence.breach", "plc") == ("b-a-g", "m-g", 300)
+    assert profile.resolve(False, "tractor", None, "plc") == ("a-f-G-U-C", "m-g", 300)
+    assert len(profile._memo) <= 2
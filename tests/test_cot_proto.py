@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from farmstack.cot import build_cot_xml, resolve_cot_event
+from farmstack.cot_proto import build_cot_proto, cot_event_to_message, encode_cot
+
+takproto = pytest.importorskip("takproto")
+xml2message = pytest.importorskip("takproto.functions").xml2message
+
+
+def _config() -> dict:
+    return yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+
+
+def _envelope(name: str) -> dict:
+    return json.loads(Path(f"contracts/examples/{name}").read_text(encoding="utf-8"))
+
+
+def test_cot_proto_matches_xml_path_for_position() -> None:
+    envelope = _envelope("tele.position.json")
+    config = _config()
+
+    xml = build_cot_xml(envelope, None, None, config)
+    cot = resolve_cot_event(envelope, None, None, config)
+
+    assert cot_event_to_message(cot) == xml2message(xml)
+
+
+def test_cot_proto_matches_xml_path_for_alert() -> None:
+    envelope = _envelope("evt.gate-open.json")
+    meta = _envelope("meta.gate-east.json")
+    config = _config()
+
+    xml = build_cot_xml(envelope, meta, "gate.open", config)
+    cot = resolve_cot_event(envelope, meta, "gate.open", config)
+
+    assert cot_event_to_message(cot) == xml2message(xml)
+
+
+def test_cot_proto_stream_and_mesh_framing() -> None:
+    envelope = _envelope("tele.position.json")
+    config = _config()
+    cot = resolve_cot_event(envelope, None, None, config)
+
+    stream = build_cot_proto(envelope, None, None, config, "stream")
+    mesh = encode_cot(cot, "mesh")
+
+    assert takproto.parse_proto(bytearray(stream)) == cot_event_to_message(cot)
+    assert takproto.parse_proto(bytearray(mesh)) == cot_event_to_message(cot)
+    assert len(stream) < len(encode_cot(cot, "xml"))
@@ -0,0 +1,69 @@
+import json
+import random
+from pathlib import Path
+
+import yaml
+
+from farmstack.cot import CotEvent, build_cot_xml, render_cot_xml, render_cot_xml_etree, resolve_cot_event
+
+_ALPHABET = "abcXYZ019 .-_&<>\"'\r\n\t=/é北🚜"
+
+
+def _text(rng: random.Random, allow_empty: bool = False) -> str:
+    length = rng.randint(0 if allow_empty else 1, 24)
+    return "".join(rng.choice(_ALPHABET) for _ in range(length))
+
+
+def _number(rng: random.Random) -> float:
+    return rng.choice(
+        [
+            rng.uniform(-180.0, 180.0),
+            rng.uniform(-1e-7, 1e-7),
+            rng.uniform(0.0, 1e7),
+            float(rng.randint(-90, 90)),
+            9999999.0,
+            -0.0,
+        ]
+    )
+
+
+def test_template_serializer_matches_golden_fixture() -> None:
+    envelope = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    expected = Path("tests/fixtures/cot_position.xml").read_text(encoding="utf-8").strip()
+
+    cot = resolve_cot_event(envelope, None, None, config)
+
+    assert render_cot_xml(cot) == expected
+    assert render_cot_xml_etree(cot) == expected
+
+
+def test_template_serializer_matches_etree_on_alerts() -> None:
+    envelope = json.loads(Path("contracts/examples/evt.gate-open.json").read_text(encoding="utf-8"))
+    meta = json.loads(Path("contracts/examples/meta.gate-east.json").read_text(encoding="utf-8"))
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+
+    cot = resolve_cot_event(envelope, meta, "gate.open", config)
+
+    assert build_cot_xml(envelope, meta, "gate.open", config) == render_cot_xml_etree(cot)
+
+
+def test_template_serializer_matches_etree_randomized() -> None:
+    rng = random.Random(20260119)
+    for _ in range(2000):
+        cot = CotEvent(
+            uid=_text(rng),
+            type=_text(rng),
+            time=_text(rng),
+            start=_text(rng),
+            stale=_text(rng),
+            how=_text(rng),
+            lat=_number(rng),
+            lon=_number(rng),
+            hae=_number(rng),
+            ce=_number(rng),
+            le=_number(rng),
+            callsign=rng.choice([None, _text(rng, allow_empty=True)]),
+            remarks=rng.choice([None, _text(rng, allow_empty=True)]),
+        )
+        assert render_cot_xml(cot) == render_cot_xml_etree(cot), cot
@@ -0,0 +1,63 @@
+from farmstack.dedupe import BloomDedupeCache, DedupeCache, SqliteDedupeStore
+
+
+def test_dedupe_cache_expires_from_oldest_end(clock) -> None:
+    cache = DedupeCache(max_entries=100, window_s=10, clock=clock)
+
+    assert not cache.seen("a")
+    clock.now += 5
+    assert not cache.seen("b")
+    assert cache.seen("a")
+
+    clock.now += 11
+    assert not cache.seen("b")
+    assert cache.seen("b")
+    assert len(cache) == 1
+
+
+def test_dedupe_cache_reseen_id_moves_to_tail(clock) -> None:
+    cache = DedupeCache(max_entries=2, window_s=60, clock=clock)
+
+    cache.seen("a")
+    cache.seen("b")
+    assert cache.seen("a")
+    cache.seen("c")
+
+    assert cache.seen("a")
+    assert not cache.seen("b")
+
+
+def test_bloom_dedupe_cache_remembers_one_window(clock) -> None:
+    cache = BloomDedupeCache(max_entries=1000, window_s=10, clock=clock)
+
+    ids = [f"msg-{i}" for i in range(500)]
+    assert not any(cache.seen(message_id) for message_id in ids)
+    clock.now += 9
+    assert all(cache.seen(message_id) for message_id in ids)
+
+    clock.now += 25
+    assert not cache.seen("msg-0")
+
+
+def test_bloom_dedupe_cache_false_positive_rate_is_bounded() -> None:
+    cache = BloomDedupeCache(max_entries=5000, window_s=60, false_positive_rate=0.01)
+
+    for i in range(5000):
+        cache.seen(f"seen-{i}")
+    false_positives = sum(cache.seen(f"fresh-{i}") for i in range(2000))
+
+    assert false_positives < 2000 * 0.02
+
+
+def test_sqlite_dedupe_store_is_shared_between_instances(tmp_path, clock) -> None:
+    path = str(tmp_path / "dedupe.sqlite")
+    replica_a = SqliteDedupeStore(path, window_s=10, clock=clock)
+    replica_b = SqliteDedupeStore(path, window_s=10, clock=clock)
+
+    assert not replica_a.seen("msg-1")
+    assert replica_b.seen("msg-1")
+    clock.now += 11
+    assert not replica_b.seen("msg-1")
+
+    replica_a.close()
+    replica_b.close()
@@ -0,0 +1,62 @@
+import json
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+import pytest
+
+from farmstack.envelope import Asset, Envelope, Loc, Src, parse_asset_id, parse_event_type
+
+EXAMPLES = sorted(Path("contracts/examples").glob("*.json"))
+
+
+def _schema() -> dict:
+    return json.loads(Path("contracts/schemas/envelope.v1.schema.json").read_text(encoding="utf-8"))
+
+
+def _names(cls: type) -> list:
+    return ["class" if field.name == "msg_class" else field.name for field in fields(cls)]
+
+
+def test_types_follow_envelope_schema() -> None:
+    properties = _schema()["properties"]
+    assert _names(Envelope) == list(properties)
+    for name, cls in (("asset", Asset), ("src", Src), ("loc", Loc)):
+        assert _names(cls) == list(properties[name]["properties"]), name
+
+
+@pytest.mark.parametrize("example", [path for path in EXAMPLES if "class" in path.read_text()], ids=str)
+def test_round_trip_matches_dict(example: Path) -> None:
+    raw = json.loads(example.read_text(encoding="utf-8"))
+    envelope = Envelope.decode(example.read_bytes())
+
+    assert envelope.to_dict() == raw
+    assert json.loads(envelope.encode()) == raw
+    assert envelope.msg_class == raw["class"]
+    assert envelope.asset_id == raw["asset"]["id"]
+
+
+def test_slotted_envelope_is_smaller_than_dicts() -> None:
+    raw = json.loads(Path("contracts/examples/evt.gate-open.json").read_text(encoding="utf-8"))
+    envelope = Envelope.from_dict(raw)
+
+    def size(value: object) -> int:
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(size(item) for item in value.values())
+        if hasattr(value, "__slots__") and not isinstance(value, dict):
+            return sys.getsizeof(value) + sum(size(getattr(value, slot)) for slot in value.__slots__ if slot != "data")
+        return 0
+
+    assert not hasattr(envelope, "__dict__")
+    assert size(envelope) < size({key: value for key, value in raw.items() if key != "data"})
+
+
+def test_topic_helpers() -> None:
+    envelope = Envelope.from_dict({"asset": {"id": "gate-east"}, "data": {"event_type": "gate.open"}})
+
+    assert parse_asset_id("farm/farmstead/evt/gate-west/gate/open", envelope) == "gate-west"
+    assert parse_asset_id("farm/farmstead", envelope) == "gate-east"
+    assert parse_asset_id(None, envelope) == "gate-east"
+    assert parse_event_type("farm/farmstead/evt/gate-west/gate/open", envelope) == "gate.open"
+    assert parse_event_type("farm/farmstead/evt/gate-west", envelope) == "gate.open"
+    assert parse_event_type(None, Envelope()) is None
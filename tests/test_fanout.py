@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import List
+
+from farmstack.cot import CotEvent
+from farmstack.fanout import Destination, FanOut
+from farmstack.sendqueue import PrioritySendQueue
+
+
+class RecordingSender:
+    def __init__(self, fail_times: int = 0) -> None:
+        self.frames: List[bytes] = []
+        self.fail_times = fail_times
+        self.closed = False
+        self.sent = threading.Event()
+
+    def send(self, frame: bytes) -> None:
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("down")
+        self.frames.append(frame)
+        self.sent.set()
+
+    def send_batch(self, frames: List[bytes]) -> None:
+        for frame in frames:
+            self.send(frame)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _cot() -> CotEvent:
+    return CotEvent(
+        uid="farm.farmstead.tractor-01",
+        type="a-f-G-U-C",
+        time="2026-01-19T20:15:31Z",
+        start="2026-01-19T20:15:31Z",
+        stale="2026-01-19T20:17:31Z",
+        how="m-g",
+        lat=43.04523,
+        lon=-76.12288,
+    )
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fanout_encodes_once_per_format() -> None:
+    senders = [RecordingSender(), RecordingSender(), RecordingSender()]
+    destinations = [
+        Destination("a", senders[0], PrioritySendQueue(10), fmt="xml", delimiter=b"\n"),
+        Destination("b", senders[1], PrioritySendQueue(10), fmt="xml", delimiter=b"\n"),
+        Destination("c", senders[2], PrioritySendQueue(10), fmt="xml", delimiter=b""),
+    ]
+    fanout = FanOut(destinations)
+
+    assert fanout.publish(_cot()) == 3
+    fanout.start()
+    _wait_for(lambda: all(sender.frames for sender in senders))
+    fanout.stop()
+
+    assert senders[0].frames[0] is senders[1].frames[0]
+    assert senders[2].frames[0] == senders[0].frames[0][:-1]
+    assert all(sender.closed for sender in senders)
+
+
+def test_failing_destination_retries_without_blocking_others() -> None:
+    healthy = RecordingSender()
+    flaky = RecordingSender(fail_times=2)
+    fanout = FanOut(
+        [
+            Destination("healthy", healthy, PrioritySendQueue(10)),
+            Destination("flaky", flaky, PrioritySendQueue(10), retries=2, retry_backoff_s=0.05),
+        ]
+    )
+    fanout.start()
+
+    fanout.publish(_cot())
+    assert healthy.sent.wait(1.0)
+    assert not flaky.frames
+    assert flaky.sent.wait(2.0)
+    fanout.stop()
+
+    healthy_health, flaky_health = fanout.health()
+    assert healthy_health["frames_sent"] == 1 and healthy_health["send_failures"] == 0
+    assert flaky_health["frames_sent"] == 1 and flaky_health["send_failures"] == 2
+    assert flaky_health["up"] and flaky_health["consecutive_failures"] == 0
+
+
+def test_retry_after_partial_batch_does_not_repeat_frames() -> None:
+    sender = RecordingSender()
+    calls = []
+
+    def flaky_send(frame: bytes) -> None:
+        calls.append(frame)
+        if len(calls) == 2:
+            raise ConnectionError("down")
+        sender.frames.append(frame)
+
+    sender.send = flaky_send
+    destination = Destination(
+        "udp",
+        sender,
+        PrioritySendQueue(10),
+        delimiter=b"",
+        flush_ms=50,
+        flush_bytes=4096,
+        retries=1,
+        retry_backoff_s=0.01,
+    )
+    fanout = FanOut([destination])
+    for index in range(3):
+        cot = _cot()
+        cot.uid = f"uid-{index}"
+        fanout.publish(cot)
+    fanout.start()
+    _wait_for(lambda: len(sender.frames) == 3)
+    fanout.stop()
+
+    assert len(set(sender.frames)) == 3
+    assert len(calls) == 4
+
+
+def test_full_destination_queue_only_drops_there() -> None:
+    fanout = FanOut(
+        [
+            Destination("roomy", RecordingSender(), PrioritySendQueue(10)),
+            Destination("full", RecordingSender(), PrioritySendQueue(1, overflow="drop_new")),
+        ]
+    )
+
+    assert fanout.publish(_cot()) == 2
+    assert fanout.publish(_cot()) == 1
+    assert fanout.destinations[1].queue.stats.dropped == {"rejected": 1}
@@ -1,8 +1,10 @@
+import copy
 import json
 from pathlib import Path
 
 import yaml
 
+from farmstack.envelope import Envelope
 from farmstack.farmos import build_log_payload, resolve_log_type
 
 
@@ -22,4 +24,15 @@ def test_farmos_payload_includes_asset_link() -> None:
     payload = build_log_payload(envelope, "gate.open", "observation", meta)
 
     relationships = payload.get("data", {}).get("relationships", {})
-    assert "asset" in relationships
\ No newline at end of file
+    assert "asset" in relationships
+
+
+def test_farmos_log_keeps_the_received_payload() -> None:
+    payload = json.loads(Path("contracts/examples/evt.gate-open.json").read_text(encoding="utf-8"))
+    payload["data"]["extra"] = {"nested": [1, None]}
+    received = copy.deepcopy(payload)
+
+    logged = build_log_payload(Envelope.from_dict(payload), "gate.open", "observation", None, raw=payload)
+
+    assert logged["data"]["attributes"]["data"] == received
+    assert list(logged["data"]["attributes"]["data"]) == list(received)
@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+
+from farmstack.geofence import (
+    GeofenceIndex,
+    GeofenceTracker,
+    STRTree,
+    Zone,
+    build_geofence_event,
+    load_geojson_zones,
+    load_kml_zones,
+)
+from farmstack.schema import default_schema_registry
+
+# A 0.01 degree square field with a 0.004 degree square hole in the middle.
+FIELD = Zone(
+    id="field-1",
+    name="North Field",
+    polygons=[
+        [
+            [(-76.13, 43.04), (-76.12, 43.04), (-76.12, 43.05), (-76.13, 43.05), (-76.13, 43.04)],
+            [(-76.127, 43.043), (-76.123, 43.043), (-76.123, 43.047), (-76.127, 43.047)],
+        ]
+    ],
+)
+YARD = Zone(
+    id="yard",
+    name="Yard",
+    polygons=[[[(-76.125, 43.035), (-76.115, 43.035), (-76.115, 43.042), (-76.125, 43.042)]]],
+)
+
+
+def test_geofence_index_handles_holes_and_overlaps() -> None:
+    index = GeofenceIndex([FIELD, YARD])
+
+    assert index.zones_at(43.041, -76.128) == {"field-1"}
+    assert index.zones_at(43.045, -76.125) == set()
+    assert index.zones_at(43.041, -76.122) == {"field-1", "yard"}
+    assert index.zones_at(43.038, -76.118) == {"yard"}
+    assert index.zones_at(43.1, -76.0) == set()
+
+
+def test_str_tree_matches_brute_force() -> None:
+    boxes = [((x, y, x + 1.5, y + 1.5), (x, y)) for x in range(20) for y in range(20)]
+    tree = STRTree(boxes, node_capacity=4)
+
+    for qx, qy in [(0.5, 0.5), (10.2, 3.9), (19.9, 19.9), (-1.0, 5.0)]:
+        expected = {item for (x0, y0, x1, y1), item in boxes if x0 <= qx <= x1 and y0 <= qy <= y1}
+        assert set(tree.query_point(qx, qy)) == expected
+
+
+def test_geofence_tracker_reports_transitions_once() -> None:
+    tracker = GeofenceTracker(GeofenceIndex([FIELD, YARD]))
+
+    assert tracker.update("tractor-01", 43.1, -76.0) == ([], [])
+    assert tracker.update("tractor-01", 43.041, -76.128) == (["field-1"], [])
+    assert tracker.update("tractor-01", 43.041, -76.128) == ([], [])
+    assert tracker.update("tractor-01", 43.041, -76.122) == (["yard"], [])
+    assert tracker.update("tractor-01", 43.038, -76.118) == ([], ["field-1"])
+    assert tracker.update("tractor-02", 43.038, -76.118) == (["yard"], [])
+
+
+def test_geofence_event_is_a_valid_deterministic_evt() -> None:
+    tele = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+
+    event = build_geofence_event(tele, "farmstead", "enter", FIELD)
+
+    default_schema_registry().validate("evt.v1.schema.json", event)
+    assert event["data"]["event_type"] == "geofence.enter"
+    assert event["tags"] == {"zone": "North Field"}
+    assert event["id"] == build_geofence_event(tele, "farmstead", "enter", FIELD)["id"]
+    assert event["id"] != build_geofence_event(tele, "farmstead", "exit", FIELD)["id"]
+
+
+def test_load_zones_from_kml_and_geojson(tmp_path) -> None:
+    kml = tmp_path / "zones.kml"
+    kml.write_text(
+        """<?xml version="1.0" encoding="utf-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+  <Placemark id="pond"><ExtendedData><SchemaData>
+    <SimpleData name="NAME">Farm Pond</SimpleData></SchemaData></ExtendedData>
+    <MultiGeometry><Polygon><outerBoundaryIs><LinearRing><coordinates>
+      -76.13,43.04,0 -76.12,43.04,0 -76.12,43.05,0 -76.13,43.04,0
+    </coordinates></LinearRing></outerBoundaryIs></Polygon></MultiGeometry>
+  </Placemark>
+  <Placemark><name>Pin</name><Point><coordinates>-76.1,43.0</coordinates></Point></Placemark>
+</Document></kml>""",
+        encoding="utf-8",
+    )
+    geojson = tmp_path / "zones.geojson"
+    geojson.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {"name": "Orchard"},
+                        "geometry": {
+                            "type": "Polygon",
+                            "coordinates": [[[-76.0, 43.0], [-75.9, 43.0], [-75.9, 43.1], [-76.0, 43.0]]],
+                        },
+                    }
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    kml_zones = load_kml_zones(kml)
+    geojson_zones = load_geojson_zones(geojson)
+
+    assert [(zone.id, zone.name) for zone in kml_zones] == [("pond", "Farm Pond")]
+    assert [(zone.id, zone.name) for zone in geojson_zones] == [("zones.1", "Orchard")]
+    assert geojson_zones[0].polygons[0][0][1] == (-75.9, 43.0)
@@ -0,0 +1,101 @@
+import copy
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from farmstack.meshtastic_nodes import NodeInfoCache
+from farmstack.schema import default_schema_registry
+
+
+def _tele(stream: str, ts: str = "2026-01-19T20:21:30Z", **data: Any) -> Dict[str, Any]:
+    return {
+        "v": 1,
+        "id": f"a1b2c3d4-{stream}-{ts}",
+        "ts": ts,
+        "site": "farmstead",
+        "class": "tele",
+        "asset": {"id": "!a1b2c3d4", "kind": "meshtastic-node", "name": "!a1b2c3d4"},
+        "src": {"system": "meshtastic", "id": "!a1b2c3d4"},
+        "ttl_s": 120,
+        "data": {"stream": stream, **data},
+    }
+
+
+def _position(lat: float, lon: float, ts: str = "2026-01-19T20:21:30Z") -> Dict[str, Any]:
+    envelope = _tele("position", ts, metrics={})
+    envelope["loc"] = {"lat": lat, "lon": lon, "hae_m": 146.0, "ce_m": 10.0, "le_m": 15.0}
+    return envelope
+
+
+NODEINFO = _tele("nodeinfo", node={"long_name": "North tractor", "short_name": "NT", "hw_model": "TBEAM"})
+
+
+def test_enriches_positions_and_telemetry() -> None:
+    nodes = NodeInfoCache(None)
+    nodes.observe(NODEINFO)
+    nodes.observe(_position(43.04523, -76.12288))
+
+    position = nodes.enrich(_position(43.1, -76.2), name_prefix="mesh-")
+    assert position["asset"]["name"] == "mesh-North tractor"
+    assert position["data"]["node"] == {"long_name": "North tractor", "short_name": "NT", "hw_model": "TBEAM"}
+    assert position["loc"]["lat"] == 43.1
+
+    telemetry = nodes.enrich(_tele("device", metrics={"battery_pct": 87}))
+    assert telemetry["loc"] == {"lat": 43.04523, "lon": -76.12288, "hae_m": 146.0}
+
+    registry = default_schema_registry()
+    for envelope in (position, telemetry, nodes.enrich(copy.deepcopy(NODEINFO))):
+        registry.validate("tele.v1.schema.json", envelope)
+
+
+def test_unknown_nodes_pass_through() -> None:
+    envelope = _tele("device", metrics={})
+    assert NodeInfoCache(None).enrich(copy.deepcopy(envelope)) == envelope
+
+
+def test_late_positions_do_not_move_the_node_back() -> None:
+    nodes = NodeInfoCache(None)
+    nodes.observe(_position(43.2, -76.2, ts="2026-01-19T20:25:00Z"))
+    nodes.observe(_position(43.1, -76.1, ts="2026-01-19T20:21:30Z"))
+    assert (nodes.get("!a1b2c3d4").lat, nodes.get("!a1b2c3d4").position_ts) == (43.2, "2026-01-19T20:25:00Z")
+
+
+def test_survives_restart(tmp_path: Path, clock) -> None:
+    path = str(tmp_path / "nodes.sqlite")
+    nodes = NodeInfoCache(path, flush_every_s=30, clock=clock)
+    nodes.observe(NODEINFO)
+    nodes.observe(_position(43.04523, -76.12288))
+
+    # NODEINFO is written at once; the position waits for the next flush.
+    loaded = NodeInfoCache(path).get("!a1b2c3d4")
+    assert (loaded.long_name, loaded.hw_model, loaded.lat) == ("North tractor", "TBEAM", None)
+
+    clock.now += 31
+    nodes.observe(_position(43.05, -76.13, ts="2026-01-19T20:22:00Z"))
+    assert NodeInfoCache(path).get("!a1b2c3d4").lat == 43.05
+
+    nodes.observe(_position(43.06, -76.14, ts="2026-01-19T20:22:30Z"))
+    nodes.close()
+    restarted = NodeInfoCache(path)
+    assert len(restarted) == 1
+    assert restarted.enrich(_tele("device", metrics={}))["loc"]["lat"] == 43.06
+    assert restarted.enrich(_position(43.07, -76.15))["asset"]["name"] == "North tractor"
+
+
+def test_enriched_envelopes_are_checked_against_the_schema(tmp_path: Path) -> None:
+    path = str(tmp_path / "nodes.sqlite")
+    NodeInfoCache(path).close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO nodes (node, long_name, lat, lon) VALUES ('!a1b2c3d4', 'North tractor', 91, 0)")
+    conn.close()
+
+    registry = default_schema_registry()
+    telemetry = _tele("device", metrics={})
+    registry.validate("tele.v1.schema.json", telemetry)
+    enriched = NodeInfoCache(path).enrich(telemetry)
+    assert enriched["asset"]["name"] == "North tractor"
+    with pytest.raises(ValueError, match="is greater than the maximum of 90"):
+        registry.validate("tele.v1.schema.json", enriched)
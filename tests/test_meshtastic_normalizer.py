@@ -1,9 +1,15 @@
+import copy
+import itertools
 import json
+import sys
 from pathlib import Path
+from typing import Any, Dict, List
 
+import pytest
 import yaml
 
-from farmstack.meshtastic import normalize_meshtastic
+from farmstack import meshtastic
+from farmstack.meshtastic import MeshtasticColumns, normalize_meshtastic, normalize_meshtastic_batch
 
 
 def test_meshtastic_normalizer_fixture() -> None:
@@ -17,4 +23,87 @@ def test_meshtastic_normalizer_fixture() -> None:
         Path("services/meshtastic-normalizer/fixtures/canonical.json").read_text(encoding="utf-8")
     )
 
-    assert envelope == expected
\ No newline at end of file
+    assert envelope == expected
+
+
+def _raw_variants() -> List[Dict[str, Any]]:
+    raw = json.loads(
+        Path("services/meshtastic-normalizer/fixtures/raw.json").read_text(encoding="utf-8")
+    )
+    variants = [raw, json.loads(Path("contracts/examples/meshtastic.raw.json").read_text(encoding="utf-8"))]
+    for edit in (
+        lambda r: r["payload"].pop("latitude"),
+        lambda r: r["payload"].update(longitude=None),
+        lambda r: r.pop("node"),
+        lambda r: (r.pop("node"), r.pop("from")),
+        lambda r: r.pop("id"),
+        lambda r: r["payload"].pop("altitude"),
+        lambda r: r["payload"].update(latitude=0, longitude="-76.5", altitude=3),
+        lambda r: r["payload"].pop("battery_level"),
+        lambda r: r.update(ts="2026-01-19T20:22:00Z"),
+    ):
+        variant = copy.deepcopy(raw)
+        edit(variant)
+        variants.append(variant)
+    return variants
+
+
+@pytest.mark.parametrize("with_numpy", [True, False], ids=["numpy", "fallback"])
+@pytest.mark.parametrize("prefix", ["", "mesh-"])
+def test_batch_matches_per_item(monkeypatch: pytest.MonkeyPatch, with_numpy: bool, prefix: str) -> None:
+    if with_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    config = yaml.safe_load(Path("configs/meshtastic-normalizer.yaml").read_text(encoding="utf-8"))
+    config["asset_name_prefix"] = prefix
+    raws = _raw_variants()
+
+    monkeypatch.setattr(meshtastic, "uuid4", itertools.count().__next__)
+    expected = [envelope for raw in raws if (envelope := normalize_meshtastic(raw, "farmstead", config))]
+    monkeypatch.setattr(meshtastic, "uuid4", itertools.count().__next__)
+    batch = list(normalize_meshtastic_batch(MeshtasticColumns.from_raw(raws), "farmstead", config))
+
+    assert len(expected) == 8
+    assert batch == expected
+    assert json.dumps(batch) == json.dumps(expected)
+
+
+@pytest.mark.parametrize("with_numpy", [True, False], ids=["numpy", "fallback"])
+def test_batch_and_per_item_agree_on_missing_values(monkeypatch: pytest.MonkeyPatch, with_numpy: bool) -> None:
+    if with_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    raw = json.loads(
+        Path("services/meshtastic-normalizer/fixtures/raw.json").read_text(encoding="utf-8")
+    )
+    raws = []
+    for payload in (
+        {"altitude": None},
+        {"altitude": float("nan")},
+        {"latitude": float("nan")},
+        {"longitude": float("nan")},
+    ):
+        variant = copy.deepcopy(raw)
+        variant["payload"].update(payload)
+        raws.append(variant)
+
+    per_item = [normalize_meshtastic(raw, "farmstead", {}) for raw in raws]
+    batch = list(normalize_meshtastic_batch(MeshtasticColumns.from_raw(raws), "farmstead", {}))
+
+    assert per_item[2:] == [None, None]
+    assert [envelope["loc"]["hae_m"] for envelope in per_item[:2]] == [0.0, 0.0]
+    assert batch == per_item[:2]
+
+
+def test_batch_is_lazy_and_stamps_missing_ts() -> None:
+    raw = json.loads(
+        Path("services/meshtastic-normalizer/fixtures/raw.json").read_text(encoding="utf-8")
+    )
+    del raw["timestamp"]
+    envelopes = normalize_meshtastic_batch(MeshtasticColumns.from_raw([raw] * 3), "farmstead", {})
+
+    first = next(envelopes)
+    assert first["ts"].endswith("Z")
+    assert [envelope["ts"] for envelope in envelopes] == [first["ts"]] * 2
@@ -0,0 +1,137 @@
+import base64
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+pytest.importorskip("google.protobuf")
+
+from farmstack.meshtastic import normalize_meshtastic  # noqa: E402
+from farmstack.meshtastic_proto import (  # noqa: E402
+    DEFAULT_KEY,
+    ChannelCiphers,
+    channel_key,
+    decode_service_envelope,
+    encode_service_envelope,
+    load_protobufs,
+    packet_to_envelope,
+)
+from farmstack.schema import default_schema_registry  # noqa: E402
+
+NODE = 0xA1B2C3D4
+SENT = 1768854090  # 2026-01-19T20:21:30Z
+
+
+def _config() -> dict:
+    return yaml.safe_load(Path("configs/meshtastic-normalizer.yaml").read_text(encoding="utf-8"))
+
+
+def _ciphers() -> ChannelCiphers:
+    pytest.importorskip("cryptography")
+    return ChannelCiphers({"LongFast": "AQ==", "Open": "AA=="})
+
+
+def _decode(port: str, message, ciphers: ChannelCiphers, channel: str = "LongFast") -> dict:
+    raw = encode_service_envelope(
+        port, message, NODE, 0x1234, channel, "!0000beef", ciphers, rx_time=SENT + 1, rx_rssi=-105
+    )
+    packet, reason = decode_service_envelope(raw, ciphers)
+    assert reason is None
+    envelope, reason = packet_to_envelope(packet, "farmstead", _config())
+    assert reason is None
+    default_schema_registry().validate("tele.v1.schema.json", envelope)
+    return envelope
+
+
+def test_channel_keys_expand_like_firmware() -> None:
+    assert channel_key("AQ==") == DEFAULT_KEY
+    assert channel_key("Ag==")[-1] == DEFAULT_KEY[-1] + 1
+    assert channel_key("AA==") is None
+    assert channel_key("") is None
+    key = bytes(range(32))
+    assert channel_key(base64.b64encode(key).decode()) == key
+    assert len(channel_key(base64.b64encode(b"short").decode())) == 16
+
+
+def test_decrypt_matches_aes_ctr() -> None:
+    ciphers = _ciphers()
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    for size in (1, 15, 16, 17, 64, 237):
+        data = bytes(range(size))
+        nonce = (0x1234).to_bytes(8, "little") + NODE.to_bytes(4, "little") + bytes(4)
+        expected = Cipher(algorithms.AES(DEFAULT_KEY), modes.CTR(nonce)).encryptor().update(data)
+        assert ciphers.decrypt("LongFast", 0x1234, NODE, data) == expected
+
+
+@pytest.mark.parametrize("channel", ["LongFast", "Open"])
+def test_position_matches_json_path(channel: str) -> None:
+    pb = load_protobufs()
+    position = pb.mesh.Position(latitude_i=430452300, longitude_i=-761228800, altitude=146, time=SENT)
+    envelope = _decode("position", position, _ciphers(), channel)
+
+    expected = normalize_meshtastic(
+        {
+            "id": "a1b2c3d4-00001234",
+            "ts": "2026-01-19T20:21:30Z",
+            "from": "!a1b2c3d4",
+            "node": "!a1b2c3d4",
+            "payload": {"latitude": 43.04523, "longitude": -76.12288, "altitude": 146.0, "rssi": -105},
+        },
+        "farmstead",
+        _config(),
+    )
+    expected["src"]["gw"] = "!0000beef"
+    assert envelope == expected
+    assert json.dumps(envelope["loc"]) == (
+        '{"lat": 43.04523, "lon": -76.12288, "hae_m": 146.0, "ce_m": 10.0, "le_m": 15.0}'
+    )
+
+
+def test_telemetry_and_nodeinfo() -> None:
+    pb = load_protobufs()
+    ciphers = _ciphers()
+    telemetry = pb.telemetry.Telemetry(time=SENT)
+    telemetry.device_metrics.battery_level = 87
+    telemetry.device_metrics.voltage = 4.1
+    envelope = _decode("telemetry", telemetry, ciphers)
+    assert envelope["ts"] == "2026-01-19T20:21:30Z"
+    assert "loc" not in envelope
+    assert envelope["data"] == {
+        "stream": "device",
+        "metrics": {"battery_pct": 87, "voltage_v": 4.1, "rssi_dbm": -105},
+    }
+
+    user = pb.mesh.User(
+        id="!a1b2c3d4", long_name="North tractor", short_name="NT", hw_model=pb.mesh.HardwareModel.Value("TBEAM")
+    )
+    envelope = _decode("nodeinfo", user, ciphers)
+    assert envelope["ts"] == "2026-01-19T20:21:31Z"
+    assert envelope["data"] == {
+        "stream": "nodeinfo",
+        "node": {"long_name": "North tractor", "short_name": "NT", "hw_model": "TBEAM"},
+    }
+
+
+def test_drop_reasons() -> None:
+    pb = load_protobufs()
+    ciphers = _ciphers()
+    position = pb.mesh.Position(latitude_i=430452300, longitude_i=-761228800)
+    other_key = ChannelCiphers({"LongFast": "Ag==", "Secret": "Ag=="})
+
+    assert decode_service_envelope(b"\xff\xff\xff", ciphers) == (None, "invalid_protobuf")
+    unknown = encode_service_envelope("position", position, NODE, 1, "Secret", ciphers=other_key)
+    assert decode_service_envelope(unknown, ciphers) == (None, "unknown_channel")
+    plaintext = encode_service_envelope("position", position, NODE, 1, "Secret")
+    assert decode_service_envelope(plaintext, ciphers) == (None, "unknown_channel")
+    wrong_key = encode_service_envelope("position", position, NODE, 1, "LongFast", ciphers=other_key)
+    assert decode_service_envelope(wrong_key, ciphers)[1] in ("decrypt", "invalid_protobuf", "unsupported_port")
+
+    text = pb.mqtt.ServiceEnvelope(channel_id="LongFast")
+    text.packet.decoded.portnum = pb.portnums.PortNum.TEXT_MESSAGE_APP
+    assert decode_service_envelope(text.SerializeToString(), ciphers) == (None, "unsupported_port")
+
+    no_fix = encode_service_envelope("position", pb.mesh.Position(), NODE, 1, "LongFast", ciphers=ciphers)
+    packet, _ = decode_service_envelope(no_fix, ciphers)
+    assert packet_to_envelope(packet, "farmstead", _config()) == (None, "no_location")
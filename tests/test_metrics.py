@@ -0,0 +1,83 @@
+import threading
+import urllib.request
+
+import pytest
+
+from farmstack.metrics import MetricsRegistry, start_metrics_server
+
+
+def test_metrics_registry_renders_prometheus_text() -> None:
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "Stage time", {"stage": "decode"}, buckets=(0.001, 0.01))
+    dropped = registry.counter("dropped_total", "Drops", {"reason": "duplicate"})
+    registry.gauge("queue_depth", "Depth", lambda: 7)
+
+    stage.observe(0.0005)
+    stage.observe(0.005)
+    stage.observe(0.5)
+    dropped.inc()
+
+    text = registry.render()
+
+    assert 'stage_seconds_bucket{stage="decode",le="0.001"} 1' in text
+    assert 'stage_seconds_bucket{stage="decode",le="0.01"} 2' in text
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="decode"} 3' in text
+    assert 'dropped_total{reason="duplicate"} 1' in text
+    assert "queue_depth 7" in text
+    assert "# TYPE stage_seconds histogram" in text
+
+
+def test_metrics_registry_reuses_series() -> None:
+    registry = MetricsRegistry()
+
+    assert registry.counter("a_total", "A", {"x": "1"}) is registry.counter("a_total", "A", {"x": "1"})
+    assert registry.counter("a_total", "A", {"x": "1"}) is not registry.counter("a_total", "A", {"x": "2"})
+
+
+def test_callback_counters_render_as_counters() -> None:
+    registry = MetricsRegistry()
+    stats = {"sent": 0}
+    registry.callback_counter("frames_sent_total", "Sent", lambda: stats["sent"], {"destination": "tak"})
+    stats["sent"] = 5
+
+    text = registry.render()
+
+    assert "# TYPE frames_sent_total counter" in text
+    assert 'frames_sent_total{destination="tak"} 5' in text
+    with pytest.raises(ValueError, match="already registered as counter"):
+        registry.gauge("frames_sent_total", "Sent", lambda: 0)
+
+
+def test_concurrent_observations_are_not_lost() -> None:
+    registry = MetricsRegistry()
+    stage = registry.histogram("send_seconds", "Send time", buckets=(0.001,))
+    sent = registry.counter("sent_total", "Sent")
+
+    def work() -> None:
+        for _ in range(20000):
+            stage.observe(0.0005)
+            sent.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counts, _, observed = stage.snapshot()
+    assert observed == sum(counts) == 80000
+    assert sent.value == 80000
+
+
+def test_metrics_server_serves_registry() -> None:
+    registry = MetricsRegistry()
+    registry.counter("served_total", "Served").inc(3)
+    server = start_metrics_server(registry, 0, host="127.0.0.1")
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2).read().decode("utf-8")
+    finally:
+        server.shutdown()
+
+    assert "served_total 3" in body
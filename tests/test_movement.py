@@ -0,0 +1,72 @@
+from farmstack.cot import CotEvent
+from farmstack.movement import MovementFilter, haversine_m
+
+
+def _cot(lat: float, lon: float, ts: str, stale: str, ce: float = 4.5) -> CotEvent:
+    return CotEvent(
+        uid="farm.farmstead.tractor-01",
+        type="a-f-G-U-C",
+        time=ts,
+        start=ts,
+        stale=stale,
+        how="m-g",
+        lat=lat,
+        lon=lon,
+        ce=ce,
+    )
+
+
+def _send(movement: MovementFilter, cot: CotEvent) -> bool:
+    admitted = movement.admit(cot)
+    if admitted:
+        movement.sent(cot)
+    return admitted
+
+
+def test_haversine_matches_known_distance() -> None:
+    # One thousandth of a degree of latitude is about 111 m.
+    assert abs(haversine_m(43.0, -76.0, 43.001, -76.0) - 111.2) < 0.5
+    assert haversine_m(43.0, -76.0, 43.0, -76.0) == 0.0
+
+
+def test_movement_filter_suppresses_jitter_within_ce() -> None:
+    movement = MovementFilter(min_distance_m=5.0, ce_factor=1.0, refresh_fraction=0.75)
+
+    assert _send(movement, _cot(43.0, -76.0, "2026-01-19T20:00:00Z", "2026-01-19T20:02:00Z"))
+    # ~3.3 m of GPS jitter with ce 4.5 m.
+    assert not _send(movement, _cot(43.00003, -76.0, "2026-01-19T20:00:10Z", "2026-01-19T20:02:10Z"))
+    # ~8.9 m exceeds a 4.5 m ce, but not a 20 m one.
+    assert not _send(movement, _cot(43.00008, -76.0, "2026-01-19T20:00:20Z", "2026-01-19T20:02:20Z", ce=20.0))
+    assert _send(movement, _cot(43.00008, -76.0, "2026-01-19T20:00:30Z", "2026-01-19T20:02:30Z"))
+
+    assert movement.stats.as_dict() == {"checked": 4, "suppressed": 2, "refreshed": 0}
+
+
+def test_movement_filter_refreshes_before_stale() -> None:
+    movement = MovementFilter(refresh_fraction=0.75)
+
+    assert _send(movement, _cot(43.0, -76.0, "2026-01-19T20:00:00Z", "2026-01-19T20:02:00Z"))
+    assert not _send(movement, _cot(43.0, -76.0, "2026-01-19T20:01:29Z", "2026-01-19T20:03:29Z"))
+    assert _send(movement, _cot(43.0, -76.0, "2026-01-19T20:01:30Z", "2026-01-19T20:03:30Z"))
+    assert movement.stats.refreshed == 1
+
+
+def test_movement_filter_bounds_tracked_uids() -> None:
+    movement = MovementFilter(max_entries=2)
+    for index in range(3):
+        cot = _cot(43.0, -76.0, "2026-01-19T20:00:00Z", "2026-01-19T20:02:00Z")
+        cot.uid = f"uid-{index}"
+        assert _send(movement, cot)
+
+    assert len(movement) == 2
+
+
+def test_movement_filter_measures_from_the_last_sent_point() -> None:
+    movement = MovementFilter(min_distance_m=5.0, ce_factor=1.0)
+
+    assert _send(movement, _cot(43.0, -76.0, "2026-01-19T20:00:00Z", "2026-01-19T20:02:00Z"))
+    # Admitted, then dropped downstream (queue full, shed, conflated away).
+    dropped = _cot(43.0001, -76.0, "2026-01-19T20:00:10Z", "2026-01-19T20:02:10Z")
+    assert movement.admit(dropped)
+    # ~3.3 m from the dropped point but ~14 m from the one TAK has.
+    assert movement.admit(_cot(43.00013, -76.0, "2026-01-19T20:00:20Z", "2026-01-19T20:02:20Z"))
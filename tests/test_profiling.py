@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+
+from farmstack.profiling import Profiler, control_topic
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_cpu_profile_captures_busy_thread(tmp_path) -> None:
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), daemon=True)
+    worker.start()
+    profiler = Profiler("test-svc", output_dir=str(tmp_path), interval_s=0.005)
+    try:
+        assert profiler.trigger("cpu", 0.3)
+        assert not profiler.trigger("memory", 0.1)
+        profiler.join(5)
+    finally:
+        stop.set()
+        worker.join()
+
+    folded = list(tmp_path.glob("test-svc-cpu-*.folded"))
+    assert len(folded) == 1
+    assert "_spin (test_profiling.py:" in folded[0].read_text(encoding="utf-8")
+    assert "_spin" in folded[0].with_suffix(".txt").read_text(encoding="utf-8")
+    assert not profiler.running
+
+
+def test_memory_profile_reports_growth(tmp_path) -> None:
+    retained = []
+    profiler = Profiler("test-svc", output_dir=str(tmp_path))
+
+    assert profiler.handle_control(json.dumps({"data": {"kind": "memory", "duration_s": 0.3}}).encode())
+    deadline = time.monotonic() + 0.2
+    while time.monotonic() < deadline:
+        retained.append(bytearray(4096))
+        time.sleep(0.001)
+    profiler.join(5)
+
+    report = list(tmp_path.glob("test-svc-memory-*.txt"))
+    assert len(report) == 1
+    assert "test_profiling.py" in report[0].read_text(encoding="utf-8")
+
+
+def test_invalid_profile_request_is_ignored(tmp_path) -> None:
+    profiler = Profiler("test-svc", output_dir=str(tmp_path))
+
+    assert not profiler.handle_control(b"not json")
+    assert not profiler.handle_control(b'{"kind": "gpu"}')
+    assert not profiler.running
+    assert control_topic("farmstead", "test-svc") == "farm/farmstead/cmd/test-svc/profile"
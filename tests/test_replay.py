@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import yaml
+
+from farmstack.cot import build_cot_xml
+from farmstack.replay import CotReplayer
+
+
+def _load(name: str) -> dict:
+    return json.loads(Path(f"contracts/examples/{name}").read_text(encoding="utf-8"))
+
+
+def _lines() -> list:
+    tele = _load("tele.position.json")
+    evt = _load("evt.gate-open.json")
+    meta = _load("meta.gate-east.json")
+    return [
+        json.dumps({"topic": "farm/farmstead/meta/gate-east", "payload": meta}),
+        json.dumps(tele),
+        "",
+        "not json",
+        json.dumps(tele),
+        json.dumps({"topic": "farm/farmstead/evt/gate-east/gate/open", "payload": json.dumps(evt)}),
+    ]
+
+
+def test_replay_matches_bridge_pipeline() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    replayer = CotReplayer(config)
+
+    frames = list(replayer.run(_lines(), chunk_size=2))
+
+    tele = _load("tele.position.json")
+    evt = _load("evt.gate-open.json")
+    meta = _load("meta.gate-east.json")
+    assert frames == [
+        (build_cot_xml(tele, None, None, config) + "\n").encode("utf-8"),
+        (build_cot_xml(evt, meta, "gate.open", config) + "\n").encode("utf-8"),
+    ]
+    stats = replayer.stats
+    assert (stats.records, stats.emitted, stats.meta_updates) == (5, 2, 1)
+    assert (stats.invalid_json, stats.duplicate) == (1, 1)
+
+
+def test_replay_dedupe_window_follows_envelope_time() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    tele = _load("tele.position.json")
+    later = dict(tele, ts="2026-01-19T21:15:31Z")
+    replayer = CotReplayer(config, dedupe_window_s=180)
+
+    frames = list(replayer.run([json.dumps(tele), json.dumps(tele), json.dumps(later)]))
+
+    assert len(frames) == 2
+    assert replayer.stats.duplicate == 1
+
+
+def test_replay_dedupe_survives_out_of_order_timestamps() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    tele = _load("tele.position.json")
+    current = dict(tele, id="current")
+    late = dict(tele, id="late", ts="2026-01-19T20:05:31Z")
+    newer = dict(tele, id="newer")
+    # A slow gateway delivers a ten-minute-old record, and both records are
+    # relayed twice.
+    lines = [json.dumps(record) for record in (current, late, current, newer, late)]
+    replayer = CotReplayer(config, dedupe_window_s=180)
+
+    frames = list(replayer.run(lines))
+
+    assert len(frames) == 3
+    assert replayer.stats.duplicate == 2
+
+
+def test_replay_with_worker_processes_preserves_order() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    tele = _load("tele.position.json")
+    lines = [
+        json.dumps(dict(tele, id=f"t{index}", loc=dict(tele["loc"], lat=43.0 + index * 1e-4)))
+        for index in range(50)
+    ]
+
+    inline = list(CotReplayer(config).run(lines, chunk_size=7))
+    pooled = list(CotReplayer(config).run(lines, workers=2, chunk_size=7))
+
+    assert pooled == inline
+    assert len(inline) == 50
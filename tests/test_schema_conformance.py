@@ -0,0 +1,125 @@
+import copy
+import json
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+from jsonschema import Draft202012Validator
+
+from farmstack.schema import SchemaRegistry, default_schema_registry
+from farmstack.schema_codegen import UnsupportedSchema, compile_validators, generate_validators
+
+EXAMPLES = sorted(Path("contracts/examples").glob("*.json"))
+SCHEMAS = sorted(path.name for path in Path("contracts/schemas").glob("*.json"))
+
+_SUBSTITUTES: List[Any] = [None, True, False, 0, 1, 1.0, 1.5, -200, 200, "", "x", [], {}, [1], {"k": 1}]
+
+
+def _mutations(payload: Any, path: Tuple[Any, ...] = ()) -> Iterator[Any]:
+    """Yield copies of ``payload`` with one thing broken at a time."""
+    for value in _SUBSTITUTES:
+        yield _replace(payload, path, value)
+    node = _get(payload, path)
+    if isinstance(node, dict):
+        for key in node:
+            mutated = copy.deepcopy(payload)
+            del _get(mutated, path)[key]
+            yield mutated
+            yield from _mutations(payload, path + (key,))
+        mutated = copy.deepcopy(payload)
+        _get(mutated, path)["unexpected"] = 1
+        yield mutated
+    elif isinstance(node, list):
+        for index in range(len(node)):
+            yield from _mutations(payload, path + (index,))
+
+
+def _get(payload: Any, path: Tuple[Any, ...]) -> Any:
+    for key in path:
+        payload = payload[key]
+    return payload
+
+
+def _replace(payload: Any, path: Tuple[Any, ...], value: Any) -> Any:
+    if not path:
+        return copy.deepcopy(value)
+    mutated = copy.deepcopy(payload)
+    _get(mutated, path[:-1])[path[-1]] = value
+    return mutated
+
+
+@pytest.fixture(scope="module")
+def registry() -> SchemaRegistry:
+    return default_schema_registry()
+
+
+def test_every_contract_schema_compiles(registry: SchemaRegistry) -> None:
+    assert set(registry._fast) == set(SCHEMAS)
+
+
+@pytest.mark.parametrize("schema_name", SCHEMAS)
+@pytest.mark.parametrize("example", EXAMPLES, ids=lambda path: path.name)
+def test_generated_validator_agrees_with_jsonschema(
+    registry: SchemaRegistry, schema_name: str, example: Path
+) -> None:
+    fast = registry._fast[schema_name]
+    reference = registry.validator(schema_name)
+    payload = json.loads(example.read_text(encoding="utf-8"))
+
+    checked = 0
+    for candidate in [payload, *_mutations(payload)]:
+        expected = reference.is_valid(candidate)
+        assert fast(candidate) == expected, json.dumps(candidate, sort_keys=True)
+        checked += 1
+    assert checked > 1
+
+
+def test_examples_match_their_class_schema(registry: SchemaRegistry) -> None:
+    for example in EXAMPLES:
+        payload = json.loads(example.read_text(encoding="utf-8"))
+        if "class" in payload:
+            assert registry.is_valid(f"{payload['class']}.v1.schema.json", payload), example.name
+
+
+def test_validate_falls_back_to_jsonschema_for_errors(registry: SchemaRegistry) -> None:
+    payload = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+    payload["loc"]["lat"] = 91
+    del payload["site"]
+
+    with pytest.raises(ValueError) as excinfo:
+        registry.validate("tele.v1.schema.json", payload)
+    assert "'site' is a required property" in str(excinfo.value)
+    assert "91 is greater than the maximum of 90" in str(excinfo.value)
+
+
+def test_keyword_semantics_match_jsonschema() -> None:
+    schema = {
+        "type": "object",
+        "properties": {
+            "n": {"type": "integer", "minimum": 0, "exclusiveMaximum": 10},
+            "c": {"const": 1},
+            "e": {"enum": ["a", 2, None]},
+            "s": {"type": ["string", "null"], "minLength": 2, "maxLength": 3},
+            "a": {"type": "array", "items": {"type": "number"}, "minItems": 1},
+            "o": {"type": "object", "additionalProperties": {"type": "string"}},
+        },
+    }
+    fast = compile_validators({"s": schema})["s"]
+    reference = Draft202012Validator(schema)
+    candidates = [
+        {"n": 0}, {"n": 10}, {"n": 2.0}, {"n": 2.5}, {"n": True}, {"n": -1},
+        {"c": 1}, {"c": 1.0}, {"c": True}, {"c": "1"},
+        {"e": "a"}, {"e": 2.0}, {"e": None}, {"e": False}, {"e": "b"},
+        {"s": None}, {"s": "ab"}, {"s": "a"}, {"s": "abcd"}, {"s": 5},
+        {"a": []}, {"a": [1, 2.5]}, {"a": [True]}, {"a": "x"},
+        {"o": {}}, {"o": {"k": "v"}}, {"o": {"k": 1}}, [], "x",
+    ]
+    for candidate in candidates:
+        assert fast(candidate) == reference.is_valid(candidate), candidate
+
+
+def test_unsupported_keywords_are_left_to_jsonschema() -> None:
+    schema = {"type": "string", "pattern": "^a"}
+    with pytest.raises(UnsupportedSchema):
+        generate_validators({"s": schema})
+    assert compile_validators({"s": schema}) == {}
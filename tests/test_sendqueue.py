@@ -0,0 +1,127 @@
+import threading
+import time
+
+from farmstack.sendqueue import PrioritySendQueue, SendWorkers, StaleShedder
+
+
+def test_send_queue_drains_alerts_before_positions() -> None:
+    queue = PrioritySendQueue(max_depth=10)
+    queue.put("tele-1", 1)
+    queue.put("tele-2", 1)
+    queue.put("evt-1", 0)
+
+    assert [queue.get(0), queue.get(0), queue.get(0)] == ["evt-1", "tele-1", "tele-2"]
+    assert queue.get(0) is None
+    assert queue.stats.dequeued == 3
+    assert queue.stats.max_depth == 3
+
+
+def test_send_queue_drop_oldest_never_evicts_higher_priority() -> None:
+    queue = PrioritySendQueue(max_depth=2, overflow="drop_oldest")
+    queue.put("evt-1", 0)
+    queue.put("tele-1", 1)
+
+    assert queue.put("evt-2", 0)
+    assert not queue.put("tele-2", 1)
+    assert [queue.get(0), queue.get(0)] == ["evt-1", "evt-2"]
+    assert queue.stats.dropped == {"evicted": 1, "rejected": 1}
+
+
+def test_send_queue_drop_new_and_block_timeout() -> None:
+    drop_new = PrioritySendQueue(max_depth=1, overflow="drop_new")
+    assert drop_new.put("a", 0)
+    assert not drop_new.put("b", 0)
+    assert drop_new.get(0) == "a"
+
+    block = PrioritySendQueue(max_depth=1, overflow="block", block_timeout_s=0.01)
+    assert block.put("a", 0)
+    assert not block.put("b", 0)
+    assert block.stats.dropped == {"block_timeout": 1}
+
+
+def test_send_workers_deliver_everything() -> None:
+    queue = PrioritySendQueue(max_depth=100)
+    received = []
+    done = threading.Event()
+
+    def send(item: str) -> None:
+        received.append(item)
+        if len(received) == 50:
+            done.set()
+
+    workers = SendWorkers(queue, send, workers=2)
+    workers.start()
+    for i in range(50):
+        queue.put(f"cot-{i}", i % 2)
+    assert done.wait(2.0)
+    workers.stop()
+
+    assert sorted(received) == sorted(f"cot-{i}" for i in range(50))
+    assert queue.stats.wait_s_max >= 0.0
+
+
+def test_send_queue_batches_within_byte_budget() -> None:
+    queue = PrioritySendQueue(max_depth=100)
+    for i in range(5):
+        queue.put(f"cot-{i}", 1)
+
+    assert queue.get_batch(0, window_s=0.0, max_bytes=12) == ["cot-0", "cot-1", "cot-2"]
+    assert queue.get_batch(0, window_s=0.0, max_bytes=1000) == ["cot-3", "cot-4"]
+    assert queue.get_batch(0, window_s=0.0, max_bytes=1000) == []
+    assert queue.stats.batches == 2
+
+
+def test_send_queue_batch_window_collects_late_arrivals() -> None:
+    queue = PrioritySendQueue(max_depth=100)
+    queue.put("first", 1)
+    timer = threading.Timer(0.02, queue.put, args=("late", 1))
+    timer.start()
+
+    batch = queue.get_batch(0, window_s=0.5, max_bytes=1000)
+    timer.join()
+
+    assert batch == ["first", "late"]
+
+
+def test_send_queue_sheds_expired_items() -> None:
+    queue = PrioritySendQueue(max_depth=100)
+    now = time.time()
+    queue.put("stale-pos", 1, expires_at=now - 1)
+    queue.put("alert", 0)
+    queue.put("live-pos", 1, expires_at=now + 60)
+    queue.put("stale-pos-2", 1, expires_at=now - 1)
+
+    assert queue.get(0) == "alert"
+    assert queue.get_batch(0, window_s=0.0, max_bytes=1000) == ["live-pos"]
+    assert queue.get(0) is None
+    assert queue.stats.dropped == {"stale": 2}
+    assert len(queue) == 0
+
+
+def test_stale_shedder_keeps_live_positions_from_a_slow_clock(clock) -> None:
+    shedder = StaleShedder(after_connect_s=30, queue_depth=100, clock=clock)
+    shedder.connected()
+    clock.now += 60
+    # The producer's clock is ten minutes behind, so its positions arrive
+    # already past their stale time; live traffic is still sent.
+    stale_at = clock.now - 600 + 300
+
+    assert shedder.deadline(stale_at) is None
+    assert shedder.deadline(stale_at, depth=99) is None
+    assert not shedder.expired(shedder.deadline(stale_at))
+
+
+def test_stale_shedder_sheds_only_while_draining_a_backlog(clock) -> None:
+    shedder = StaleShedder(grace_s=5, after_connect_s=30, queue_depth=100, clock=clock)
+    stale_at = clock.now - 1
+
+    assert shedder.expired(shedder.deadline(stale_at, retained=True))
+    assert shedder.expired(shedder.deadline(stale_at, depth=100))
+    assert shedder.deadline(clock.now + 60, depth=100) == clock.now + 55
+    assert not shedder.expired(shedder.deadline(clock.now + 60, depth=100))
+
+    shedder.connected()
+    clock.now += 29
+    assert shedder.expired(shedder.deadline(stale_at))
+    clock.now += 1
+    assert shedder.deadline(stale_at) is None
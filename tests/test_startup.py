@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from farmstack.schema import SchemaRegistry
+from farmstack.startup import StartupTimer, process_age_s
+
+SCHEMAS = Path("contracts/schemas")
+
+
+def test_schema_cache_round_trip(tmp_path: Path) -> None:
+    cold = SchemaRegistry(SCHEMAS, cache_dir=tmp_path)
+    warm = SchemaRegistry(SCHEMAS, cache_dir=tmp_path)
+
+    assert not cold.cache_hit
+    assert warm.cache_hit
+    assert [path.name for path in tmp_path.iterdir()] == [f"schemas-{cold.digest[:16]}.marshal"]
+
+    payload = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+    warm.validate("tele.v1.schema.json", payload)
+    payload["loc"]["lat"] = 91
+    with pytest.raises(ValueError, match="greater than the maximum"):
+        warm.validate("tele.v1.schema.json", payload)
+
+
+def test_schema_cache_is_keyed_by_content(tmp_path: Path) -> None:
+    schemas = tmp_path / "schemas"
+    schemas.mkdir()
+    for path in SCHEMAS.glob("*.json"):
+        (schemas / path.name).write_bytes(path.read_bytes())
+    first = SchemaRegistry(schemas, cache_dir=tmp_path / "cache")
+
+    envelope = json.loads((schemas / "envelope.v1.schema.json").read_text(encoding="utf-8"))
+    envelope["properties"]["site"]["minLength"] = 20
+    (schemas / "envelope.v1.schema.json").write_text(json.dumps(envelope), encoding="utf-8")
+    second = SchemaRegistry(schemas, cache_dir=tmp_path / "cache")
+
+    assert second.digest != first.digest
+    assert not second.cache_hit
+    payload = json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+    assert first.is_valid("tele.v1.schema.json", payload)
+    assert not second.is_valid("tele.v1.schema.json", payload)
+
+
+def test_corrupt_schema_cache_is_rebuilt(tmp_path: Path) -> None:
+    registry = SchemaRegistry(SCHEMAS, cache_dir=tmp_path)
+    (tmp_path / f"schemas-{registry.digest[:16]}.marshal").write_bytes(b"not marshal data")
+
+    rebuilt = SchemaRegistry(SCHEMAS, cache_dir=tmp_path)
+    assert not rebuilt.cache_hit
+    assert SchemaRegistry(SCHEMAS, cache_dir=tmp_path).cache_hit
+
+
+def test_schema_cache_writable_by_others_is_ignored(tmp_path: Path) -> None:
+    registry = SchemaRegistry(SCHEMAS, cache_dir=tmp_path)
+    cached = tmp_path / f"schemas-{registry.digest[:16]}.marshal"
+    cached.chmod(0o666)
+
+    assert not SchemaRegistry(SCHEMAS, cache_dir=tmp_path).cache_hit
+    assert cached.stat().st_mode & 0o777 == 0o600
+    assert SchemaRegistry(SCHEMAS, cache_dir=tmp_path).cache_hit
+
+
+def test_startup_timer_reports_once(caplog: pytest.LogCaptureFixture) -> None:
+    timer = StartupTimer("svc")
+    timer.mark("config")
+    with caplog.at_level("INFO"):
+        timer.first_message()
+        timer.first_message()
+
+    phases = [phase for phase, _ in timer.phases]
+    assert phases[-2:] == ["config", "first_message"]
+    assert ("imports" in phases) == (process_age_s() is not None)
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage().startswith("svc startup ")
@@ -0,0 +1,143 @@
+import socket
+import threading
+import time
+from typing import List
+
+import pytest
+
+from farmstack.transport import StreamConnection
+
+
+class _LineServer:
+    def __init__(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.accepted = 0
+        self.lines: List[bytes] = []
+        self.conns: List[socket.socket] = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            self.conns.append(conn)
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn: socket.socket) -> None:
+        buf = b""
+        while True:
+            try:
+                chunk = conn.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                self.lines.append(line)
+
+    def wait_for(self, count: int) -> None:
+        deadline = time.monotonic() + 2.0
+        while len(self.lines) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def drop_clients(self) -> None:
+        for conn in self.conns:
+            conn.shutdown(socket.SHUT_RDWR)
+            conn.close()
+        self.conns.clear()
+
+
+def test_stream_connection_reuses_one_socket() -> None:
+    server = _LineServer()
+    conn = StreamConnection("127.0.0.1", server.port)
+
+    for i in range(20):
+        conn.send(f"msg-{i}\n".encode("utf-8"))
+    server.wait_for(20)
+    conn.close()
+
+    assert server.accepted == 1
+    assert server.lines == [f"msg-{i}".encode("utf-8") for i in range(20)]
+    assert conn.stats.frames_sent == 20
+    assert conn.stats.bytes_sent == sum(len(f"msg-{i}\n") for i in range(20))
+    assert conn.stats.reconnects == 0
+
+
+def test_stream_connection_reconnects_after_peer_close() -> None:
+    server = _LineServer()
+    conn = StreamConnection("127.0.0.1", server.port)
+
+    conn.send(b"first\n")
+    server.wait_for(1)
+    server.drop_clients()
+    time.sleep(0.05)
+    conn.send(b"second\n")
+    server.wait_for(2)
+    conn.close()
+
+    assert server.lines == [b"first", b"second"]
+    assert server.accepted == 2
+    assert conn.stats.reconnects == 1
+
+
+def test_stream_connection_backs_off_when_unreachable() -> None:
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    conn = StreamConnection("127.0.0.1", port, backoff_initial_s=10.0)
+    with pytest.raises(OSError):
+        conn.send(b"lost\n")
+    with pytest.raises(ConnectionError, match="next reconnect"):
+        conn.send(b"lost\n")
+
+    assert conn.stats.connect_failures == 1
+
+
+def test_stream_connection_sends_heartbeats_when_idle() -> None:
+    server = _LineServer()
+    conn = StreamConnection(
+        "127.0.0.1",
+        server.port,
+        heartbeat_s=0.1,
+        heartbeat_payload=lambda: b"ping\n",
+    )
+
+    conn.send(b"hello\n")
+    server.wait_for(3)
+    conn.close()
+
+    assert server.lines[0] == b"hello"
+    assert b"ping" in server.lines[1:]
+    assert conn.stats.heartbeats >= 1
+
+
+@pytest.mark.parametrize("retries", [0, 1])
+def test_stream_connection_retries_failed_writes(retries: int) -> None:
+    attempts = []
+
+    class _Broken:
+        def sendall(self, data: bytes) -> None:
+            attempts.append(data)
+            raise BrokenPipeError("gone")
+
+        def close(self) -> None:
+            pass
+
+    conn = StreamConnection("127.0.0.1", 9, retries=retries)
+    conn._ensure_connected = lambda: _Broken()
+    with pytest.raises(OSError):
+        conn.send(b"lost\n")
+
+    assert len(attempts) == retries + 1
+    assert conn.stats.send_failures == retries + 1
@@ -0,0 +1,53 @@
+import copy
+import json
+from pathlib import Path
+
+from farmstack.schema import default_schema_registry
+
+
+def _examples() -> list:
+    return [
+        json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(Path("contracts/examples").glob("*.json"))
+        if "class" in json.loads(path.read_text(encoding="utf-8"))
+    ]
+
+
+def _batch() -> list:
+    payloads = _examples()
+    bad_lat = copy.deepcopy(payloads[-1])
+    bad_lat["loc"]["lat"] = 91
+    no_site = copy.deepcopy(payloads[0])
+    del no_site["site"]
+    return payloads + [bad_lat, no_site, {"class": "nope"}, "not an object", bad_lat]
+
+
+def test_validate_many_reports_items_and_aggregates() -> None:
+    registry = default_schema_registry()
+    payloads = _batch()
+    valid = len(payloads) - 5
+
+    result = registry.validate_many(payloads, chunk_size=3)
+
+    assert [item.index for item in result.items] == list(range(len(payloads)))
+    assert all(item.valid for item in result.items[:valid])
+    assert (result.valid, result.invalid) == (valid, 5)
+    assert result.by_schema_path == {
+        "tele.v1.schema.json#/allOf/0/properties/loc/properties/lat/maximum": 2,
+        f"{result.items[valid + 1].schema}#/allOf/0/required": 1,
+        "class": 2,
+    }
+    assert result.items[valid].errors[0][1] == "91 is greater than the maximum of 90"
+    assert result.items[-2].schema is None
+
+
+def test_validate_many_with_fixed_schema_and_process_pool() -> None:
+    registry = default_schema_registry()
+    payloads = _batch()
+
+    serial = registry.validate_many(payloads, schema_filename="tele.v1.schema.json", chunk_size=2)
+    pooled = registry.validate_many(payloads, schema_filename="tele.v1.schema.json", chunk_size=2, workers=2)
+
+    assert pooled == serial
+    assert all(item.schema == "tele.v1.schema.json" for item in serial.items)
+    assert serial.valid == sum(payload.get("class") == "tele" for payload in _examples())
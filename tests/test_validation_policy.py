@@ -0,0 +1,103 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+from farmstack.schema import (
+    SchemaRegistry,
+    ValidationPolicy,
+    build_validator,
+    default_schema_registry,
+    payload_shape,
+)
+
+
+def _tele() -> dict:
+    return json.loads(Path("contracts/examples/tele.position.json").read_text(encoding="utf-8"))
+
+
+def test_payload_shape_ignores_values_but_not_types() -> None:
+    first, second = _tele(), _tele()
+    second["loc"]["lat"] = 10.0
+    assert payload_shape(first) == payload_shape(second)
+
+    second["loc"]["lat"] = "10"
+    assert payload_shape(first) != payload_shape(second)
+
+
+def test_trusted_source_is_sampled_after_warmup() -> None:
+    payload = _tele()
+    # Without the generated fast path a full check clearly costs more than
+    # fingerprinting, so the net saving is positive.
+    policy = ValidationPolicy(
+        SchemaRegistry(Path("contracts/schemas"), fast_path=False),
+        trusted_sources=[payload["src"]["system"]],
+        warmup=5,
+        sample_rate=0.0,
+        rng=random.Random(1),
+    )
+    for _ in range(20):
+        policy.validate("tele.v1.schema.json", payload)
+
+    assert policy.stats.validated == 5
+    assert policy.stats.skipped == 15
+    assert policy.stats.saved_s > 0
+
+
+def test_untrusted_source_is_always_validated() -> None:
+    policy = ValidationPolicy(default_schema_registry(), trusted_sources=["meshtastic"], warmup=1, sample_rate=0.0)
+    payload = _tele()
+    payload["src"]["system"] = "ha"
+    for _ in range(5):
+        policy.validate("tele.v1.schema.json", payload)
+    assert policy.stats.validated == 5
+    assert policy.stats.skipped == 0
+
+
+def test_new_shape_and_failures_return_to_full_validation() -> None:
+    payload = _tele()
+    source = payload["src"]["system"]
+    policy = ValidationPolicy(default_schema_registry(), trusted_sources=[source], warmup=2, sample_rate=1.0)
+
+    broken = _tele()
+    broken["loc"]["lat"] = 500.0  # same shape, sampled check catches it
+    policy.validate("tele.v1.schema.json", payload)
+    policy.validate("tele.v1.schema.json", payload)
+    with pytest.raises(ValueError):
+        policy.validate("tele.v1.schema.json", broken)
+    assert policy.stats.failures == 1
+
+    policy.sample_rate = 0.0
+    policy.validate("tele.v1.schema.json", payload)
+    policy.validate("tele.v1.schema.json", payload)
+    assert policy.stats.skipped == 0
+    policy.validate("tele.v1.schema.json", payload)
+    assert policy.stats.skipped == 1
+
+    reshaped = _tele()
+    reshaped["loc"]["lat"] = "bad"
+    with pytest.raises(ValueError):
+        policy.validate("tele.v1.schema.json", reshaped)
+
+
+def test_shipped_config_validates_everything() -> None:
+    config = yaml.safe_load(Path("configs/mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    registry = default_schema_registry()
+
+    assert config["validation"]["mode"] == "full"
+    assert build_validator(registry, config["validation"]) is registry
+    assert build_validator(registry, None) is registry
+
+
+def test_sampled_mode_is_opt_in() -> None:
+    registry = default_schema_registry()
+    policy = build_validator(
+        registry, {"mode": "sampled", "trusted_sources": ["meshtastic"], "warmup": 3, "sample_rate": 0.5}
+    )
+
+    assert isinstance(policy, ValidationPolicy)
+    assert (policy.trusted_sources, policy.warmup, policy.sample_rate) == (frozenset(["meshtastic"]), 3, 0.5)
+    with pytest.raises(ValueError, match="unknown validation mode"):
+        build_validator(registry, {"mode": "never"})
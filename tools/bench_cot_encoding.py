@@ -0,0 +1,59 @@
+"""
+Compare CoT XML and TAK Protocol v1 protobuf encodings: bytes per event and encode time.
+
+Usage:
+    python tools/bench_cot_encoding.py [--events 20000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.cot import resolve_cot_event  # noqa: E402
+from farmstack.cot_proto import COT_FORMATS, encode_cot  # noqa: E402
+
+
+def _events(count: int) -> list:
+    config = yaml.safe_load((ROOT / "configs" / "mqtt-cot-bridge.yaml").read_text(encoding="utf-8"))
+    tele = json.loads((ROOT / "contracts" / "examples" / "tele.position.json").read_text(encoding="utf-8"))
+    evt = json.loads((ROOT / "contracts" / "examples" / "evt.gate-open.json").read_text(encoding="utf-8"))
+    meta = json.loads((ROOT / "contracts" / "examples" / "meta.gate-east.json").read_text(encoding="utf-8"))
+    events = []
+    for index in range(count):
+        if index % 10 == 0:
+            events.append(resolve_cot_event(evt, meta, "gate.open", config))
+            continue
+        envelope = dict(tele, loc=dict(tele["loc"], lat=tele["loc"]["lat"] + index * 1e-6))
+        envelope["asset"] = dict(tele["asset"], id=f"tractor-{index % 250:03d}")
+        events.append(resolve_cot_event(envelope, None, None, config))
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    events = _events(args.events)
+    print(f"{'format':<8} {'bytes/event':>12} {'us/event':>10} {'events/s':>12}")
+    for fmt in COT_FORMATS:
+        start = time.perf_counter()
+        total = 0
+        for cot in events:
+            total += len(encode_cot(cot, fmt))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{fmt:<8} {total / len(events):>12.1f} {elapsed / len(events) * 1e6:>10.2f} "
+            f"{len(events) / elapsed:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark duplicate detection: ids per second for the previous full-scan
+DedupeCache, the O(1) DedupeCache and the rotating Bloom filter mode.
+
+Usage:
+    python tools/bench_dedupe.py [--ids 200000] [--max-entries 50000]
+"""
+
+import argparse
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.dedupe import BloomDedupeCache, DedupeCache  # noqa: E402
+
+
+class LegacyDedupeCache:
+    """The pre-rework implementation: scans every entry on each call."""
+
+    def __init__(self, max_entries: int, window_s: int) -> None:
+        self.max_entries = max_entries
+        self.window_s = window_s
+        self._cache: OrderedDict = OrderedDict()
+
+    def seen(self, message_id: str) -> bool:
+        now = time.time()
+        if message_id in self._cache:
+            if now - self._cache[message_id] <= self.window_s:
+                return True
+        self._cache[message_id] = now
+        self._evict(now)
+        return False
+
+    def _evict(self, now: float) -> None:
+        while self._cache and len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        stale_keys = [key for key, ts in self._cache.items() if now - ts > self.window_s]
+        for key in stale_keys:
+            self._cache.pop(key, None)
+
+
+def _run(name: str, cache, ids: list) -> None:
+    start = time.perf_counter()
+    duplicates = 0
+    for message_id in ids:
+        duplicates += cache.seen(message_id)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {len(ids) / elapsed:>14,.0f} ids/s  duplicates={duplicates}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ids", type=int, default=200000)
+    parser.add_argument("--max-entries", type=int, default=50000)
+    parser.add_argument("--legacy-ids", type=int, default=20000, help="the legacy cache is O(n) per id")
+    args = parser.parse_args()
+
+    # Every fifth id repeats one seen shortly before, like QoS1 redeliveries.
+    ids = [f"msg-{i - 3 if i % 5 == 0 else i}" for i in range(args.ids)]
+    _run("legacy", LegacyDedupeCache(args.max_entries, 180), ids[: args.legacy_ids])
+    _run("exact", DedupeCache(args.max_entries, 180), ids)
+    _run("bloom", BloomDedupeCache(args.max_entries, 180), ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measure geofence lookups per second against the mission-package overlays.
+
+Usage:
+    python tools/bench_geofence.py [--points 50000] [--zones mission-packages/Ag_Parcels_Mission/overlays]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.geofence import GeofenceIndex, load_zones  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument(
+        "--zones",
+        nargs="+",
+        default=[str(ROOT / "mission-packages" / "Ag_Parcels_Mission" / "overlays")],
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    zones = load_zones(args.zones)
+    loaded = time.perf_counter()
+    index = GeofenceIndex(zones)
+    indexed = time.perf_counter()
+    polygons = sum(len(zone.polygons) for zone in zones)
+    vertices = sum(len(ring) for zone in zones for rings in zone.polygons for ring in rings)
+    print(f"{len(zones)} zones, {polygons} polygons, {vertices} vertices")
+    print(f"load {loaded - start:.2f}s, index {indexed - loaded:.2f}s")
+
+    outer = [point for zone in zones for rings in zone.polygons for point in rings[0]]
+    min_lon, max_lon = min(x for x, _ in outer), max(x for x, _ in outer)
+    min_lat, max_lat = min(y for _, y in outer), max(y for _, y in outer)
+    rng = random.Random(7)
+    points = [(rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for _ in range(args.points)]
+
+    start = time.perf_counter()
+    hits = sum(1 for lat, lon in points if index.zones_at(lat, lon))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.points} lookups in {elapsed:.2f}s: {args.points / elapsed:.0f} positions/s, "
+        f"{elapsed / args.points * 1e6:.1f} us each, {hits} inside a zone"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compare Meshtastic position ingest: JSON uplink versus protobuf ServiceEnvelopes.
+
+Times each normalizer path from the MQTT payload bytes to a tele envelope:
+JSON decode plus ``normalize_meshtastic``, and ServiceEnvelope decode plus
+``packet_to_envelope``. The protobuf path runs on an unencrypted channel, on
+the default-key channel with the cached per-channel cipher, and with a new
+AES-CTR cipher per packet.
+
+Usage:
+    python tools/bench_meshtastic_ingest.py [--packets 20000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.meshtastic import normalize_meshtastic  # noqa: E402
+from farmstack.meshtastic_proto import (  # noqa: E402
+    ChannelCiphers,
+    decode_service_envelope,
+    encode_service_envelope,
+    load_protobufs,
+    packet_to_envelope,
+)
+
+SENT = 1768854090
+
+
+class PerPacketCiphers(ChannelCiphers):
+    """What the cache replaces: a new AES-CTR cipher for every packet."""
+
+    def decrypt(self, channel: str, packet_id: int, from_node: int, data: bytes) -> bytes:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        nonce = packet_id.to_bytes(8, "little") + from_node.to_bytes(4, "little") + bytes(4)
+        return Cipher(algorithms.AES(self.keys[channel]), modes.CTR(nonce)).encryptor().update(data)
+
+
+def _packets(count: int, channel: str, ciphers: ChannelCiphers) -> tuple:
+    pb = load_protobufs()
+    rng = random.Random(7)
+    json_payloads, proto_payloads = [], []
+    for index in range(count):
+        node = rng.randrange(1, 2**32)
+        lat, lon, alt = rng.uniform(42.9, 43.1), rng.uniform(-76.3, -76.0), rng.randrange(100, 200)
+        position = pb.mesh.Position(
+            latitude_i=round(lat * 1e7), longitude_i=round(lon * 1e7), altitude=alt, time=SENT + index
+        )
+        proto_payloads.append(
+            encode_service_envelope("position", position, node, index, channel, "!0000beef", ciphers, rx_rssi=-105)
+        )
+        raw = {
+            "id": f"{node:08x}-{index:08x}",
+            "timestamp": "2026-01-19T20:21:30Z",
+            "from": f"!{node:08x}",
+            "node": f"!{node:08x}",
+            "payload": {
+                "latitude": position.latitude_i * 1e-7,
+                "longitude": position.longitude_i * 1e-7,
+                "altitude": alt,
+                "battery_level": 87,
+                "rssi": -105,
+            },
+        }
+        json_payloads.append(json.dumps(raw).encode("utf-8"))
+    return json_payloads, proto_payloads
+
+
+def _report(label: str, payloads: list, elapsed: float, emitted: int) -> None:
+    size = sum(len(payload) for payload in payloads) / len(payloads)
+    print(
+        f"{label:>18}: {len(payloads) / elapsed:>8.0f} packets/s, {elapsed / len(payloads) * 1e6:5.1f}us each, "
+        f"{size:.0f} B/packet, {emitted} envelopes"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packets", type=int, default=20000)
+    args = parser.parse_args()
+
+    config = {"asset_kind_default": "meshtastic-node", "loc_defaults": {"ce_m": 10.0, "le_m": 15.0}}
+    channels = {"LongFast": "AQ==", "Open": "AA=="}
+    cached = ChannelCiphers(channels)
+
+    json_payloads, open_payloads = _packets(args.packets, "Open", cached)
+    start = time.perf_counter()
+    emitted = sum(1 for payload in json_payloads if normalize_meshtastic(json.loads(payload), "farmstead", config))
+    _report("json", json_payloads, time.perf_counter() - start, emitted)
+
+    _, encrypted_payloads = _packets(args.packets, "LongFast", cached)
+    for label, payloads, ciphers in (
+        ("protobuf", open_payloads, cached),
+        ("protobuf+aes", encrypted_payloads, cached),
+        ("protobuf+aes/packet", encrypted_payloads, PerPacketCiphers(channels)),
+    ):
+        start = time.perf_counter()
+        emitted = 0
+        for payload in payloads:
+            packet, _ = decode_service_envelope(payload, ciphers)
+            if packet is not None and packet_to_envelope(packet, "farmstead", config)[0] is not None:
+                emitted += 1
+        _report(label, payloads, time.perf_counter() - start, emitted)
+
+
+if __name__ == "__main__":
+    main()
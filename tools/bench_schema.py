@@ -0,0 +1,53 @@
+"""
+Compare generated schema validators with jsonschema on the contract examples.
+
+Times ``SchemaRegistry.validate`` with and without the generated fast path
+for every example envelope whose class has a schema, and a sampled
+``ValidationPolicy`` that trusts every source in front of each.
+
+Usage:
+    python tools/bench_schema.py [--iterations 5000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.schema import SchemaRegistry, ValidationPolicy  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    base_dir = ROOT / "contracts" / "schemas"
+    cases = []
+    for path in sorted((ROOT / "contracts" / "examples").glob("*.json")):
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if "class" in payload:
+            cases.append((f"{payload['class']}.v1.schema.json", payload))
+
+    sources = {payload.get("src", {}).get("system") for _, payload in cases}
+    for label, registry in (
+        ("jsonschema", SchemaRegistry(base_dir, fast_path=False)),
+        ("generated", SchemaRegistry(base_dir)),
+        ("sampled+js", ValidationPolicy(SchemaRegistry(base_dir, fast_path=False), trusted_sources=sources)),
+        ("sampled+gen", ValidationPolicy(SchemaRegistry(base_dir), trusted_sources=sources)),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for schema_name, payload in cases:
+                registry.validate(schema_name, payload)
+        elapsed = time.perf_counter() - start
+        count = args.iterations * len(cases)
+        print(f"{label:>11}: {count} validations in {elapsed:.2f}s ({elapsed / count * 1e6:.1f}us each)")
+
+
+if __name__ == "__main__":
+    main()
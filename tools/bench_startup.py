@@ -0,0 +1,79 @@
+"""
+Measure service start-up: interpreter plus imports, and schema registry build.
+
+Each service module is imported in a fresh interpreter, then the schema
+registry is built once with an empty cache directory and once with the
+cache that run left behind, as after a restart.
+
+Usage:
+    python tools/bench_startup.py [--runs 3] [--service mqtt-cot-bridge ...]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SERVICES = ("mqtt-cot-bridge", "meshtastic-normalizer", "mqtt-farmos-logger", "geofence-engine")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from farmstack.schema import default_schema_registry
+registry = default_schema_registry()
+built = time.perf_counter()
+print(json.dumps({
+    "imports_s": imported - started,
+    "schemas_s": built - imported,
+    "cache_hit": registry.cache_hit,
+    "jsonschema_loaded": "jsonschema" in sys.modules,
+}))
+"""
+
+
+def probe(service: str, cache_dir: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT), str(ROOT / "services" / service)])
+    env["SCHEMA_CACHE_DIR"] = cache_dir
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], env=env, cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - started
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--service", action="append", choices=SERVICES)
+    args = parser.parse_args()
+
+    print(f"{'service':<24}{'cache':<7}{'process':>9}{'imports':>9}{'schemas':>9}  jsonschema")
+    for service in args.service or SERVICES:
+        for label in ("cold", "warm"):
+            best = None
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    result = probe(service, cache_dir)
+                    if label == "warm":
+                        result = probe(service, cache_dir)
+                if best is None or result["process_s"] < best["process_s"]:
+                    best = result
+            print(
+                f"{service:<24}{label:<7}{best['process_s'] * 1000:>7.0f}ms{best['imports_s'] * 1000:>7.0f}ms"
+                f"{best['schemas_s'] * 1000:>7.1f}ms  {'loaded' if best['jsonschema_loaded'] else 'lazy'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Replay recorded envelopes (JSONL) through the CoT bridge pipeline without a broker.
+
+Each input line is an envelope or a capture record {"topic": ..., "payload": ...}.
+Output goes to a file, stdout ("-"), or a TAK endpoint (tcp://host:port or
+udp://host:port). Throughput and drop counts are printed to stderr at the end.
+
+Usage:
+    python tools/cot_replay.py capture.jsonl [-o out.xml|-|tcp://host:8087] \
+        [--format xml|stream|mesh] [--workers 4] [--config configs/mqtt-cot-bridge.yaml]
+"""
+
+import argparse
+import gzip
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.cot_proto import COT_FORMATS  # noqa: E402
+from farmstack.replay import DROP_REASONS, CotReplayer  # noqa: E402
+from farmstack.transport import StreamConnection  # noqa: E402
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    if path == "-":
+        yield from sys.stdin
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        yield from handle
+
+
+def _write_file(frames: Iterator[bytes], handle: BinaryIO) -> None:
+    for frame in frames:
+        handle.write(frame)
+    handle.flush()
+
+
+def _write_tcp(frames: Iterator[bytes], host: str, port: int, flush_bytes: int = 65536) -> None:
+    connection = StreamConnection(host, port)
+    batch: List[bytes] = []
+    size = 0
+    try:
+        for frame in frames:
+            batch.append(frame)
+            size += len(frame)
+            if size >= flush_bytes:
+                connection.send(b"".join(batch))
+                batch, size = [], 0
+        if batch:
+            connection.send(b"".join(batch))
+    finally:
+        connection.close()
+
+
+def _write_udp(frames: Iterator[bytes], host: str, port: int) -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect((host, port))
+        for frame in frames:
+            sock.send(frame)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file (.gz allowed) or - for stdin")
+    parser.add_argument("-o", "--output", default="-")
+    parser.add_argument("--format", choices=COT_FORMATS, default="xml")
+    parser.add_argument("--config", default=str(ROOT / "configs" / "mqtt-cot-bridge.yaml"))
+    parser.add_argument("--workers", type=int, default=0, help="decode/validate processes (0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    config = yaml.safe_load(Path(args.config).read_text(encoding="utf-8")) or {}
+    dedupe = config.get("dedupe", {})
+    udp = args.output.startswith("udp://")
+    replayer = CotReplayer(
+        config,
+        fmt=args.format,
+        # A datagram carries exactly one event, so it needs no delimiter.
+        delimiter=b"" if udp else b"\n",
+        dedupe_entries=dedupe.get("max_entries", 512),
+        dedupe_window_s=dedupe.get("window_s", 180),
+    )
+    frames = replayer.run(_read_lines(args.input), workers=args.workers, chunk_size=args.chunk_size)
+
+    start = time.perf_counter()
+    if args.output.startswith(("tcp://", "udp://")):
+        host, _, port = args.output.split("://", 1)[1].rpartition(":")
+        if udp:
+            _write_udp(frames, host, int(port))
+        else:
+            _write_tcp(frames, host, int(port))
+    elif args.output == "-":
+        _write_file(frames, sys.stdout.buffer)
+    else:
+        with open(args.output, "wb") as handle:
+            _write_file(frames, handle)
+    elapsed = time.perf_counter() - start
+
+    stats = replayer.stats
+    rate = stats.records / elapsed if elapsed else 0.0
+    print(
+        f"{stats.records} records -> {stats.emitted} CoT ({stats.bytes_out} bytes) in {elapsed:.2f}s: "
+        f"{rate:.0f} records/s, {stats.bytes_out / elapsed / 1e6 if elapsed else 0.0:.2f} MB/s",
+        file=sys.stderr,
+    )
+    counts = stats.as_dict()
+    drops = [f"{reason}={counts[reason]}" for reason in DROP_REASONS if counts[reason]]
+    if drops:
+        print("dropped: " + ", ".join(drops), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
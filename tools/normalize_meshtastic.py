@@ -0,0 +1,94 @@
+"""
+Normalize a raw Meshtastic log (JSONL) into tele envelopes for backfill.
+
+Each input line is a raw packet as published on farm/<site>/raw/meshtastic/...,
+bare or as a capture record {"topic": ..., "payload": ...}. Envelopes are
+written one per line, ready for tools/cot_replay.py. Packets/s for the whole
+run is printed to stderr at the end; --batch runs the columnar batch
+normalizer instead of the per-packet one.
+
+Usage:
+    python tools/normalize_meshtastic.py raw.jsonl [-o envelopes.jsonl|-] \
+        [--site farmstead] [--chunk-size 10000] [--batch]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.meshtastic import MeshtasticColumns, normalize_meshtastic, normalize_meshtastic_batch  # noqa: E402
+
+
+def _read_packets(path: str) -> Iterator[Dict[str, Any]]:
+    if path == "-":
+        lines = sys.stdin
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        lines = opener(path, "rt", encoding="utf-8")
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "payload" in record and "topic" in record:
+            record = record["payload"]
+        yield record
+
+
+def _chunks(packets: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(packets, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file (.gz allowed) or - for stdin")
+    parser.add_argument("-o", "--output", default="-")
+    parser.add_argument("--site", default=None)
+    parser.add_argument("--config", default=str(ROOT / "configs" / "meshtastic-normalizer.yaml"))
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--batch", action="store_true", help="use normalize_meshtastic_batch per chunk")
+    args = parser.parse_args()
+
+    config = yaml.safe_load(Path(args.config).read_text(encoding="utf-8")) or {}
+    site = args.site or config.get("site_default", "farmstead")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    packets = envelopes = 0
+    start = time.perf_counter()
+    try:
+        for chunk in _chunks(_read_packets(args.input), args.chunk_size):
+            packets += len(chunk)
+            if args.batch:
+                normalized = normalize_meshtastic_batch(MeshtasticColumns.from_raw(chunk), site, config)
+            else:
+                normalized = (normalize_meshtastic(raw, site, config) for raw in chunk)
+            for envelope in normalized:
+                if envelope:
+                    envelopes += 1
+                    output.write(json.dumps(envelope) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{packets} packets -> {envelopes} envelopes in {elapsed:.2f}s ({packets / elapsed:.0f} packets/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
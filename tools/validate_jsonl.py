@@ -0,0 +1,76 @@
+"""
+Validate recorded envelopes (JSONL) against contracts/schemas and summarise failures.
+
+Each input line is an envelope or a capture record {"topic": ..., "payload": ...};
+the schema is picked from the envelope class unless --schema is given.
+Prints valid/invalid counts, failures per schema path and the first failing
+records (numbered from 1, blank lines skipped); exits 1 if anything failed.
+
+Usage:
+    python tools/validate_jsonl.py capture.jsonl [--schema tele.v1.schema.json] \
+        [--workers 4] [--show 10]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from farmstack.schema import default_schema_registry  # noqa: E402
+
+
+def _read_payloads(path: str) -> Iterator[Any]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with sys.stdin if path == "-" else opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if isinstance(record, dict) and "payload" in record and "topic" in record:
+                    record = record["payload"]
+                    if isinstance(record, str):
+                        record = json.loads(record)
+            except json.JSONDecodeError:
+                record = None  # counted under the "class" path
+            yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file (.gz allowed) or - for stdin")
+    parser.add_argument("--schema", help="validate every line against this schema file")
+    parser.add_argument("--workers", type=int, default=0, help="validation processes (0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--show", type=int, default=10, help="failing lines to print")
+    args = parser.parse_args()
+
+    registry = default_schema_registry()
+    started = time.perf_counter()
+    result = registry.validate_many(
+        _read_payloads(args.input),
+        schema_filename=args.schema,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        failures_only=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    total = result.valid + result.invalid
+    print(f"{total} records in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f}/s): "
+          f"{result.valid} valid, {result.invalid} invalid")
+    for path, count in result.by_schema_path.items():
+        print(f"  {count:>8}  {path}")
+    for item in result.items[:args.show]:
+        print(f"record {item.index + 1}: {'; '.join(message for _, message in item.errors)}")
+    sys.exit(1 if result.invalid else 0)
+
+
+if __name__ == "__main__":
+    main()